@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.product import Product, ProductCreate
 from app.services.square_client import SquareClient
+from app.services.catalog_cache import catalog_cache
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -12,6 +13,20 @@ logger = setup_logger(__name__)
 router = APIRouter()
 square_client = SquareClient()
 
+def build_product(item: dict) -> Product:
+    """Convert a Square ITEM object into a Product"""
+    return Product(
+        id=item['id'],
+        name=item['item_data']['name'],
+        sku=item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('sku'),
+        description=item['item_data'].get('description'),
+        price=float(item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('price_money', {}).get('amount', 0)) / 100,
+        category=item['item_data'].get('category', {}).get('name'),
+        image_url=item['item_data'].get('image_url'),
+        created_at=item['created_at'],
+        updated_at=item['updated_at']
+    )
+
 @router.get("/items", response_model=List[Product])
 async def get_catalog_items(
     cursor: Optional[str] = Query(None, description="Pagination cursor"),
@@ -19,20 +34,13 @@ async def get_catalog_items(
 ):
     """Get all catalog items"""
     try:
-        items = await square_client.get_catalog_items(cursor)
-        return [
-            Product(
-                id=item['id'],
-                name=item['item_data']['name'],
-                sku=item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('sku'),
-                description=item['item_data'].get('description'),
-                price=float(item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('price_money', {}).get('amount', 0)) / 100,
-                category=item['item_data'].get('category', {}).get('name'),
-                image_url=item['item_data'].get('image_url'),
-                created_at=item['created_at'],
-                updated_at=item['updated_at']
-            ) for item in items
-        ]
+        cache_key = ('items', cursor)
+        products = catalog_cache.get(cache_key)
+        if products is None:
+            items = await square_client.get_catalog_items(cursor)
+            products = [build_product(item) for item in items]
+            catalog_cache.set(cache_key, products)
+        return products
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -40,18 +48,12 @@ async def get_catalog_items(
 async def get_catalog_item(item_id: str, db: Session = Depends(get_db)):
     """Get a specific catalog item"""
     try:
-        item = await square_client.get_catalog_item(item_id)
-        return Product(
-            id=item['id'],
-            name=item['item_data']['name'],
-            sku=item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('sku'),
-            description=item['item_data'].get('description'),
-            price=float(item['item_data'].get('variations', [{}])[0].get('item_variation_data', {}).get('price_money', {}).get('amount', 0)) / 100,
-            category=item['item_data'].get('category', {}).get('name'),
-            image_url=item['item_data'].get('image_url'),
-            created_at=item['created_at'],
-            updated_at=item['updated_at']
-        )
+        cache_key = ('item', item_id)
+        product = catalog_cache.get(cache_key)
+        if product is None:
+            item = await square_client.get_catalog_item(item_id)
+            product = build_product(item)
+            catalog_cache.set(cache_key, product)
+        return product
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-  
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from typing import Dict
 from app.services.scraper import ScraperService
+from app.utils.metrics import track_task
 
 router = APIRouter()
 scraper_service = ScraperService()
@@ -9,7 +10,7 @@ scraper_service = ScraperService()
 async def start_scraping(background_tasks: BackgroundTasks):
     """Start the scraping process"""
     try:
-        background_tasks.add_task(scraper_service.start_scraping)
+        background_tasks.add_task(track_task('scraping', scraper_service.start_scraping))
         return {"message": "Scraping process started"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
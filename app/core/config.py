@@ -15,6 +15,13 @@ class Settings(BaseSettings):
     SQUARE_ACCESS_TOKEN: str
     SQUARE_ENVIRONMENT: str = "production"  # or "sandbox"
     
+    # Catalog API cache (seconds / max entries)
+    CATALOG_CACHE_TTL: int = 300
+    CATALOG_CACHE_SIZE: int = 256
+    
+    # Square vendor map (seconds before a background refresh)
+    VENDOR_MAP_TTL: int = 3600
+    
     # Database Settings
     SQLALCHEMY_DATABASE_URL: str = "sqlite:///fireworks.db"
     
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from app.utils.logger import setup_logger
+from app.utils.metrics import DB_QUERY_SECONDS
+from app.utils.paths import paths
+
+logger = setup_logger('db_engine')
+
+# Pragmas set on every new SQLite connection. WAL lets the API read while a
+# scraper writes; NORMAL sync is safe under WAL (a power cut can only lose
+# the last commits, never corrupt the file).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,  # bytes of the file read through mmap
+    'cache_size': -64 * 1024,  # negative means KiB: 64 MB page cache per connection
+    'busy_timeout': 30000,  # ms to wait for another writer instead of "database is locked"
+}
+
+# Statement kinds reported by db_query_duration_seconds; anything else is "other"
+TIMED_STATEMENTS = {'select', 'insert', 'update', 'delete'}
+
+_engines: Dict[str, Engine] = {}
+_lock = threading.Lock()
+
+
+def _apply_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _instrument(engine: Engine) -> None:
+    """Record every statement's execution time in db_query_duration_seconds"""
+    database = os.path.basename(engine.url.database or '') or 'memory'
+
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    def record_time(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_query_start', None)
+        if start is None:
+            return
+        kind = statement.lstrip()[:6].lower()
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, database=database,
+                                 statement=kind if kind in TIMED_STATEMENTS else 'other')
+
+    event.listen(engine, 'before_cursor_execute', start_timer)
+    event.listen(engine, 'after_cursor_execute', record_time)
+
+
+def get_engine(database=None) -> Engine:
+    """Shared engine for a SQLite file or URL (default: paths.DB_FILE).
+
+    Engines are created once per database and reused by every module, so
+    scrapers, services and the API share one connection pool per file.
+    Connections may be used from worker threads. Statement timings are
+    recorded in the shared metrics registry.
+    """
+    url = str(database or paths.DB_FILE)
+    if '://' not in url:
+        url = f'sqlite:///{url}'
+
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url, connect_args={'check_same_thread': False})
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _apply_pragmas)
+            _instrument(engine)
+            _engines[url] = engine
+            logger.debug(f"Created database engine for {url}")
+    return engine
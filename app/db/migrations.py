@@ -0,0 +1,132 @@
+import argparse
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import delete, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.db.engine import get_engine
+from app.models.product import Base, BaseProduct, SchemaMigration, SquareProduct, VendorProduct, \
+    VENDOR_PRODUCT_KEY_INDEX
+from app.utils.logger import setup_logger
+from app.utils.paths import paths
+
+logger = setup_logger('migrations')
+
+
+def _add_missing_columns(conn, model) -> None:
+    """ALTER TABLE ADD COLUMN for model columns an older table lacks"""
+    existing = {col['name'] for col in inspect(conn).get_columns(model.__tablename__)}
+    for col in model.__table__.columns:
+        if col.name not in existing:
+            col_type = col.type.compile(dialect=conn.dialect)
+            logger.info(f"Adding column {model.__tablename__}.{col.name}")
+            conn.execute(text(f"ALTER TABLE {model.__tablename__} ADD COLUMN {col.name} {col_type}"))
+
+
+def _create_declared_indexes(conn, model, names=None) -> None:
+    """Create the model's declared indexes (or just `names`) that are missing"""
+    for index in model.__table__.indexes:
+        if names is None or index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def square_product_columns(conn) -> None:
+    """Columns added to square_products by the catalog mirror"""
+    _add_missing_columns(conn, SquareProduct)
+
+
+def vendor_product_unique_key(conn) -> None:
+    """One VendorProduct per (base_product_id, vendor_name)"""
+    # Older per-row writers could insert duplicates; keep the oldest row,
+    # which is the one their lookups found and kept updating
+    table = VendorProduct.__table__
+    keep = (select(func.min(table.c.id))
+            .group_by(table.c.base_product_id, table.c.vendor_name)
+            .scalar_subquery())
+    removed = conn.execute(
+        delete(table).where(table.c.base_product_id.isnot(None), table.c.id.notin_(keep))
+    ).rowcount
+    if removed:
+        logger.warning(f"Removed {removed} duplicate vendor products before adding the unique index")
+    _create_declared_indexes(conn, VendorProduct, {VENDOR_PRODUCT_KEY_INDEX})
+
+
+def lookup_indexes(conn) -> None:
+    """Indexes for product name, product URL and freshness lookups"""
+    _create_declared_indexes(conn, BaseProduct)
+    _create_declared_indexes(conn, VendorProduct)
+
+
+# Applied in order, each in its own transaction. Never renumber or edit a
+# released migration; append a new one. Each must be safe to run against
+# a database created from the current models (where it is a no-op).
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, 'square_product_columns', square_product_columns),
+    (2, 'vendor_product_unique_key', vendor_product_unique_key),
+    (3, 'lookup_indexes', lookup_indexes),
+]
+
+
+def applied_versions(engine) -> set:
+    """Versions recorded in schema_migrations (empty if the table does not exist yet)"""
+    if not inspect(engine).has_table(SchemaMigration.__tablename__):
+        return set()
+    with engine.connect() as conn:
+        return set(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def migrate(engine) -> List[int]:
+    """Create missing tables and apply pending migrations; returns the versions applied"""
+    Base.metadata.create_all(engine)
+    done = applied_versions(engine)
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+        logger.info(f"Applying migration {version} ({name}) to {engine.url.database}")
+        with engine.begin() as conn:
+            upgrade(conn)
+            # Another process may have applied it concurrently; the steps are idempotent
+            conn.execute(sqlite_insert(SchemaMigration.__table__)
+                         .values(version=version, name=name, applied_at=datetime.utcnow())
+                         .on_conflict_do_nothing())
+        applied.append(version)
+    return applied
+
+
+def check_schema(engine) -> Dict:
+    """Report pending migrations and declared indexes missing from the database"""
+    inspector = inspect(engine)
+    missing_indexes = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing_indexes.extend(index.name for index in table.indexes if index.name not in existing)
+
+    done = applied_versions(engine)
+    pending = [version for version, _, _ in MIGRATIONS if version not in done]
+    if missing_indexes or pending:
+        logger.warning(f"Database {engine.url.database} needs migrating: pending migrations {pending}, "
+                       f"missing indexes {missing_indexes}. Run: python -m app.db.migrations")
+    else:
+        logger.info(f"Database schema is up to date (version {MIGRATIONS[-1][0]})")
+    return {'pending': pending, 'missing_indexes': missing_indexes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Apply database migrations')
+    parser.add_argument('--db', action='append',
+                        help='SQLite file to migrate (repeatable); defaults to the scraper database')
+    parser.add_argument('--check', action='store_true', help='Only report what is missing')
+    args = parser.parse_args()
+
+    failed = False
+    for db_file in args.db or [paths.DB_FILE]:
+        engine = get_engine(db_file)
+        if not args.check:
+            applied = migrate(engine)
+            logger.info(f"{db_file}: applied migrations {applied}" if applied else f"{db_file}: nothing to apply")
+        report = check_schema(engine)
+        failed = failed or bool(report['pending'] or report['missing_indexes'])
+    sys.exit(1 if failed else 0)
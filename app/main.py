@@ -1,15 +1,20 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.endpoints import catalog, images, scraping
 from app.core.config import settings
+from app.db.migrations import check_schema
+from app.db.session import engine
 from app.middleware.error_handler import (
     error_handler_middleware,
     validation_exception_handler,
     sqlalchemy_exception_handler
 )
+from app.middleware.metrics import metrics_middleware
+from app.utils.metrics import CONTENT_TYPE, metrics
 
 app = FastAPI(
     title="NyTex Fireworks API",
@@ -19,6 +24,8 @@ app = FastAPI(
 
 # Add middleware
 app.middleware("http")(error_handler_middleware)
+# Outermost, so responses produced by the error handler are counted too
+app.middleware("http")(metrics_middleware)
 
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -38,6 +45,17 @@ app.include_router(catalog.router, prefix="/api/catalog", tags=["catalog"])
 app.include_router(images.router, prefix="/api/images", tags=["images"])
 app.include_router(scraping.router, prefix="/api/scraping", tags=["scraping"])
 
+# Report missing indexes or pending migrations on the API database
+app.add_event_handler("startup", lambda: check_schema(engine))
+
+# Release the shared Square connection pool
+app.add_event_handler("shutdown", catalog.square_client.close)
+
 @app.get("/")
 async def root():
-    return {"message": "Welcome to NyTex Fireworks API"}
\ No newline at end of file
+    return {"message": "Welcome to NyTex Fireworks API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Request, Square API, background task, cache and database metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
\ No newline at end of file
@@ -0,0 +1,35 @@
+import time
+from fastapi import Request
+from starlette.routing import replace_params
+from app.utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS
+
+
+def route_template(request: Request) -> str:
+    """Matched route template, e.g. "/api/catalog/items/{item_id}"; "unmatched" if no route matched.
+
+    The template rather than the raw path keeps metric label values bounded.
+    """
+    route = request.scope.get('route')
+    if route is None or not hasattr(route, 'path_format'):
+        return 'unmatched'
+    # Routes of an included router may be matched relative to its prefix;
+    # recover the prefix by rendering the route and stripping it from the path
+    suffix, _ = replace_params(route.path_format, route.param_convertors,
+                               dict(request.scope.get('path_params', {})))
+    path = request.scope.get('path', '')
+    prefix = path[:-len(suffix)] if suffix and path.endswith(suffix) else ''
+    return prefix + route.path
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Record each request's latency and status under its route template"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = route_template(request)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route)
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=str(status_code))
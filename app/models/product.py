@@ -1,16 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
 Base = declarative_base()
 
+# Unique key the bulk product writer upserts on (see app/services/product_writer.py)
+VENDOR_PRODUCT_KEY_INDEX = 'uq_vendor_products_base_vendor'
+
 class BaseProduct(Base):
     """Base product information that's common across all sources"""
     __tablename__ = 'base_products'
     
     id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -32,13 +35,19 @@ class VendorProduct(Base):
     vendor_category = Column(String(255))
     vendor_image_url = Column(String(1024))
     local_image_path = Column(String(1024))
-    vendor_product_url = Column(String(1024))
+    vendor_product_url = Column(String(1024), index=True)  # Looked up by the NyTex video updater
     vendor_video_url = Column(String(1024))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
     base_product = relationship("BaseProduct", back_populates="vendor_products")
+    
+    __table_args__ = (
+        Index(VENDOR_PRODUCT_KEY_INDEX, 'base_product_id', 'vendor_name', unique=True),
+        # Incremental crawls select a vendor's recently updated rows
+        Index('ix_vendor_products_vendor_updated', 'vendor_name', 'updated_at'),
+    )
 
 class SquareProduct(Base):
     """Product information from Square"""
@@ -53,11 +62,97 @@ class SquareProduct(Base):
     category_id = Column(String(255))
     price_money = Column(Integer)  # Store in cents
     image_ids = Column(Text)  # Store as JSON string
+    product_type = Column(String(50))
+    is_archived = Column(Boolean, default=False)
+    is_deleted = Column(Boolean, default=False)
+    square_updated_at = Column(String(50))  # Square's RFC 3339 updated_at
+    catalog_object = Column(Text)  # Raw Square ITEM object as JSON (variations stored separately)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
     
-    # Relationship
+    # Relationships
     base_product = relationship("BaseProduct", back_populates="square_product")
+    variations = relationship("SquareVariation", back_populates="square_product",
+                              order_by="SquareVariation.ordinal")
+
+class SquareVariation(Base):
+    """Item variation information from Square, mirrored by SquareCatalogSync"""
+    __tablename__ = 'square_variations'
+    
+    id = Column(Integer, primary_key=True)
+    square_product_id = Column(Integer, ForeignKey('square_products.id'))
+    square_id = Column(String(255), unique=True)
+    square_version = Column(Integer)
+    item_square_id = Column(String(255), index=True)
+    name = Column(String(255))
+    sku = Column(String(100))
+    ordinal = Column(Integer)
+    price_money = Column(Integer)  # Store in cents
+    unit_cost = Column(Integer)  # Store in cents
+    vendor_id = Column(String(255))  # From the first vendor info
+    vendor_sku = Column(String(100))
+    vendor_price = Column(Integer)  # Store in cents
+    vendor_infos = Column(Text)  # All vendor infos as JSON string
+    image_ids = Column(Text)  # Store as JSON string
+    is_deleted = Column(Boolean, default=False)
+    square_updated_at = Column(String(50))
+    catalog_object = Column(Text)  # Raw Square ITEM_VARIATION object as JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    square_product = relationship("SquareProduct", back_populates="variations")
+
+class SquareCategory(Base):
+    """Catalog category from Square, mirrored by SquareCatalogSync"""
+    __tablename__ = 'square_categories'
+    
+    id = Column(Integer, primary_key=True)
+    square_id = Column(String(255), unique=True)
+    square_version = Column(Integer)
+    name = Column(String(255))
+    is_deleted = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class SquareSyncState(Base):
+    """Cursor for incremental Square catalog syncs"""
+    __tablename__ = 'square_sync_state'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True)  # e.g., "catalog"
+    last_synced_at = Column(String(50))  # Square's latest_time from the last completed sync
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SchemaMigration(Base):
+    """Applied database migrations (see app/db/migrations.py)"""
+    __tablename__ = 'schema_migrations'
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class ImageBlob(Base):
+    """Unique image content in the content-addressed store (see app/services/image_store.py)"""
+    __tablename__ = 'image_blobs'
+    
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    size = Column(Integer)  # Bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ImageManifestEntry(Base):
+    """Maps a vendor product's image file to the blob holding its bytes"""
+    __tablename__ = 'image_manifest'
+    
+    id = Column(Integer, primary_key=True)
+    local_path = Column(String(1024), unique=True, nullable=False)  # Named file in the vendor image folder
+    sha256 = Column(String(64), index=True, nullable=False)
+    vendor_name = Column(String(255))
+    product_name = Column(String(255))
+    source_url = Column(String(1024), index=True)  # Image URL it was downloaded from
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class NytexProduct(Base):
     """Product information from shop.nytexfireworks.com"""
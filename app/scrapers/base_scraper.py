@@ -1,16 +1,51 @@
 import yaml
 import logging
 import os
+import threading
 from urllib.parse import urlparse, urljoin
 from app.utils.paths import paths
 from app.utils.logger import setup_logger
 from app.utils.request_helpers import get_with_ssl_ignore
-from bs4 import BeautifulSoup
+from app.utils.http_cache import http_cache
+from app.utils.crawl_checkpoint import CrawlProgress, checkpoint_store
+from app.utils.transport import transport
+from app.services.image_store import image_store
+from app.services.image_normalizer import ImageNormalizer, normalize_inline
+from app.services.product_writer import ProductWriter
+from bs4 import BeautifulSoup, SoupStrainer
 import time
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Tuple
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from PIL import Image
-import io
+import asyncio
+import aiohttp
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.db.engine import get_engine
+from app.models.product import VendorProduct
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup tree builder
+    HTML_PARSER = 'lxml'
+except ImportError:  # html.parser ships with Python, it is just several times slower
+    HTML_PARSER = 'html.parser'
+
+# Async crawl engine defaults, overridable per site in websites.yaml
+DEFAULT_CRAWL_CONCURRENCY = 4  # product pages in flight per host
+DEFAULT_CRAWL_DELAY = 1.0  # seconds each request slot waits before its next request
+# Listing pages in a row without new product links before a crawl stops
+MAX_EMPTY_PAGES = 3
+
+def parse_html(html: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """Parse HTML with the fastest installed backend.
+    
+    parse_only restricts the tree to matching elements (and everything
+    inside them), which skips building the rest of the page.
+    """
+    return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+
+# Strainer for pages that are only searched for links
+LINKS_ONLY = SoupStrainer('a', href=True)
 
 @dataclass
 class ProductData:
@@ -35,6 +70,8 @@ class ScraperStats:
     db_updates: int = 0
     db_inserts: int = 0
     db_unchanged: int = 0
+    pages_unchanged: int = 0
+    products_skipped: int = 0
     errors: int = 0
     
     def print_summary(self, logger):
@@ -43,6 +80,10 @@ class ScraperStats:
         logger.info("="*50)
         logger.info(f"Pages Processed: {self.pages_processed}")
         logger.info(f"Products Found: {self.products_found}")
+        if self.pages_unchanged:
+            logger.info(f"Unchanged Product Pages (304): {self.pages_unchanged}")
+        if self.products_skipped:
+            logger.info(f"Recently Seen Products Skipped: {self.products_skipped}")
         logger.info("\nImage Statistics:")
         logger.info(f"  • Downloaded: {self.images_downloaded}")
         logger.info(f"  • Already Existed: {self.images_existing}")
@@ -57,13 +98,37 @@ class ScraperStats:
         logger.info("="*50 + "\n")
 
 class BaseScraper:
+    # SoupStrainers limiting what crawl() parses; None parses the whole page.
+    # Only set them when get_product_links / get_next_page_url (listing) or
+    # extract_product_data / process_product (product) need nothing else.
+    listing_parse_only: Optional[SoupStrainer] = None
+    product_parse_only: Optional[SoupStrainer] = None
+    
     def __init__(self, scraper_name):
+        self.scraper_name = scraper_name
         self.logger = setup_logger(scraper_name)
         self.config = self._load_config(scraper_name)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.stats = ScraperStats(self.config.get('name', scraper_name))
+        # Products are saved in worker threads during a crawl; count() updates stats under this lock
+        self.stats_lock = threading.Lock()
+        # Errors counted by the current thread, so _save_product can tell a failed save
+        self._thread_errors = threading.local()
+        # Set by run(full_refresh=True) to ignore the freshness window
+        self.full_refresh = False
+        # Set by run(resume=True) to continue from the last crawl checkpoint
+        self.resume = False
+        # Image conversion pool, open while run() or a crawl is running
+        self.normalizer = None
+        # Progress of the running crawl (see open_checkpoint)
+        self.checkpoint = None
+        # Buffered database writer, open while a crawl is running
+        self.product_writer = None
+        # Event loop of the running crawl and its per-host request slots
+        self._crawl_loop = None
+        self._host_slots = {}
     
     def _load_config(self, scraper_name):
         """Load scraper configuration from websites.yaml"""
@@ -73,15 +138,26 @@ class BaseScraper:
         for website in config['websites']:
             if website.get('scraper') == scraper_name:
                 return {
+                    'name': website.get('name', scraper_name),
                     'enabled': website.get('enabled', False),
                     'limit': website.get('limit', -1),
                     'urls': website.get('urls', [website.get('url')]) if website.get('url') or website.get('urls') else [],
+                    'concurrency': website.get('concurrency', DEFAULT_CRAWL_CONCURRENCY),
+                    'delay': website.get('delay', DEFAULT_CRAWL_DELAY),
+                    'http_cache': website.get('http_cache', True),
+                    'freshness_days': website.get('freshness_days', 0),
                     'note': website.get('note', '')  # Include notes for reference
                 }
         return None
     
-    def run(self):
-        """Main entry point for scraper"""
+    def run(self, full_refresh=False, resume=False):
+        """Main entry point for scraper
+        
+        With resume=True, start URLs are crawled from their last checkpoint
+        (see open_checkpoint) instead of from the first page.
+        """
+        self.full_refresh = full_refresh
+        self.resume = resume
         if not self.config:
             self.logger.error("No configuration found for scraper")
             return
@@ -90,9 +166,15 @@ class BaseScraper:
             self.logger.info("Scraper is disabled in config")
             return
             
-        for url in self.config['urls']:
-            self.logger.info(f"\nProcessing URL: {url}")
-            self.scrape_website(url, limit=self.config['limit'])
+        # One image conversion pool for all of this vendor's start URLs
+        self.normalizer = ImageNormalizer()
+        try:
+            for url in self.config['urls']:
+                self.logger.info(f"\nProcessing URL: {url}")
+                self.scrape_website(url, limit=self.config['limit'])
+        finally:
+            self.normalizer.close()
+            self.normalizer = None
     
     # Utility methods that scrapers can optionally use
     def get_domain_folder(self, url):
@@ -111,36 +193,137 @@ class BaseScraper:
             self.logger.error(f"Error making request to {url}: {str(e)}")
             return None
     
-    def download_image(self, url, filepath, max_retries=3, retry_delay=2):
-        """Download image with retry logic and better error handling"""
-        for attempt in range(max_retries):
-            try:
-                # Try HTTPS first
-                if url.startswith('http://'):
-                    https_url = url.replace('http://', 'https://', 1)
-                    response = get_with_ssl_ignore(https_url, headers=self.headers)
-                    if response.status_code == 200:
-                        url = https_url  # Use HTTPS if it works
-                    
-                response = get_with_ssl_ignore(url, headers=self.headers)
-                if response.status_code == 200:
-                    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    return True
-                else:
-                    self.logger.warning(f"Attempt {attempt + 1}/{max_retries}: Got status code {response.status_code}")
-                    
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:  # Don't sleep on last attempt
-                    time.sleep(retry_delay)
-                    continue
-                self.logger.error(f"Error downloading image {url}: {str(e)}")
-                return False
-            
+    def count(self, **counts):
+        """Add to the scraper stats, e.g. count(images_downloaded=1); safe from crawl worker threads"""
+        with self.stats_lock:
+            for name, value in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+        if counts.get('errors'):
+            self._thread_errors.count = getattr(self._thread_errors, 'count', 0) + counts['errors']
+    
+    @contextmanager
+    def host_slot(self, url: str):
+        """Hold url's per-host request slot from a crawl worker thread.
+        
+        Requests made while a product is saved (image downloads) then share
+        the crawl's concurrency cap and politeness delay with its page
+        fetches. Outside a crawl, or on the crawl's own event loop, this
+        does nothing.
+        """
+        loop = self._crawl_loop
+        try:
+            on_crawl_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            # No event loop in this thread: a crawl worker thread, or no crawl at all
+            on_crawl_loop = False
+        if loop is None or on_crawl_loop:
+            yield
+            return
+        slots = asyncio.run_coroutine_threadsafe(self._acquire_host_slot(urlparse(url).netloc), loop).result()
+        try:
+            yield
+        finally:
+            time.sleep(self.config.get('delay', DEFAULT_CRAWL_DELAY))
+            loop.call_soon_threadsafe(slots.release)
+    
+    async def _acquire_host_slot(self, host: str) -> asyncio.Semaphore:
+        slots = self._slots_for(host)
+        await slots.acquire()
+        return slots
+    
+    def _slots_for(self, host: str) -> asyncio.Semaphore:
+        """The crawl's request slots for a host (only used on the crawl's event loop)"""
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(
+                self.config.get('concurrency', DEFAULT_CRAWL_CONCURRENCY)
+            )
+        return slots
+    
+    def fetch_image(self, url, headers=None, **kwargs):
+        """GET an image through the shared transport, under the crawl's per-host limits"""
+        with self.host_slot(url):
+            return transport.get(url, headers=headers or self.headers, **kwargs)
+    
+    def download_image(self, url, filepath, max_retries=3, product_name=None):
+        """Download image; transient failures are retried with backoff by the transport"""
+        try:
+            # Bytes already fetched from this URL are linked from the image store, not re-downloaded
+            if self.link_known_image(url, filepath, product_name):
+                return True
+                
+            # Use HTTPS when the host supports it (probed once per host by the transport)
+            url = transport.prefer_https(url, headers=self.headers)
+            response = self.fetch_image(url, retries=max_retries - 1)
+            if response.status_code == 200:
+                self.save_image(response.content, filepath, url, product_name)
+                return True
+            self.logger.warning(f"Got status code {response.status_code} for {url}")
+        except Exception as e:
+            self.logger.error(f"Error downloading image {url}: {str(e)}")
         return False
     
+    def save_image(self, data, filepath, source_url=None, product_name=None):
+        """Save image bytes to filepath through the content-addressed image store"""
+        image_store.save(data, filepath, vendor_name=self.stats.vendor_name,
+                         product_name=product_name, source_url=source_url)
+    
+    def save_normalized_image(self, data, filepath, source_url=None, product_name=None,
+                              on_saved=None, product_url=None):
+        """Convert image bytes to PNG and save them through the image store.
+        
+        on_saved() runs once the file is written, so count the download or
+        record the file's path there. During a crawl the conversion is queued
+        on the normalizer process pool and finishes later; if it fails, see
+        image_failed(product_url). Otherwise it runs inline and errors raise.
+        """
+        def save(png_bytes):
+            self.save_image(png_bytes, filepath, source_url, product_name)
+            if on_saved:
+                on_saved()
+        
+        if self.normalizer is None:
+            save(normalize_inline(data))
+            return
+        self.normalizer.submit(data, save, label=os.path.basename(filepath),
+                               on_failed=lambda error: self.image_failed(product_url))
+    
+    def image_failed(self, product_url=None):
+        """Count an image whose queued conversion failed.
+        
+        The cached copy of its product page is dropped so the next crawl
+        processes the product again.
+        """
+        self.count(errors=1)
+        if product_url:
+            http_cache.forget(product_url)
+    
+    def write_product(self, product: ProductData, **columns):
+        """Write a product's VendorProduct row (keyword arguments set extra columns).
+        
+        During a crawl the row is buffered by the product writer and written
+        in bulk; otherwise it is written immediately.
+        """
+        if self.product_writer is not None:
+            self.product_writer.add(product, **columns)
+            return
+        with ProductWriter(self.stats.vendor_name) as writer:
+            writer.add(product, **columns)
+        self._count_writes(writer.stats)
+    
+    def _count_writes(self, writer_stats: Dict):
+        self.count(db_inserts=writer_stats['inserted'], db_updates=writer_stats['updated'],
+                   db_unchanged=writer_stats['unchanged'], errors=writer_stats['failed'])
+    
+    def link_known_image(self, source_url, filepath, product_name=None) -> bool:
+        """Link filepath to the stored image previously downloaded from source_url, if any"""
+        sha256 = image_store.find_by_url(source_url)
+        if not sha256:
+            return False
+        self.logger.info(f"Image already downloaded from {source_url}, linking stored copy")
+        return image_store.link(sha256, filepath, vendor_name=self.stats.vendor_name,
+                                product_name=product_name, source_url=source_url)
+    
     def count_existing_images(self, directory):
         """Count number of images in directory"""
         if not os.path.exists(directory):
@@ -148,24 +331,24 @@ class BaseScraper:
             return 0
         return len([f for f in os.listdir(directory) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))])
     
-    def download_product_image(self, image_url: str, filepath: str) -> bool:
-        """Download and save product image with error handling"""
+    def download_product_image(self, image_url: str, filepath: str, on_saved=None, product_url=None) -> bool:
+        """Download and save product image with error handling.
+        
+        Returns False if the download failed. During a crawl the PNG
+        conversion may still be running when this returns; on_saved() runs
+        once the file is written (see save_normalized_image).
+        """
         try:
-            response = get_with_ssl_ignore(image_url, headers=self.headers)
-            if response.status_code == 200:
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                
-                # Convert image if needed
-                image = Image.open(io.BytesIO(response.content))
-                
-                # Convert to RGB if needed
-                if image.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', image.size, (255, 255, 255))
-                    background.paste(image, mask=image.split()[-1])
-                    image = background
+            if self.link_known_image(image_url, filepath):
+                if on_saved:
+                    on_saved()
+                return True
                 
-                # Save as PNG
-                image.save(filepath, 'PNG', optimize=True)
+            response = self.fetch_image(image_url)
+            if response.status_code == 200:
+                # Convert to PNG (in the normalizer pool during a crawl)
+                self.save_normalized_image(response.content, filepath, image_url,
+                                           on_saved=on_saved, product_url=product_url)
                 return True
             return False
         except Exception as e:
@@ -191,4 +374,304 @@ class BaseScraper:
 
     def get_product_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """To be implemented by each scraper"""
-        raise NotImplementedError("Scrapers must implement get_product_links method") 
\ No newline at end of file
+        raise NotImplementedError("Scrapers must implement get_product_links method") 
+
+    def listing_data(self, product_url: str) -> Optional[Dict]:
+        """What extract_product_data needs from the product's listing page, if anything.
+        
+        Kept in the crawl checkpoint so a resumed crawl can process the
+        product without refetching that page; see restore_listing_data().
+        """
+        return None
+
+    def restore_listing_data(self, product_url: str, data: Dict) -> None:
+        """Put back what listing_data() recorded, before a resumed crawl fetches the product"""
+        pass
+
+    def process_product(self, product: ProductData, product_soup: BeautifulSoup, domain_dir: str) -> bool:
+        """Save one crawled product (runs in a worker thread during crawl).
+        
+        Returns True if the product counts toward the scraper's limit. The
+        default downloads the product image to domain_dir as <clean name>.png.
+        """
+        if not product.image_url:
+            self.logger.warning(f"No image found for product: {product.name}")
+            return False
+            
+        filepath = os.path.join(domain_dir, f"{self.clean_filename(product.name)}.png")
+        if os.path.exists(filepath):
+            self.logger.info(f"Image already exists for {product.name}")
+            self.count(images_existing=1)
+            return False
+            
+        if self.download_image(product.image_url, filepath, product_name=product.name):
+            self.logger.info(f"Downloaded image for {product.name}")
+            self.count(images_downloaded=1)
+            return True
+            
+        self.logger.error(f"Failed to download image for {product.name}")
+        self.count(errors=1)
+        return False
+
+    # Async crawl engine
+    def crawl(self, start_url: str, limit: int = -1) -> int:
+        """Crawl a listing URL and its following pages; returns the number of products processed.
+        
+        Listing pages are walked in order with get_product_links and
+        get_next_page_url. Product pages are fetched concurrently with
+        aiohttp, at most config['concurrency'] at a time per host with each
+        request slot pausing config['delay'] seconds, then parsed with
+        extract_product_data and saved by process_product in a worker thread.
+        Image conversions queued with save_normalized_image run in a process
+        pool alongside the crawl (shared by all of run()'s start URLs) and are
+        drained before it returns; products passed to write_product are
+        written in batches and flushed likewise.
+        
+        With config['freshness_days'] set (and no full refresh), product
+        pages this vendor saved within that many days whose local image
+        still exists are not fetched at all.
+        
+        Unless config['http_cache'] is false, pages are fetched with
+        conditional GETs against the on-disk page cache: unchanged listing
+        pages are parsed from the cached copy and unchanged product pages
+        are skipped without extraction or database writes.
+        
+        Progress is checkpointed as the crawl goes; with run(resume=True)
+        finished listing pages and saved products are not fetched again.
+        """
+        return asyncio.run(self.crawl_async(start_url, limit))
+
+    async def crawl_async(self, start_url: str, limit: int = -1) -> int:
+        """Async implementation of crawl"""
+        domain_dir = os.path.join(paths.IMAGES_DIR, self.get_domain_folder(start_url))
+        os.makedirs(domain_dir, exist_ok=True)
+        
+        concurrency = self.config.get('concurrency', DEFAULT_CRAWL_CONCURRENCY)
+        self._host_slots = {}
+        self._crawl_loop = asyncio.get_running_loop()
+        state = {'processed': 0}
+        seen = set()
+        start_time = time.time()
+        
+        progress = self.open_checkpoint(start_url)
+        if progress.checkpoint.completed:
+            return 0
+        
+        fresh_urls = await asyncio.to_thread(self.load_fresh_urls)
+        # crawl() called outside run() gets a conversion pool of its own
+        own_normalizer = self.normalizer is None
+        if own_normalizer:
+            self.normalizer = ImageNormalizer()
+        self.product_writer = ProductWriter(self.stats.vendor_name)
+        self.product_writer.on_failed = self._forget_unsaved
+        # Rows of products marked done are written before each checkpoint save
+        progress.before_save = self.product_writer.flush
+        self.checkpoint = progress
+        finished = False
+        try:
+            await self._crawl_pages(start_url, limit, domain_dir, concurrency, state, seen, fresh_urls)
+            finished = True
+        finally:
+            # Let queued image conversions finish (their callbacks may add products),
+            # then write the buffered products before reporting
+            if own_normalizer:
+                await asyncio.to_thread(self.normalizer.close)
+                self.normalizer = None
+            else:
+                await asyncio.to_thread(self.normalizer.wait)
+            self._count_writes(await asyncio.to_thread(self.product_writer.close))
+            self.product_writer = None
+            progress.before_save = None
+            self.checkpoint = None
+            self._crawl_loop = None
+            # Failed pages and products keep the checkpoint open for the next --resume
+            await asyncio.to_thread(progress.complete if finished and progress.is_finished(start_url)
+                                    else progress.save)
+        
+        self.logger.info(f"Crawled {len(seen)} product pages in {time.time() - start_time:.2f}s "
+                         f"({state['processed']} processed)")
+        return state['processed']
+
+    async def _crawl_pages(self, start_url: str, limit: int, domain_dir: str, concurrency: int,
+                           state: Dict, seen: Set[str], fresh_urls: Set[str]) -> None:
+        """Walk the listing pages and wait for every product task"""
+        tasks = []
+        progress = self.checkpoint
+        
+        async with transport.create_async_session(self.headers, limit_per_host=concurrency) as session:
+            page_url = progress.resume_from(start_url)
+            visited_pages = set()
+            empty_pages = 0
+            
+            if progress.resumed:
+                # Products from listing pages finished before the interruption
+                seen.update(progress.found)
+                pending = [link for link in progress.pending_products() if link not in fresh_urls]
+                for link in pending:
+                    data = progress.listing_data_for(link)
+                    if data:
+                        self.restore_listing_data(link, data)
+                tasks.extend(
+                    asyncio.create_task(self._crawl_product(session, link, domain_dir, limit, state))
+                    for link in pending
+                )
+            
+            while page_url and page_url not in visited_pages and not self._limit_reached(state, limit):
+                visited_pages.add(page_url)
+                self.logger.info(f"\nProcessing page {len(visited_pages)}: {page_url}")
+                
+                page = await self.fetch_page(session, page_url)
+                if page is None:
+                    break
+                html, _ = page
+                soup = parse_html(html, self.listing_parse_only)
+                
+                links = [urljoin(page_url, link) for link in self.get_product_links(soup, page_url)]
+                new_links = [link for link in dict.fromkeys(links) if link not in seen]
+                seen.update(new_links)
+                self.logger.info(f"Found {len(new_links)} new product links")
+                
+                if fresh_urls:
+                    stale_links = [link for link in new_links if link not in fresh_urls]
+                    if len(stale_links) < len(new_links):
+                        self.logger.info(f"Skipping {len(new_links) - len(stale_links)} recently seen products")
+                        self.count(products_skipped=len(new_links) - len(stale_links))
+                else:
+                    stale_links = new_links
+                
+                if new_links:
+                    empty_pages = 0
+                    self.count(pages_processed=1, products_found=len(new_links))
+                    tasks.extend(
+                        asyncio.create_task(self._crawl_product(session, link, domain_dir, limit, state))
+                        for link in stale_links
+                    )
+                else:
+                    empty_pages += 1
+                    if empty_pages >= MAX_EMPTY_PAGES:
+                        self.logger.info(f"{MAX_EMPTY_PAGES} pages in a row without products - stopping")
+                        await asyncio.to_thread(progress.page_done, start_url, [], None)
+                        break
+                
+                # Pagination helpers may make blocking requests, so keep them off the event loop
+                next_url = await asyncio.to_thread(self.get_next_page_url, soup, page_url)
+                next_url = urljoin(page_url, next_url) if next_url else None
+                # Checkpoint saves flush the product writer, so keep them off the event loop
+                listing_data = {link: self.listing_data(link) for link in stale_links}
+                await asyncio.to_thread(
+                    progress.page_done, start_url, stale_links, next_url,
+                    {link: data for link, data in listing_data.items() if data}
+                )
+                page_url = next_url
+            
+            await asyncio.gather(*tasks)
+
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[Tuple[str, bool]]:
+        """GET a page under the per-host concurrency cap and politeness delay; (text, changed) or None"""
+        async with self._slots_for(urlparse(url).netloc):
+            try:
+                if not self.config.get('http_cache', True):
+                    text = await transport.fetch_text(session, url)
+                    return None if text is None else (text, True)
+                return await transport.fetch_page(session, url)
+            finally:
+                await asyncio.sleep(self.config.get('delay', DEFAULT_CRAWL_DELAY))
+
+    def open_checkpoint(self, start_url: str) -> CrawlProgress:
+        """Progress tracker for crawling start_url, continuing the last checkpoint when resuming"""
+        progress = checkpoint_store.open(self.scraper_name, start_url, resume=self.resume)
+        if progress.resumed:
+            checkpoint = progress.checkpoint
+            if checkpoint.completed:
+                self.logger.info(f"Resume: {start_url} was already crawled completely")
+            else:
+                self.logger.info(f"Resuming {start_url}: {len(checkpoint.products_done)} products done, "
+                                 f"{len(progress.pending_products())} pending")
+        elif self.resume:
+            self.logger.info(f"No checkpoint to resume for {start_url}, starting from the first page")
+        return progress
+    
+    def load_fresh_urls(self) -> Set[str]:
+        """Product URLs this vendor saved within the freshness window that still have a local image"""
+        freshness_days = self.config.get('freshness_days', 0)
+        if self.full_refresh or not freshness_days:
+            return set()
+            
+        cutoff = datetime.utcnow() - timedelta(days=freshness_days)
+        try:
+            with Session(get_engine()) as session:
+                rows = session.query(VendorProduct.vendor_product_url, VendorProduct.local_image_path).filter(
+                    VendorProduct.vendor_name == self.stats.vendor_name,
+                    VendorProduct.updated_at >= cutoff,
+                    VendorProduct.vendor_product_url.isnot(None)
+                ).all()
+        except Exception as e:
+            self.logger.error(f"Error loading recently seen products: {str(e)}")
+            return set()
+            
+        fresh_urls = {url for url, image_path in rows if image_path and os.path.exists(image_path)}
+        self.logger.info(f"Incremental crawl: {len(fresh_urls)} products seen in the last {freshness_days} days")
+        return fresh_urls
+
+    def _limit_reached(self, state: Dict, limit: int) -> bool:
+        return limit != -1 and state['processed'] >= limit
+
+    def _save_product(self, product: ProductData, product_soup, domain_dir: str) -> Tuple[bool, bool]:
+        """process_product in a worker thread; (counted, failed), failed if it counted an error"""
+        self._thread_errors.count = 0
+        counted = self.process_product(product, product_soup, domain_dir)
+        return counted, self._thread_errors.count > 0
+    
+    def _forget_unsaved(self, rows: List[Dict]) -> None:
+        """Drop the cached pages of products whose database write failed"""
+        for row in rows:
+            if row.get('vendor_product_url'):
+                http_cache.forget(row['vendor_product_url'])
+    
+    async def _crawl_product(self, session: aiohttp.ClientSession, product_url: str,
+                             domain_dir: str, limit: int, state: Dict) -> None:
+        """Fetch, extract and save one product page"""
+        if self._limit_reached(state, limit):
+            return
+            
+        self.logger.info(f"Fetching product page: {product_url}")
+        page = await self.fetch_page(session, product_url)
+        if page is None:
+            self.count(errors=1)
+            return
+        html, changed = page
+        if not changed:
+            self.logger.info(f"Product page unchanged since last crawl: {product_url}")
+            self.count(pages_unchanged=1)
+            await asyncio.to_thread(self.checkpoint.product_done, product_url)
+            return
+            
+        try:
+            product_soup = parse_html(html, self.product_parse_only)
+            product = self.extract_product_data(product_soup, product_url)
+        except Exception as e:
+            self.count(errors=1)
+            self.logger.error(f"Error extracting product {product_url}: {str(e)}")
+            # Drop the cached copy so the next crawl processes the page again
+            http_cache.forget(product_url)
+            return
+            
+        if not product or self._limit_reached(state, limit):
+            http_cache.forget(product_url)
+            return
+            
+        # Reserve a place under the limit while the product is being saved
+        state['processed'] += 1
+        try:
+            counted, failed = await asyncio.to_thread(self._save_product, product, product_soup, domain_dir)
+        except Exception as e:
+            self.count(errors=1)
+            self.logger.error(f"Error processing product {product_url}: {str(e)}")
+            counted, failed = False, True
+        if failed:
+            # Drop the cached copy so the next crawl processes the page again
+            http_cache.forget(product_url)
+        else:
+            await asyncio.to_thread(self.checkpoint.product_done, product_url)
+        if not counted:
+            state['processed'] -= 1
@@ -9,11 +9,10 @@ import re
 from PIL import Image
 import io
 import os
-from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.base_scraper import BaseScraper, parse_html
 from app.utils.paths import paths
 from app.utils.logger import setup_logger
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from app.db.engine import get_engine
 import logging
 from sqlalchemy.orm import Session
 from datetime import datetime
@@ -36,7 +35,7 @@ class NytexFireworksScraper(BaseScraper):
         try:
             # Get main page
             response = get_with_ssl_ignore(url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text)
             
             # Find all product links
             products = self._get_product_links(soup)
@@ -63,7 +62,7 @@ class NytexFireworksScraper(BaseScraper):
         """Check if a product page has a video"""
         try:
             response = get_with_ssl_ignore(product_url, headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text)
             
             # Look for common video elements
             video_elements = soup.find_all(['video', 'iframe'])
@@ -79,10 +78,8 @@ class NytexFireworksScraper(BaseScraper):
     def _update_product_video_status(self, product_url: str, has_video: bool) -> None:
         """Update the product's video status in the database using new model structure"""
         try:
-            # Create database session
-            engine = create_engine(f'sqlite:///{paths.DB_FILE}')
-            Session = sessionmaker(bind=engine)
-            session = Session()
+            # Session on the shared engine
+            session = Session(get_engine())
             
             # Find vendor product by URL (assuming it's a NyTex product)
             vendor_product = session.query(VendorProduct).filter_by(
@@ -1,5 +1,4 @@
 from bs4 import BeautifulSoup
-import requests
 from typing import Dict, List, Tuple
 import json
 from datetime import datetime
@@ -7,6 +6,8 @@ import os
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.utils.logger import setup_logger
+from app.utils.transport import transport
+from app.scrapers.base_scraper import parse_html
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -19,12 +20,11 @@ class NytexVideoScanner:
         self.logger = setup_logger('nytex_video_scanner')
         self.base_url = "https://shop.nytexfireworks.com"
         
-        # Set up requests session
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Requests go through the shared pooled transport
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        })
+        }
         
         # Create results directory
         os.makedirs('video_scan_results', exist_ok=True)
@@ -161,7 +161,7 @@ class NytexVideoScanner:
         
         try:
             # Get the page content
-            response = self.session.get(url, timeout=5)
+            response = transport.get(url, headers=self.headers, timeout=5)
             page_text = response.text
             
             # Debug first few responses
@@ -207,7 +207,7 @@ class NytexVideoScanner:
                     pass
 
             # Method 3: Look for video elements in the HTML
-            soup = BeautifulSoup(page_text, 'html.parser')
+            soup = parse_html(page_text)
             video_elements = (
                 soup.find_all('iframe', src=lambda x: x and ('youtube.com/embed' in x or 'youtu.be' in x)) or
                 soup.find_all('div', {'data-component': 'ProductVideo'}) or
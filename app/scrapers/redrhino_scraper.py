@@ -6,17 +6,14 @@ import re
 import logging
 import warnings
 from urllib3.exceptions import InsecureRequestWarning
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.models.product import BaseProduct, VendorProduct, Base
-from datetime import datetime
 import os
-from app.utils.logger import setup_logger, log_product_found, log_image_download, log_database_update, log_metadata
-from PIL import Image
-import io
+from app.utils.logger import setup_logger, log_product_found, log_image_download, log_metadata
 from app.utils.paths import paths  # Add this import
 from app.utils.request_helpers import get_with_ssl_ignore
-from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.base_scraper import BaseScraper, ProductData, parse_html, LINKS_ONLY
+from app.services.image_store import image_store
+from app.services.image_normalizer import normalize_inline
+from app.services.product_writer import ProductWriter
 
 # Suppress only the specific warning
 warnings.filterwarnings('ignore', category=InsecureRequestWarning)
@@ -24,21 +21,27 @@ warnings.filterwarnings('ignore', category=InsecureRequestWarning)
 # Set up logger
 logger = setup_logger('redrhino_scraper')
 
-# Database setup - Use paths.DB_FILE
-engine = create_engine(f'sqlite:///{paths.DB_FILE}')
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
+# Images to skip - exact matches
+SKIP_IMAGES = [
+    'RR_brass',  # Changed to match any version of the brass logo
+    'logo',
+    'header',
+    'footer',
+    'banner',
+    'icon'
+]
 
 class RedrhinoFireworksScraper(BaseScraper):
+    # Listing pages are only searched for /firework/ links
+    listing_parse_only = LINKS_ONLY
+    
     def __init__(self):
         super().__init__('redrhino_scraper')
         
     def scrape_website(self, url, limit=5, base_dir=None, headers=None):
         """Main scraper function for Red Rhino"""
-        if not headers:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+        if headers:
+            self.headers = headers
 
         # Use centralized images directory structure
         domain = urlparse(url).netloc.replace('www.', '')
@@ -48,197 +51,147 @@ class RedrhinoFireworksScraper(BaseScraper):
         # Count existing images
         existing_images = len([f for f in os.listdir(domain_dir) if os.path.isfile(os.path.join(domain_dir, f))])
         logger.info(f"Found {existing_images} existing images in directory")
+        logger.info("Using Red Rhino specific approach...")
         
-        page = 1
-        current_url = url
-        
-        while current_url:
-            logger.info(f"\nProcessing page {page}...")
-            
-            try:
-                response = get_with_ssl_ignore(current_url, headers=headers)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Call handle_redrhino_site as a method with self
-                next_url = self.handle_redrhino_site(current_url, soup, domain_dir, limit, headers)
-                
-                if not next_url:
-                    logger.info("No more product links found and no next page. Stopping scraper.")
-                    break
-                    
-                current_url = next_url
-                page += 1
-                time.sleep(1)  # Polite delay between pages
-                
-            except Exception as e:
-                logger.error(f"Error processing page {page}: {str(e)}")
-                break
+        # Product pages are fetched concurrently by the base crawl engine
+        processed = self.crawl(url, limit)
+        logger.info(f"Completed processing {processed} products")
         
         # Only print summary after all URLs are processed
         if url == self.config['urls'][-1]:  # Only on last URL
             self.stats.print_summary(self.logger)
 
-    def handle_redrhino_site(self, current_url, soup, domain_dir, limit, headers):
-        """Handle Red Rhino Fireworks site"""
-        logger.info("Using Red Rhino specific approach...")
-        
-        # Define images to skip - exact matches
-        SKIP_IMAGES = [
-            'RR_brass',  # Changed to match any version of the brass logo
-            'logo',
-            'header',
-            'footer',
-            'banner',
-            'icon'
-        ]
+    def get_product_links(self, soup, base_url):
+        """Find all product links on a Red Rhino listing page"""
+        product_links = []
+        for link in soup.find_all('a', href=True):
+            if '/firework/' in link['href']:
+                # Make sure we have absolute URLs
+                product_links.append(urljoin(base_url, link['href']))
+        return product_links
+
+    def get_next_page_url(self, soup, current_url):
+        """Red Rhino pages are numbered /page/N/; see get_next_page_url below"""
+        next_url = get_next_page_url(soup, current_url)
+        if next_url and next_url != current_url:  # Make sure we're not stuck on same page
+            logger.info(f"Found next page: {next_url}")
+            return next_url
+        return None
+
+    def extract_product_data(self, product_soup, product_url):
+        """Get the product name and image URL from a Red Rhino product page"""
+        # Get product name
+        product_name = None
+        title_elem = product_soup.find('h1', class_='elementor-heading-title')
+        if title_elem:
+            product_name = title_elem.text.strip()
+            
+        if not product_name:
+            return None
+            
+        logger.info(f"Found product: {product_name}")
         
-        successful_downloads = 0
+        # Find image URL - Try multiple approaches
+        image_url = None
         
-        try:
-            # Find all product links
-            product_links = []
-            for link in soup.find_all('a', href=True):
-                if '/firework/' in link['href']:
-                    # Make sure we have absolute URLs
-                    full_url = link['href'] if link['href'].startswith(('http://', 'https://')) else urljoin(current_url, link['href'])
-                    product_links.append(full_url)
+        # First try: Look for product images in specific sections
+        product_sections = product_soup.find_all('div', class_='elementor-widget-image')
+        for section in product_sections:
+            img_tags = section.find_all('img')
+            for img in img_tags:
+                src = img.get('src', '')
+                if not src:
+                    continue
                     
-            product_links = list(set(product_links))  # Remove duplicates
-            self.stats.products_found += len(product_links)
-            logger.info(f"Found {len(product_links)} unique product links")
-            
-            # Process each product
-            for product_url in product_links:
-                if limit != -1 and successful_downloads >= limit:
-                    return None  # Stop if we've hit our limit
+                # Skip immediately if it's the brass logo
+                if 'RR_brass' in src:
+                    logger.debug(f"Skipping brass logo image: {src}")
+                    continue
                     
-                try:
-                    # Get product page
-                    logger.info(f"Fetching product page: {product_url}")
-                    response = get_with_ssl_ignore(product_url, headers=headers)
-                    product_soup = BeautifulSoup(response.text, 'html.parser')
+                # Skip other unwanted images
+                if any(skip in src.lower() for skip in SKIP_IMAGES[1:]):  # Skip first item (RR_brass)
+                    logger.debug(f"Skipping unwanted image: {src}")
+                    continue
                     
-                    # Get product name
-                    product_name = None
-                    title_elem = product_soup.find('h1', class_='elementor-heading-title')
-                    if title_elem:
-                        product_name = title_elem.text.strip()
-                        
-                    if product_name:
-                        logger.info(f"Found product: {product_name}")
-                        
-                        # Find image URL - Try multiple approaches
-                        image_url = None
-                        
-                        # First try: Look for product images in specific sections
-                        product_sections = product_soup.find_all('div', class_='elementor-widget-image')
-                        for section in product_sections:
-                            img_tags = section.find_all('img')
-                            for img in img_tags:
-                                src = img.get('src', '')
-                                if not src:
-                                    continue
-                                    
-                                # Skip immediately if it's the brass logo
-                                if 'RR_brass' in src:
-                                    logger.debug(f"Skipping brass logo image: {src}")
-                                    continue
-                                    
-                                # Skip other unwanted images
-                                if any(skip in src.lower() for skip in SKIP_IMAGES[1:]):  # Skip first item (RR_brass)
-                                    logger.debug(f"Skipping unwanted image: {src}")
-                                    continue
-                                    
-                                if '/wp-content/uploads/202' in src:
-                                    image_url = src
-                                    logger.debug(f"Found potential product image: {image_url}")
-                                    break
-                            if image_url:
-                                break
-                        
-                        # Second try: Look for images in figure elements
-                        if not image_url:
-                            figures = product_soup.find_all('figure')
-                            for figure in figures:
-                                img = figure.find('img')
-                                if img:
-                                    src = img.get('src', '')
-                                    if not src:
-                                        continue
-                                        
-                                    # Skip brass logo
-                                    if 'RR_brass' in src:
-                                        logger.debug(f"Skipping brass logo image: {src}")
-                                        continue
-                                        
-                                    if '/wp-content/uploads/202' in src and not any(skip in src.lower() for skip in SKIP_IMAGES[1:]):
-                                        image_url = src
-                                        logger.debug(f"Found potential product image in figure: {image_url}")
-                                        break
+                if '/wp-content/uploads/202' in src:
+                    image_url = src
+                    logger.debug(f"Found potential product image: {image_url}")
+                    break
+            if image_url:
+                break
+        
+        # Second try: Look for images in figure elements
+        if not image_url:
+            figures = product_soup.find_all('figure')
+            for figure in figures:
+                img = figure.find('img')
+                if img:
+                    src = img.get('src', '')
+                    if not src:
+                        continue
                         
-                        # Third try: Look for data-src attributes
-                        if not image_url:
-                            for img in product_soup.find_all('img', {'data-src': True}):
-                                src = img['data-src']
-                                
-                                # Skip brass logo
-                                if 'RR_brass' in src:
-                                    logger.debug(f"Skipping brass logo image: {src}")
-                                    continue
-                                    
-                                if '/wp-content/uploads/202' in src and not any(skip in src.lower() for skip in SKIP_IMAGES[1:]):
-                                    image_url = src
-                                    logger.debug(f"Found potential product image from data-src: {image_url}")
-                                    break
+                    # Skip brass logo
+                    if 'RR_brass' in src:
+                        logger.debug(f"Skipping brass logo image: {src}")
+                        continue
                         
-                        if image_url:
-                            # Final check to ensure we're not using the brass logo
-                            if 'RR_brass' not in image_url:
-                                logger.info(f"Found valid product image URL: {image_url}")
-                                was_updated, downloaded = process_redrhino_product(
-                                    product_name, product_url, image_url, 
-                                    product_soup, domain_dir, headers
-                                )
-                                if was_updated:
-                                    successful_downloads += 1
-                                    if downloaded:
-                                        self.stats.images_downloaded += 1
-                                    else:
-                                        self.stats.images_existing += 1
-                                    logger.info(f"Successfully processed {successful_downloads} of {limit if limit != -1 else 'unlimited'}")
-                                    if limit != -1 and successful_downloads >= limit:
-                                        return None
-                            else:
-                                logger.warning(f"Skipping brass logo image that made it through filters: {image_url}")
-                        else:
-                            logger.warning(f"No valid product image found for: {product_name}")
-                            logger.debug("HTML content around product image area:")
-                            image_area = product_soup.find('div', class_='elementor-widget-container')
-                            if image_area:
-                                logger.debug(image_area.prettify())
-                                
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Error fetching product {product_url}: {str(e)}")
+                    if '/wp-content/uploads/202' in src and not any(skip in src.lower() for skip in SKIP_IMAGES[1:]):
+                        image_url = src
+                        logger.debug(f"Found potential product image in figure: {image_url}")
+                        break
+        
+        # Third try: Look for data-src attributes
+        if not image_url:
+            for img in product_soup.find_all('img', {'data-src': True}):
+                src = img['data-src']
+                
+                # Skip brass logo
+                if 'RR_brass' in src:
+                    logger.debug(f"Skipping brass logo image: {src}")
                     continue
                     
-                time.sleep(1)  # Polite delay
+                if '/wp-content/uploads/202' in src and not any(skip in src.lower() for skip in SKIP_IMAGES[1:]):
+                    image_url = src
+                    logger.debug(f"Found potential product image from data-src: {image_url}")
+                    break
+        
+        if not image_url:
+            logger.warning(f"No valid product image found for: {product_name}")
+            logger.debug("HTML content around product image area:")
+            image_area = product_soup.find('div', class_='elementor-widget-container')
+            if image_area:
+                logger.debug(image_area.prettify())
                 
-            logger.info(f"Completed processing {successful_downloads} products")
+        return ProductData(name=product_name, url=product_url, image_url=image_url)
+
+    def process_product(self, product, product_soup, domain_dir):
+        """Download the image and save the product (runs in a crawl worker thread).
+        
+        Every saved product counts toward the limit, unchanged ones included:
+        the row is only compared with the database when the writer's batch
+        goes out, after this returns.
+        """
+        if not product.image_url:
+            return False
             
-            # Only look for next page if we haven't hit our limit
-            if limit == -1 or successful_downloads < limit:
-                next_url = get_next_page_url(soup, current_url)
-                if next_url and next_url != current_url:  # Make sure we're not stuck on same page
-                    logger.info(f"Found next page: {next_url}")
-                    return next_url
-                    
-            logger.info("No more product links found and no next page. Stopping scraper.")
-            return None
+        # Final check to ensure we're not using the brass logo
+        if 'RR_brass' in product.image_url:
+            logger.warning(f"Skipping brass logo image that made it through filters: {product.image_url}")
+            return False
             
-        except Exception as e:
-            logger.error(f"Error processing Red Rhino page: {str(e)}")
-            logger.error(f"Error details:", exc_info=True)
-            return None
+        logger.info(f"Found valid product image URL: {product.image_url}")
+        was_saved, downloaded = process_redrhino_product(
+            product.name, product.url, product.image_url,
+            product_soup, domain_dir, self.headers, self.normalizer, self.product_writer,
+            fetch=self.fetch_image,
+            on_downloaded=lambda: self.count(images_downloaded=1),
+            on_failed=lambda error: self.image_failed(product.url)
+        )
+        if not was_saved or downloaded is None:
+            self.count(errors=1)
+        elif not downloaded:
+            self.count(images_existing=1)
+        return was_saved
 
 def get_next_page_url(soup, current_url):
     """Extract the next page URL if it exists"""
@@ -271,7 +224,7 @@ def get_next_page_url(soup, current_url):
             logger.info(f"Testing next page URL: {test_url}")
             response = get_with_ssl_ignore(test_url)
             if response.status_code == 200:
-                test_soup = BeautifulSoup(response.text, 'html.parser')
+                test_soup = parse_html(response.text, LINKS_ONLY)
                 next_products = [link['href'] for link in test_soup.find_all('a', href=True) 
                                if '/firework/' in link['href']]
                 
@@ -309,10 +262,29 @@ def extract_effects(description):
         
     return effects if effects else None
 
-def process_redrhino_product(product_name, product_url, image_url, product_soup, domain_dir, headers):
-    """Process a single Red Rhino product using new model structure"""
+def process_redrhino_product(product_name, product_url, image_url, product_soup, domain_dir, headers,
+                             normalizer=None, writer=None, fetch=None, on_downloaded=None, on_failed=None):
+    """Process a single Red Rhino product using new model structure
+    
+    With a normalizer the PNG conversion is queued on its process pool
+    instead of running on this thread, and with a writer the database row
+    is buffered for its next bulk write instead of being written here.
+    fetch(url, headers=...) downloads the image (defaults to get_with_ssl_ignore).
+    on_downloaded() runs once a new image file is written; for a queued
+    conversion that is after this returns, and the row's local_image_path
+    is only recorded then. on_failed(error) runs if that conversion fails.
+    Returns (saved, downloaded); downloaded is None when the image download failed.
+    """
+    fetch = fetch or get_with_ssl_ignore
+    
+    def write_row(product, local_image_path):
+        if writer is not None:
+            writer.add(product, local_image_path=local_image_path)
+        else:
+            with ProductWriter('Red Rhino Fireworks') as single_writer:
+                single_writer.add(product, local_image_path=local_image_path)
+    
     try:
-        session = Session()
         downloaded = False  # Track if we downloaded a new image
         
         # Get metadata first
@@ -331,6 +303,8 @@ def process_redrhino_product(product_name, product_url, image_url, product_soup,
                     description = text
         
         effects = extract_effects(description)
+        product = ProductData(name=product_name, url=product_url, image_url=image_url,
+                              sku=sku, description=description, effects=effects)
         
         # Download image
         local_image_path = None
@@ -364,93 +338,55 @@ def process_redrhino_product(product_name, product_url, image_url, product_soup,
             # Only download if file doesn't exist
             if not os.path.exists(filepath):
                 try:
-                    response = get_with_ssl_ignore(image_url, headers=headers)
-                    if response.status_code == 200:
-                        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                        
-                        # Convert webp to PNG if needed
-                        image = Image.open(io.BytesIO(response.content))
-                        
-                        # Convert to RGB if needed (in case of RGBA)
-                        if image.mode in ('RGBA', 'LA'):
-                            background = Image.new('RGB', image.size, (255, 255, 255))
-                            background.paste(image, mask=image.split()[-1])
-                            image = background
-                        
-                        # Save as PNG
-                        image.save(filepath, 'PNG', optimize=True)
-                        
+                    # Bytes already fetched from this URL are linked from the image store
+                    known_sha256 = image_store.find_by_url(image_url)
+                    if known_sha256 and image_store.link(known_sha256, filepath, vendor_name='Red Rhino Fireworks',
+                                                         product_name=product_name, source_url=image_url):
                         log_image_download(logger, "success", new_filename)
-                        downloaded = True  # Set downloaded flag
+                        downloaded = True
+                        if on_downloaded:
+                            on_downloaded()
                     else:
-                        logger.error(f"Failed to download image, status code: {response.status_code}")
-                        log_image_download(logger, "failed", new_filename)
+                        response = fetch(image_url, headers=headers)
+                        if response.status_code == 200:
+                            # Convert webp to PNG and save it through the content-addressed image store
+                            def save_png(png_bytes, filepath=filepath):
+                                image_store.save(png_bytes, filepath, vendor_name='Red Rhino Fireworks',
+                                                 product_name=product_name, source_url=image_url)
+                                if on_downloaded:
+                                    on_downloaded()
+                            
+                            if normalizer:
+                                # The image path is recorded once the converted file exists
+                                def save_queued_png(png_bytes, filepath=filepath):
+                                    save_png(png_bytes)
+                                    write_row(product, filepath)
+                                
+                                normalizer.submit(response.content, save_queued_png, label=new_filename,
+                                                  on_failed=on_failed)
+                                local_image_path = None
+                            else:
+                                save_png(normalize_inline(response.content))
+                        
+                            log_image_download(logger, "success", new_filename)
+                            downloaded = True  # Set downloaded flag
+                        else:
+                            logger.error(f"Failed to download image, status code: {response.status_code}")
+                            log_image_download(logger, "failed", new_filename)
+                            downloaded = None
                 except Exception as e:
                     logger.error(f"Failed to download image: {str(e)}")
                     local_image_path = None
+                    downloaded = None
             else:
                 log_image_download(logger, "exists", new_filename)
         
-        # Find or create BaseProduct
-        base_product = session.query(BaseProduct).filter_by(name=product_name).first()
-        if not base_product:
-            base_product = BaseProduct(name=product_name)
-            session.add(base_product)
-            session.flush()  # Get the ID
-        
-        # Check if vendor product exists
-        existing_vendor_product = session.query(VendorProduct).filter_by(
-            base_product_id=base_product.id,
-            vendor_name='Red Rhino Fireworks'
-        ).first()
-        
-        if existing_vendor_product:
-            # Update existing vendor product
-            changes = {}
-            updates = {
-                'vendor_sku': sku,
-                'vendor_description': description,
-                'vendor_product_url': product_url,
-                'vendor_image_url': image_url,
-                'local_image_path': local_image_path
-            }
-            
-            for field, value in updates.items():
-                if getattr(existing_vendor_product, field) != value:
-                    changes[field] = value
-                    setattr(existing_vendor_product, field, value)
-                    
-            if changes:
-                session.commit()
-                log_database_update(logger, "updated", product_name, changes)
-                return True, downloaded
-            else:
-                log_database_update(logger, "unchanged", product_name)
-                return False, downloaded
-        else:
-            # Create new vendor product
-            new_vendor_product = VendorProduct(
-                base_product_id=base_product.id,
-                vendor_name='Red Rhino Fireworks',
-                vendor_sku=sku,
-                vendor_description=description,
-                vendor_product_url=product_url,
-                vendor_image_url=image_url,
-                local_image_path=local_image_path
-            )
-            session.add(new_vendor_product)
-            session.commit()
-            log_database_update(logger, "new", product_name)
-            return True, downloaded
+        write_row(product, local_image_path)
+        return True, downloaded
             
     except Exception as e:
         logger.error(f"❌ Error processing Red Rhino product: {str(e)}")
-        if 'session' in locals():
-            session.rollback()
         return False, False
-    finally:
-        if 'session' in locals():
-            session.close()
 
 if __name__ == "__main__":
     scraper = RedrhinoFireworksScraper()
@@ -1,4 +1,4 @@
-from app.scrapers.base_scraper import BaseScraper, ProductData
+from app.scrapers.base_scraper import BaseScraper, ProductData, parse_html
 from bs4 import BeautifulSoup
 import time
 import os
@@ -6,12 +6,13 @@ from urllib.parse import urljoin
 from datetime import datetime
 from app.models.product import BaseProduct, VendorProduct, Base
 from app.utils.paths import paths
+from app.utils.transport import transport
+from app.db.engine import get_engine
 
 class SupremeFireworksScraper(BaseScraper):
     def __init__(self):
         super().__init__('supreme_scraper')
         self.base_url = 'http://www.spfireworks.com'
-        self.session = None
         
         # Set up database path
         self.db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
@@ -22,32 +23,18 @@ class SupremeFireworksScraper(BaseScraper):
         
         # Initialize database if it doesn't exist
         if not os.path.exists(self.db_path):
-            from sqlalchemy import create_engine
-            engine = create_engine(f'sqlite:///{self.db_path}')
-            Base.metadata.create_all(engine)
+            Base.metadata.create_all(get_engine(self.db_path))
             
-    def make_request(self, url, timeout=30, max_retries=3, retry_delay=5):
+    def make_request(self, url, timeout=30, max_retries=3):
         """Make HTTP request with better error handling and retries"""
-        if not self.session:
-            import requests
-            self.session = requests.Session()
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
-        
-        for attempt in range(max_retries):
-            try:
-                response = self.session.get(url, timeout=timeout, verify=False)
-                response.raise_for_status()
-                return response
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    import time
-                    time.sleep(retry_delay)
-                    continue
-                self.logger.error(f"Error making request to {url}: {str(e)}")
-                return None
+        try:
+            # The transport retries connection errors and 429/5xx with backoff
+            response = transport.get(url, headers=self.headers, timeout=timeout, retries=max_retries - 1)
+            response.raise_for_status()
+            return response
+        except Exception as e:
+            self.logger.error(f"Error making request to {url}: {str(e)}")
+            return None
                 
     def get_category_links(self, soup, base_url):
         """Extract USA Products subcategory links"""
@@ -65,7 +52,7 @@ class SupremeFireworksScraper(BaseScraper):
             if not response:
                 return links
 
-            usa_soup = BeautifulSoup(response.text, 'html.parser')
+            usa_soup = parse_html(response.text)
             
             # Find subcategories in USA Products
             # Look in the left menu for subcategories
@@ -190,7 +177,7 @@ class SupremeFireworksScraper(BaseScraper):
                     if product_code:
                         code = product_code.text.strip()
                         if code.startswith('<font'):
-                            code = BeautifulSoup(code, 'html.parser').text.strip()
+                            code = parse_html(code).text.strip()
                         self.logger.info(f"Found product: {code} - {full_url}")
                     links.append({
                         'url': full_url,
@@ -214,13 +201,19 @@ class SupremeFireworksScraper(BaseScraper):
         self.logger.info(f"Starting scrape of {url}")
         self.logger.info(f"Saving images to {domain_dir}")
         
+        # Finished category pages and products are skipped when resuming
+        self.checkpoint = self.open_checkpoint(url)
+        if self.checkpoint.checkpoint.completed:
+            return
+        finished = False
+        
         try:
             # First get all category links
             response = self.make_request(url)
             if not response:
                 return
                 
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = parse_html(response.text)
             categories = self.get_category_links(soup, url)
             self.logger.info(f"Found {len(categories)} categories")
             
@@ -231,16 +224,24 @@ class SupremeFireworksScraper(BaseScraper):
                     
                 self.logger.info(f"Processing category: {category['name']}")
                 self.process_category(category['url'], domain_dir)
+            
+            finished = bool(categories) and all(self.checkpoint.is_finished(category['url']) for category in categories)
                 
         except Exception as e:
             self.logger.error(f"Error in main scrape: {str(e)}")
             self.stats.errors += 1
+        finally:
+            if finished:
+                self.checkpoint.complete()
+            else:
+                self.checkpoint.save()
+            self.checkpoint = None
             
         self.stats.print_summary(self.logger)
     
     def process_category(self, category_url, domain_dir):
         """Process a single category page and its products"""
-        current_url = category_url
+        current_url = self.checkpoint.resume_from(category_url)
         processed_urls = set()  # Keep track of processed URLs to avoid loops
         
         while current_url and current_url not in processed_urls and (self.config['limit'] == -1 or self.stats.images_downloaded < self.config['limit']):
@@ -252,7 +253,7 @@ class SupremeFireworksScraper(BaseScraper):
                 if not response:
                     break
                     
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # Get product links from current page
                 product_links = self.get_product_links(soup, current_url)
@@ -263,31 +264,39 @@ class SupremeFireworksScraper(BaseScraper):
                         break
                         
                     product_url = product['url']
+                    if self.checkpoint.is_done(product_url):
+                        continue
                     product_response = self.make_request(product_url)
                     if not product_response:
                         continue
                         
-                    product_soup = BeautifulSoup(product_response.text, 'html.parser')
+                    product_soup = parse_html(product_response.text)
                     product_data = self.extract_product_data(product_soup, product_url, product.get('code'))
                     
-                    if product_data and product_data.image_url:
-                        # Save image and update database
-                        self.save_product(product_data, domain_dir)
+                    # Save image and update database; failed products stay pending for --resume
+                    if product_data and self.save_product(product_data, domain_dir):
+                        self.checkpoint.product_done(product_url)
                     
                     # Clear memory
                     del product_soup
                     del product_response
                     
                 # Look for next page link
+                next_url = None
                 next_page = soup.find('a', string=lambda x: x and ('下一页' in x or 'Next' in x or '>' in x))
                 if next_page and next_page.get('href'):
                     next_url = urljoin(current_url, next_page['href'])
-                    if next_url != current_url and next_url not in processed_urls:
-                        current_url = next_url
-                    else:
-                        break  # No new pages to process
-                else:
+                    if next_url == current_url or next_url in processed_urls:
+                        next_url = None  # No new pages to process
+                
+                # Checkpoint the page once all its products are done (a resume refetches it otherwise)
+                page_urls = [product['url'] for product in product_links]
+                if all(self.checkpoint.is_done(product_url) for product_url in page_urls):
+                    self.checkpoint.page_done(category_url, page_urls, next_url)
+                
+                if not next_url:
                     break  # No next page found
+                current_url = next_url
                     
                 # Clear memory
                 del soup
@@ -301,11 +310,15 @@ class SupremeFireworksScraper(BaseScraper):
                 break  # Stop on error to avoid potential infinite loops
     
     def save_product(self, product_data, domain_dir):
-        """Save product image and update database using new model structure"""
+        """Save product image and update database using new model structure
+        
+        Returns True if both the image and the database row were saved.
+        """
         if not product_data.name or not product_data.image_url:
-            return
+            return False
             
         self.stats.products_found += 1
+        saved = True
         
         # Create clean filename from product name
         clean_name = self.clean_filename(product_data.name.lower())
@@ -325,32 +338,34 @@ class SupremeFireworksScraper(BaseScraper):
                 # Create directory if it doesn't exist
                 os.makedirs(os.path.dirname(filepath), exist_ok=True)
                 
-                # Download image with HTTP
-                response = self.session.get(image_url, timeout=30, verify=False)
-                if response.status_code == 200:
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
+                if self.link_known_image(image_url, filepath, product_data.name):
                     self.stats.images_downloaded += 1
-                    self.logger.info(f"Successfully downloaded image for {product_data.name}")
                 else:
-                    self.stats.errors += 1
-                    self.logger.error(f"Failed to download image: {response.status_code} for URL: {image_url}")
-                
-                # Clear memory
-                del response
+                    # Download image with HTTP
+                    response = transport.get(image_url, headers=self.headers, timeout=30)
+                    if response.status_code == 200:
+                        self.save_image(response.content, filepath, image_url, product_data.name)
+                        self.stats.images_downloaded += 1
+                        self.logger.info(f"Successfully downloaded image for {product_data.name}")
+                    else:
+                        self.stats.errors += 1
+                        saved = False
+                        self.logger.error(f"Failed to download image: {response.status_code} for URL: {image_url}")
+                    
+                    # Clear memory
+                    del response
                 
             except Exception as e:
                 self.stats.errors += 1
+                saved = False
                 self.logger.error(f"Error downloading image for {product_data.name}: {str(e)}")
         
         # Save to database using new model structure
         try:
             from sqlalchemy.orm import Session
-            from sqlalchemy import create_engine
             
-            # Use absolute path for database
-            engine = create_engine(f'sqlite:///{self.db_path}')
-            session = Session(engine)
+            # Shared engine for the absolute database path
+            session = Session(get_engine(self.db_path))
             
             # Extract product name (remove code part if present)
             product_name = product_data.name.split(' - ')[0] if ' - ' in product_data.name else product_data.name
@@ -403,14 +418,11 @@ class SupremeFireworksScraper(BaseScraper):
             import traceback
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             self.stats.errors += 1
+            saved = False
             
         # Add delay between products
         time.sleep(2)
-    
-    def __del__(self):
-        """Clean up session on object destruction"""
-        if self.session:
-            self.session.close()
+        return saved
 
 if __name__ == "__main__":
     scraper = SupremeFireworksScraper()
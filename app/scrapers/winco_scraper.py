@@ -1,27 +1,37 @@
 from app.models.product import BaseProduct, VendorProduct, Base
 from app.utils.logger import setup_logger
 from app.utils.paths import paths
-from app.utils.request_helpers import get_with_ssl_ignore
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import time
 from urllib.parse import urljoin, urlparse
 import re
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from app.db.engine import get_engine
 import os
-from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.base_scraper import BaseScraper, ProductData
 
 # Set up logger
 logger = setup_logger('winco_scraper')
 
 # Database setup
-engine = create_engine(f'sqlite:///{paths.DB_FILE}')
+engine = get_engine()
 Base.metadata.create_all(engine)
 Session = sessionmaker(bind=engine)
 
 class WincoFireworksScraper(BaseScraper):
+    # Listing pages need the li.product cards and the next-page link; product pages the main image
+    listing_parse_only = SoupStrainer(['li', 'a'])
+    product_parse_only = SoupStrainer('img')
+    
     def __init__(self):
         super().__init__('winco_scraper')
+        self.headers.update({
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Connection': 'keep-alive',
+        })
+        # Product names come from the listing page titles
+        self.product_names = {}
         
     def scrape_website(self, url, limit=5, base_dir=None):
         """Main scraping method"""
@@ -32,140 +42,111 @@ class WincoFireworksScraper(BaseScraper):
         self.logger.info(f"Starting scrape of {url}")
         self.logger.info(f"Saving images to {domain_dir}")
         
-        # Call the existing scrape_website function with our parameters
-        return scrape_website(url, limit=limit, base_dir=str(paths.IMAGES_DIR), headers=self.headers)
+        if os.path.exists(domain_dir):
+            existing_files = [f for f in os.listdir(domain_dir) if os.path.isfile(os.path.join(domain_dir, f))]
+            logger.info(f"Found {len(existing_files)} existing files in {domain_dir}")
+        
+        # Product pages are fetched concurrently by the base crawl engine
+        successful_downloads = self.crawl(url, limit)
+        
+        logger.info("\nFinal Summary:")
+        logger.info(f"Total pages processed: {self.stats.pages_processed}")
+        logger.info(f"Images downloaded: {successful_downloads}")
 
-def scrape_website(url, limit=5, base_dir=None, headers=None):
-    """Main scraper function"""
-    if not headers:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
+    def get_product_links(self, soup, base_url):
+        """Find product links (and their names) in the product containers"""
+        product_links = []
+        products = soup.find_all('li', class_='product')
+        logger.info(f"Found {len(products)} products")
+        
+        for product in products:
+            # Get product title from h3.product-title
+            title = product.find('h3', class_='product-title')
+            if title:
+                title_link = title.find('a')
+                if title_link and title_link.get('href'):
+                    product_url = urljoin(base_url, title_link['href'])
+                    self.product_names[product_url] = title_link.text.strip()
+                    product_links.append(product_url)
+        return product_links
 
-    # Create domain directory for images
-    domain = urlparse(url).netloc.replace('www.', '')
-    domain_dir = os.path.join(base_dir, domain) if base_dir else domain
-    os.makedirs(domain_dir, exist_ok=True)
-    
-    logger.info(f"Base directory: {base_dir}")
-    logger.info(f"Domain: {domain}")
-    logger.info(f"Full domain directory path: {domain_dir}")
-    
-    if os.path.exists(domain_dir):
-        logger.info(f"Directory exists: {domain_dir}")
-    else:
-        logger.error(f"Failed to create directory: {domain_dir}")
-    
-    logger.info(f"Fetching content from: {url}")
-    logger.info(f"Saving images to: {domain_dir}")
-    
-    successful_downloads = 0
-    current_url = url
-    pages_processed = 0
-    
-    if os.path.exists(domain_dir):
-        existing_files = [f for f in os.listdir(domain_dir) if os.path.isfile(os.path.join(domain_dir, f))]
-        logger.info(f"Found {len(existing_files)} existing files in {domain_dir}:")
-        for f in existing_files:
-            logger.info(f"  - {f} ({os.path.getsize(os.path.join(domain_dir, f))} bytes)")
-    
-    while current_url and (limit == -1 or successful_downloads < limit):
-        try:
-            # Get initial page
-            logger.info(f"Making request to: {current_url}")
-            response = get_with_ssl_ignore(current_url, headers=headers)
-            logger.info(f"Response status code: {response.status_code}")
+    def listing_data(self, product_url):
+        """Product names only appear on the listing pages, so checkpoints keep them"""
+        name = self.product_names.get(product_url)
+        return {'name': name} if name else None
+
+    def restore_listing_data(self, product_url, data):
+        self.product_names[product_url] = data['name']
+
+    def get_next_page_url(self, soup, current_url):
+        """Look for next page link"""
+        next_link = soup.find('a', class_='next page-numbers')
+        if next_link and next_link.get('href'):
+            return next_link['href']
+        logger.info("No more pages found")
+        return None
+
+    def extract_product_data(self, product_soup, product_url):
+        """Find the product image on a product page"""
+        product_name = self.product_names.get(product_url)
+        if not product_name:
+            return None
+            
+        logger.info(f"\nProcessing product: {product_name}")
+        logger.info(f"URL: {product_url}")
+        
+        image_url = None
+        image = product_soup.find('img', class_='wp-post-image')
+        if image:
+            image_url = image.get('data-src') or image.get('src')
+        return ProductData(name=product_name, url=product_url, image_url=image_url)
+
+    def process_product(self, product, product_soup, domain_dir):
+        """Download the product image (runs in a crawl worker thread)"""
+        if not product.image_url:
+            return False
+            
+        # Clean filename
+        clean_name = re.sub(r'[^\w\s-]', '', product.name)
+        clean_name = re.sub(r'\s+', '-', clean_name).strip('-')
+        filename = f"{clean_name}.png"
+        filepath = os.path.join(domain_dir, filename)
+        
+        if os.path.exists(filepath):
+            logger.info(f"Image already exists: {filename} ({os.path.getsize(filepath)} bytes)")
+            self.count(images_existing=1)
+            return False
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+        try:
+            if self.link_known_image(product.image_url, filepath, product.name):
+                self.count(images_downloaded=1)
+                return True
                 
-                # Find all product containers
-                products = soup.find_all('li', class_='product')
-                logger.info(f"Found {len(products)} products")
+            img_response = self.fetch_image(product.image_url)
+            if img_response.status_code == 200:
+                # Log the file size we're about to write
+                content_length = len(img_response.content)
+                logger.info(f"Downloading {content_length} bytes to: {filepath}")
                 
-                # Process products
-                for product in products:
-                    if limit != -1 and successful_downloads >= limit:
-                        return
-                    
-                    # Get product title from h3.product-title
-                    title = product.find('h3', class_='product-title')
-                    if title:
-                        title_link = title.find('a')
-                        if title_link:
-                            product_name = title_link.text.strip()
-                            product_url = title_link['href']
-                            logger.info(f"\nProcessing product: {product_name}")
-                            logger.info(f"URL: {product_url}")
-                            
-                            # Get product page
-                            product_response = get_with_ssl_ignore(product_url, headers=headers)
-                            if product_response.status_code == 200:
-                                product_soup = BeautifulSoup(product_response.text, 'html.parser')
-                                
-                                # Find product image
-                                image = product_soup.find('img', class_='wp-post-image')
-                                if image:
-                                    image_url = image.get('data-src') or image.get('src')
-                                    if image_url:
-                                        # Clean filename
-                                        clean_name = re.sub(r'[^\w\s-]', '', product_name)
-                                        clean_name = re.sub(r'\s+', '-', clean_name).strip('-')
-                                        filename = f"{clean_name}.png"
-                                        filepath = os.path.join(domain_dir, filename)
-                                        
-                                        if not os.path.exists(filepath):
-                                            try:
-                                                img_response = get_with_ssl_ignore(image_url, headers=headers)
-                                                if img_response.status_code == 200:
-                                                    # Log the file size we're about to write
-                                                    content_length = len(img_response.content)
-                                                    logger.info(f"Downloading {content_length} bytes to: {filepath}")
-                                                    
-                                                    with open(filepath, 'wb') as f:
-                                                        f.write(img_response.content)
-                                                    
-                                                    # Verify the file was created and has content
-                                                    if os.path.exists(filepath):
-                                                        file_size = os.path.getsize(filepath)
-                                                        if file_size > 0:
-                                                            successful_downloads += 1
-                                                            logger.info(f"Successfully downloaded image: {filename} ({file_size} bytes)")
-                                                        else:
-                                                            logger.error(f"File was created but is empty: {filename}")
-                                                    else:
-                                                        logger.error(f"Failed to create file: {filename}")
-                                            except Exception as e:
-                                                logger.error(f"Error downloading image: {str(e)}")
-                                        else:
-                                            logger.info(f"Image already exists: {filename} ({os.path.getsize(filepath)} bytes)")
-                                
-                                time.sleep(1)  # Polite delay between products
+                self.save_image(img_response.content, filepath, product.image_url, product.name)
                 
-                # Look for next page link
-                next_link = soup.find('a', class_='next page-numbers')
-                if next_link and next_link.get('href'):
-                    current_url = next_link['href']
-                    pages_processed += 1
-                    logger.info(f"Moving to page {pages_processed + 1}")
-                    time.sleep(2)  # Polite delay between pages
+                # Verify the file was created and has content
+                if os.path.exists(filepath):
+                    file_size = os.path.getsize(filepath)
+                    if file_size > 0:
+                        logger.info(f"Successfully downloaded image: {filename} ({file_size} bytes)")
+                        self.count(images_downloaded=1)
+                        return True
+                    else:
+                        logger.error(f"File was created but is empty: {filename}")
                 else:
-                    logger.info("No more pages found")
-                    break
+                    logger.error(f"Failed to create file: {filename}")
             else:
-                logger.error(f"Failed to get page, status code: {response.status_code}")
-                break
-                
+                logger.error(f"Failed to download image, status code: {img_response.status_code}")
         except Exception as e:
-            logger.error(f"Error processing page: {str(e)}")
-            break
-    
-    logger.info("\nFinal Summary:")
-    logger.info(f"Total pages processed: {pages_processed + 1}")
-    logger.info(f"Images downloaded: {successful_downloads}") 
+            logger.error(f"Error downloading image: {str(e)}")
+        self.count(errors=1)
+        return False
 
 if __name__ == "__main__":
     scraper = WincoFireworksScraper()
@@ -1,4 +1,4 @@
-from app.scrapers.base_scraper import BaseScraper
+from app.scrapers.base_scraper import BaseScraper, ProductData, parse_html, LINKS_ONLY
 from bs4 import BeautifulSoup
 import time
 import os
@@ -6,11 +6,19 @@ from urllib.parse import urljoin, urlparse
 import re
 from app.utils.paths import paths
 
+# Category listing pages that look like product links
+CATEGORY_PAGE_SUFFIXES = (
+    '/fireworks/', '/fountains/', '/artillery-shells/',
+    '/finales/', '/family-packs/', '/firecrackers/',
+    '/novelties/', '/sparklers/', '/roman-candles/',
+    '/show-to-go-cartons/'
+)
+
 class WorldclassFireworksScraper(BaseScraper):
     def __init__(self):
         super().__init__('worldclass_scraper')
         
-    def get_product_links(self, soup):
+    def get_product_links(self, soup, base_url=None):
         """Extract all product links from the page"""
         product_links = []
         
@@ -25,6 +33,9 @@ class WorldclassFireworksScraper(BaseScraper):
                     'family-packs', 'firecrackers', 'novelties',
                     'sparklers', 'roman-candles', 'show-to-go-cartons'
                 ]:
+                    # Skip category pages
+                    if href.endswith(CATEGORY_PAGE_SUFFIXES):
+                        continue
                     if href not in product_links:
                         product_links.append(href)
                         
@@ -70,7 +81,7 @@ class WorldclassFireworksScraper(BaseScraper):
             
             response = self.make_request(next_url)
             if response and response.status_code == 200:
-                next_soup = BeautifulSoup(response.text, 'html.parser')
+                next_soup = parse_html(response.text, LINKS_ONLY)
                 next_products = set(link['href'] for link in next_soup.find_all('a', href=True) 
                                   if '/fireworks/' in link['href'])
                 
@@ -94,146 +105,72 @@ class WorldclassFireworksScraper(BaseScraper):
         existing_count = self.count_existing_images(domain_dir)
         self.logger.info(f"Found {existing_count} existing images in directory")
         
-        successful_downloads = 0
-        processed_urls = set()
-        current_url = url
-        page_number = 1
-        
-        while current_url and (limit == -1 or successful_downloads < limit):
-            if current_url in processed_urls:
-                self.logger.info(f"Already processed URL: {current_url}")
-                break
+        # Product pages are fetched concurrently by the base crawl engine
+        self.crawl(url, limit)
                 
-            self.logger.info(f"\nProcessing page {page_number}...")
+        # Only print summary after all URLs are processed
+        if url == self.config['urls'][-1]:  # Only on last URL
+            self.stats.print_summary(self.logger)
+
+    def extract_product_data(self, product_soup, product_url):
+        """Get the product name and image URL from a product page"""
+        # Get product name
+        name_elem = (
+            product_soup.find('h1', class_='product_title') or
+            product_soup.find('h1', class_='entry-title') or
+            product_soup.find('h1', {'data-elementor-setting-key': 'title'}) or
+            product_soup.find('h1')  # Fallback to any h1
+        )
+        
+        product_name = None
+        if name_elem:
+            product_name = name_elem.text.strip()
+        if not product_name:
+            product_name = self.get_product_name_from_url(product_url)
             
-            try:
-                response = self.make_request(current_url)
-                if not response:
-                    break
-                    
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Process each product
-                product_links = self.get_product_links(soup)
-                self.logger.info(f"Found {len(product_links)} product links")
-                
-                for product_url in product_links:
-                    if limit != -1 and successful_downloads >= limit:
-                        break
-                        
-                    full_url = urljoin(current_url, product_url)
-                    if full_url in processed_urls:
-                        continue
-                        
-                    # Skip category pages
-                    if full_url.endswith(('/fireworks/', '/fountains/', '/artillery-shells/', 
-                                        '/finales/', '/family-packs/', '/firecrackers/',
-                                        '/novelties/', '/sparklers/', '/roman-candles/',
-                                        '/show-to-go-cartons/')):
-                        continue
-                        
-                    self.logger.info(f"Fetching product page: {full_url}")
+        if not product_name:
+            self.logger.warning(f"No product name found for URL: {product_url}")
+            return None
+            
+        self.logger.info(f"Found product: {product_name}")
+        
+        # Try multiple ways to find the product image
+        image_url = None
+        
+        # Try main product image
+        img = product_soup.find('img', class_='wp-post-image')
+        if img:
+            image_url = img.get('src') or img.get('data-src')
+            
+        # Try product gallery
+        if not image_url:
+            gallery = product_soup.find('div', class_='product-gallery') or \
+                    product_soup.find('div', class_='woocommerce-product-gallery')
+            if gallery:
+                img = gallery.find('img')
+                if img:
+                    image_url = img.get('src') or img.get('data-src')
                     
-                    try:
-                        product_response = self.make_request(full_url)
-                        if not product_response:
-                            continue
-                            
-                        product_soup = BeautifulSoup(product_response.text, 'html.parser')
-                        
-                        # Get product name
-                        name_elem = (
-                            product_soup.find('h1', class_='product_title') or
-                            product_soup.find('h1', class_='entry-title') or
-                            product_soup.find('h1', {'data-elementor-setting-key': 'title'}) or
-                            product_soup.find('h1')  # Fallback to any h1
-                        )
-                        
-                        product_name = None
-                        if name_elem:
-                            product_name = name_elem.text.strip()
-                        if not product_name:
-                            product_name = self.get_product_name_from_url(full_url)
-                            
-                        if product_name:
-                            self.logger.info(f"Found product: {product_name}")
-                            
-                            # Try multiple ways to find the product image
-                            image_url = None
-                            
-                            # Try main product image
-                            img = product_soup.find('img', class_='wp-post-image')
-                            if img:
-                                image_url = img.get('src') or img.get('data-src')
-                                
-                            # Try product gallery
-                            if not image_url:
-                                gallery = product_soup.find('div', class_='product-gallery') or \
-                                        product_soup.find('div', class_='woocommerce-product-gallery')
-                                if gallery:
-                                    img = gallery.find('img')
-                                    if img:
-                                        image_url = img.get('src') or img.get('data-src')
-                                        
-                            # Try any product image
-                            if not image_url:
-                                for img in product_soup.find_all('img'):
-                                    src = img.get('src', '')
-                                    if '/wp-content/uploads/' in src and not any(x in src.lower() for x in ['icon', 'logo', 'placeholder', 'fullsize_anim']):
-                                        image_url = src
-                                        break
-                                        
-                            # Try data-src attributes
-                            if not image_url:
-                                for img in product_soup.find_all('img', {'data-src': True}):
-                                    src = img['data-src']
-                                    if not any(x in src.lower() for x in ['icon', 'logo', 'placeholder', 'fullsize_anim']):
-                                        image_url = src
-                                        break
-                            
-                            if image_url:
-                                self.logger.info(f"Found image URL: {image_url}")
-                                
-                                # Clean filename and download image
-                                filename = f"{self.clean_filename(product_name)}.png"
-                                filepath = os.path.join(domain_dir, filename)
-                                
-                                if not os.path.exists(filepath):
-                                    if self.download_image(image_url, filepath):
-                                        successful_downloads += 1
-                                        self.logger.info(f"Downloaded image: {filename}")
-                                else:
-                                    self.logger.info("Image already exists")
-                            else:
-                                self.logger.warning(f"No image found for product: {product_name}")
-                        else:
-                            self.logger.warning(f"No product name found for URL: {full_url}")
-                            
-                        processed_urls.add(full_url)
-                        time.sleep(1)  # Polite delay between products
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error processing product {full_url}: {str(e)}")
-                        continue
-                        
-                # Get next page URL
-                next_url = self.get_next_page_url(soup, current_url)
-                if next_url and next_url not in processed_urls:
-                    self.logger.info(f"Moving to next page: {next_url}")
-                    current_url = next_url
-                    page_number += 1
-                    time.sleep(1)  # Polite delay between pages
-                else:
-                    self.logger.info("No more pages to process")
+        # Try any product image
+        if not image_url:
+            for img in product_soup.find_all('img'):
+                src = img.get('src', '')
+                if '/wp-content/uploads/' in src and not any(x in src.lower() for x in ['icon', 'logo', 'placeholder', 'fullsize_anim']):
+                    image_url = src
                     break
                     
-            except Exception as e:
-                self.logger.error(f"Error in main scraping process: {str(e)}")
-                break
-                
-        # Only print summary after all URLs are processed
-        if url == self.config['urls'][-1]:  # Only on last URL
-            self.stats.print_summary(self.logger)
+        # Try data-src attributes
+        if not image_url:
+            for img in product_soup.find_all('img', {'data-src': True}):
+                src = img['data-src']
+                if not any(x in src.lower() for x in ['icon', 'logo', 'placeholder', 'fullsize_anim']):
+                    image_url = src
+                    break
+        
+        if image_url:
+            self.logger.info(f"Found image URL: {image_url}")
+            
+        return ProductData(name=product_name, url=product_url, image_url=image_url)
 
 if __name__ == "__main__":
     scraper = WorldclassFireworksScraper()
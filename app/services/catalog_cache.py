@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from typing import Any, Hashable, Optional
+from cachetools import TTLCache
+from app.core.config import settings
+from app.utils.logger import setup_logger
+from app.utils.metrics import CATALOG_CACHE_REQUESTS
+from app.utils.paths import paths
+
+logger = setup_logger('catalog_cache')
+
+
+class CatalogCache:
+    """In-memory TTL + LRU cache for catalog API responses.
+
+    Entries expire after settings.CATALOG_CACHE_TTL seconds and the least
+    recently used entries are evicted beyond settings.CATALOG_CACHE_SIZE.
+    The image matcher runs in its own process, so invalidation goes through
+    a stamp file (paths.CATALOG_CACHE_STAMP): every lookup compares the
+    stamp's mtime and drops all entries when it has changed.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, maxsize: Optional[int] = None, stamp_file=None):
+        self.cache = TTLCache(
+            maxsize=maxsize or settings.CATALOG_CACHE_SIZE,
+            ttl=ttl or settings.CATALOG_CACHE_TTL
+        )
+        self.stamp_file = stamp_file or paths.CATALOG_CACHE_STAMP
+        self.lock = threading.Lock()
+        self.stamp = self._read_stamp()
+
+    def _read_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.stamp_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or None if missing, expired or invalidated"""
+        stamp = self._read_stamp()
+        with self.lock:
+            if stamp != self.stamp:
+                logger.info("Catalog changed - clearing catalog cache")
+                self.cache.clear()
+                self.stamp = stamp
+            value = self.cache.get(key)
+        CATALOG_CACHE_REQUESTS.inc(result='miss' if value is None else 'hit')
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.cache[key] = value
+
+    def clear(self) -> None:
+        with self.lock:
+            self.cache.clear()
+
+
+def invalidate_catalog_cache() -> None:
+    """Mark every process's catalog cache stale (e.g. after images were uploaded)"""
+    try:
+        os.makedirs(os.path.dirname(paths.CATALOG_CACHE_STAMP), exist_ok=True)
+        with open(paths.CATALOG_CACHE_STAMP, 'a'):
+            pass
+        now = time.time_ns()
+        os.utime(paths.CATALOG_CACHE_STAMP, ns=(now, now))
+    except Exception as e:
+        logger.error(f"Error invalidating catalog cache: {str(e)}")
+    catalog_cache.clear()
+
+
+# Shared instance used by the catalog endpoints
+catalog_cache = CatalogCache()
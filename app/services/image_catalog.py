@@ -0,0 +1,128 @@
+import json
+import os
+import yaml
+from typing import Callable, Dict, List, Optional, Tuple
+from app.utils.logger import setup_logger
+from app.utils.paths import paths
+
+logger = setup_logger('image_catalog')
+
+# Bump when ImageMatcher.clean_name or compact_sku change so cached names are rebuilt
+CATALOG_VERSION = 1
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+
+class ImageCatalog:
+    """Persistent cache of vendor image directory listings.
+
+    Stored as a JSON sidecar (paths.IMAGE_CATALOG) holding, per directory, its
+    mtime, the image file list, the cleaned name of every file and its
+    compacted SKU form. A directory is only re-listed when its mtime changes,
+    and the parsed vendor config is cached against the config file's mtime,
+    so warm matcher runs do a couple of stat calls instead of directory walks
+    and YAML parsing.
+    """
+
+    def __init__(self, catalog_file=None):
+        self.catalog_file = catalog_file or paths.IMAGE_CATALOG
+        self.dirty = False
+        self.data = self._load()
+
+    def _load(self) -> Dict:
+        """Load the sidecar file, discarding it if missing, corrupt or from another version"""
+        empty = {'version': CATALOG_VERSION, 'configs': {}, 'directories': {}}
+        try:
+            with open(self.catalog_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return empty
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable image catalog {self.catalog_file}: {str(e)}")
+            return empty
+
+        if data.get('version') != CATALOG_VERSION:
+            logger.info("Image catalog version changed - rebuilding")
+            return empty
+        data.setdefault('configs', {})
+        data.setdefault('directories', {})
+        return data
+
+    def save(self) -> None:
+        """Write the catalog back to disk if anything changed"""
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.catalog_file), exist_ok=True)
+            tmp_file = f"{self.catalog_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.data, f)
+            os.replace(tmp_file, self.catalog_file)
+            self.dirty = False
+        except Exception as e:
+            logger.error(f"Error saving image catalog: {str(e)}")
+
+    def get_config(self, config_path) -> Dict:
+        """Return a parsed YAML config, re-parsing only when the file's mtime changes"""
+        key = str(config_path)
+        mtime = os.stat(config_path).st_mtime_ns
+        entry = self.data['configs'].get(key)
+        if entry and entry['mtime'] == mtime:
+            return entry['config']
+
+        logger.debug(f"Parsing config file: {key}")
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f)
+        self.data['configs'][key] = {'mtime': mtime, 'config': config}
+        self.dirty = True
+        self.save()
+        return config
+
+    def get_directory(self, directory, clean_name: Callable[[str], str],
+                      compact: Callable[[str], str]) -> Optional[Tuple[List[str], List[str], List[str]]]:
+        """Return (files, cleaned_names, compact_names) for an image directory.
+
+        Uses the cached listing while the directory mtime is unchanged; otherwise
+        re-lists the directory, reusing cached cleaned names for files that are
+        still present. Returns None if the directory does not exist.
+        """
+        key = str(directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        entry = self.data['directories'].get(key)
+        if entry and entry['mtime'] == mtime:
+            return entry['files'], entry['cleaned_names'], entry['compact_names']
+
+        logger.info(f"Scanning image directory: {key}")
+        previous = {}
+        if entry:
+            previous = {
+                f: (cleaned, packed)
+                for f, cleaned, packed in zip(entry['files'], entry['cleaned_names'], entry['compact_names'])
+            }
+
+        files = [f for f in os.listdir(directory) if f.lower().endswith(IMAGE_EXTENSIONS)]
+        cleaned_names = []
+        compact_names = []
+        for f in files:
+            if f in previous:
+                cleaned, packed = previous[f]
+            else:
+                base_name = os.path.splitext(f)[0]
+                cleaned = clean_name(base_name)
+                packed = compact(base_name.lower())
+            cleaned_names.append(cleaned)
+            compact_names.append(packed)
+
+        self.data['directories'][key] = {
+            'mtime': mtime,
+            'files': files,
+            'cleaned_names': cleaned_names,
+            'compact_names': compact_names
+        }
+        self.dirty = True
+        self.save()
+        return files, cleaned_names, compact_names
@@ -0,0 +1,188 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fuzzywuzzy import fuzz
+
+try:
+    from Levenshtein import ratio as levenshtein_ratio
+except ImportError:  # fuzzywuzzy falls back to difflib in this case, so must we
+    levenshtein_ratio = None
+
+
+def compact_sku(value: str) -> str:
+    """Strip everything except ASCII letters and digits (matches the vendor SKU cleanup)"""
+    return re.sub(r'[^a-zA-Z0-9]', '', value)
+
+
+def fuzz_ratio(s1: str, s2: str) -> int:
+    """Same score as fuzz.ratio for two strings, calling python-Levenshtein directly.
+
+    Skips fuzzywuzzy's decorator and StringMatcher overhead, which dominates
+    when scoring thousands of short names.
+    """
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    if levenshtein_ratio is None:
+        return fuzz.ratio(s1, s2)
+    return int(round(100 * levenshtein_ratio(s1, s2)))
+
+
+def trigrams(value: str) -> Set[str]:
+    """Character trigrams of a string"""
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def ratio_upper_bound(len_a: int, len_b: int, overlap: int) -> int:
+    """Upper bound for fuzz.ratio given both lengths and the shared character count.
+
+    fuzz.ratio is round(100 * 2 * M / (len_a + len_b)) where M is the number of
+    matching characters, and M can never exceed the multiset character overlap.
+    """
+    if not len_a or not len_b:
+        return 0
+    return math.ceil(100.0 * 2 * overlap / (len_a + len_b))
+
+
+class ImageIndex:
+    """Precomputed lookup structures for the image files of one vendor directory.
+
+    Built once per run so find_best_match does not re-clean every filename for
+    every variation. Holds:
+      - the lowercased base name and cleaned name of each file
+      - an inverted index of cleaned-name tokens -> file positions
+      - an inverted index of compacted base-name trigrams -> file positions
+        (used to narrow SKU lookups)
+    File positions preserve the original listing order so matching keeps the
+    same first-match-wins behaviour as a linear scan.
+    """
+
+    def __init__(self, image_files: Iterable[str], clean_name: Callable[[str], str],
+                 cleaned_names: Optional[List[str]] = None, compact_names: Optional[List[str]] = None):
+        self.files: List[str] = list(image_files)
+        self.base_names: List[str] = [os.path.splitext(f)[0].lower() for f in self.files]
+        if compact_names is None:
+            compact_names = [compact_sku(b) for b in self.base_names]
+        self.compact_names: List[str] = list(compact_names)
+        if cleaned_names is None:
+            cleaned_names = [clean_name(os.path.splitext(f)[0]) for f in self.files]
+        self.cleaned_names: List[str] = list(cleaned_names)
+        self.char_counts: List[Counter] = [Counter(name) for name in self.cleaned_names]
+
+        self.token_index: Dict[str, Set[int]] = {}
+        for pos, name in enumerate(self.cleaned_names):
+            for token in set(name.split()):
+                self.token_index.setdefault(token, set()).add(pos)
+
+        self.trigram_index: Dict[str, Set[int]] = {}
+        for pos, name in enumerate(self.compact_names):
+            for gram in trigrams(name):
+                self.trigram_index.setdefault(gram, set()).add(pos)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def sku_candidates(self, sku: str) -> List[int]:
+        """Positions of files that could contain the SKU, in listing order.
+
+        Any exact, word-boundary or cleaned substring SKU match implies the
+        compacted SKU is a substring of the compacted base name, so every one
+        of its trigrams must be present. Short SKUs fall back to a full scan.
+        """
+        compact = compact_sku(sku.lower())
+        if len(compact) < 3:
+            return list(range(len(self.files)))
+
+        candidates: Optional[Set[int]] = None
+        for gram in sorted(trigrams(compact), key=lambda g: len(self.trigram_index.get(g, ()))):
+            postings = self.trigram_index.get(gram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    def token_candidates(self, cleaned_query: str) -> List[int]:
+        """Positions of files sharing at least one cleaned token with the query, in listing order"""
+        positions: Set[int] = set()
+        for token in set(cleaned_query.split()):
+            positions |= self.token_index.get(token, set())
+        return sorted(positions)
+
+    def ratio_bound(self, pos: int, cleaned_query: str, query_counts: Counter) -> int:
+        """Cheap upper bound on fuzz.ratio(cleaned_query, cleaned name of file at pos)"""
+        name = self.cleaned_names[pos]
+        len_a, len_b = len(cleaned_query), len(name)
+        if not len_a and not len_b:
+            return 100  # fuzz.ratio treats two equal (empty) strings as a perfect match
+        bound = ratio_upper_bound(len_a, len_b, min(len_a, len_b))
+        if bound == 0:
+            return 0
+        counts = self.char_counts[pos]
+        overlap = sum(min(n, counts[c]) for c, n in query_counts.items())
+        return min(bound, ratio_upper_bound(len_a, len_b, overlap))
+
+    def best_name_match(self, cleaned_query: str,
+                        on_compare: Optional[Callable[[str, int, bool], None]] = None) -> Tuple[Optional[int], int]:
+        """Find the file whose cleaned name scores highest against the query.
+
+        Returns (position, score) where position is None if nothing scored above
+        zero. Ties go to the earlier file, so the result equals a front-to-back
+        fuzz.ratio scan.
+
+        Without a callback and with python-Levenshtein installed, the whole row
+        is scored in C, which is cheaper than any pruning. Otherwise files
+        sharing a token with the query are scored first so the best score rises
+        quickly, and every other file is only scored if its upper bound could
+        still beat (or tie at an earlier position) the current best.
+        on_compare(cleaned_name, score, is_new_best) is called for each file scored.
+        """
+        if on_compare is None and levenshtein_ratio is not None:
+            return self._best_levenshtein_match(cleaned_query)
+
+        best_ratio = 0
+        best_pos = None
+
+        token_positions = self.token_candidates(cleaned_query)
+        token_set = set(token_positions)
+        remaining = [pos for pos in range(len(self.files)) if pos not in token_set]
+        query_counts = Counter(cleaned_query)
+
+        for pos in token_positions + remaining:
+            if pos not in token_set:
+                bound = self.ratio_bound(pos, cleaned_query, query_counts)
+                if bound < best_ratio or (bound == best_ratio and (best_pos is None or pos > best_pos)):
+                    continue
+
+            ratio = fuzz_ratio(cleaned_query, self.cleaned_names[pos])
+            is_new_best = ratio > best_ratio or (ratio == best_ratio and best_pos is not None and pos < best_pos)
+            if is_new_best:
+                best_ratio = ratio
+                best_pos = pos
+            if on_compare:
+                on_compare(self.cleaned_names[pos], ratio, is_new_best)
+
+        return best_pos, best_ratio
+
+    def _best_levenshtein_match(self, cleaned_query: str) -> Tuple[Optional[int], int]:
+        """Score one full row of the name x filename matrix with python-Levenshtein"""
+        if not self.cleaned_names:
+            return None, 0
+        # Levenshtein.ratio agrees with fuzz.ratio here: 1.0 for equal strings
+        # (including two empty ones) and 0.0 when exactly one is empty
+        scores = [levenshtein_ratio(cleaned_query, name) for name in self.cleaned_names]
+        best_ratio = int(round(100 * max(scores)))
+        if best_ratio == 0:
+            return None, 0
+        # Rounding can merge near scores, so take the first file that rounds to the best
+        for pos, score in enumerate(scores):
+            if int(round(100 * score)) == best_ratio:
+                return pos, best_ratio
+        return None, 0
@@ -1,10 +1,10 @@
 import os
-import yaml
 from fuzzywuzzy import fuzz
 from fuzzywuzzy import process
-import logging.config
+import logging
 import re
 from app.services.square_catalog import SquareCatalog
+from app.services.square_catalog_sync import SquareCatalogSync
 from square.client import Client
 from dotenv import load_dotenv
 from pathlib import Path
@@ -15,43 +15,77 @@ from datetime import datetime
 from app.utils.paths import paths
 from app.utils.verify_paths import PathVerifier
 import sys
+import math
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pprint import pformat
+from app.services.image_index import ImageIndex, compact_sku
+from app.services.image_catalog import ImageCatalog
+from app.utils.rate_limiter import TokenBucket
+from app.services.catalog_cache import invalidate_catalog_cache
+from app.utils.logger import lazy, setup_logger
+from app.utils.metrics import track_square_call
 
-# Use paths instead of local definitions
-file_handler = logging.FileHandler(paths.get_log_file('image_matcher'), mode='w')
+logger = setup_logger('image_matcher', level='INFO')
 
-# Remove all handlers from the root logger
-logging.getLogger().handlers = []
+# Minimum fuzzy name score for a match
+MIN_MATCH_SCORE = 80
 
-# Configure our specific logger
-logger = logging.getLogger('image_matcher')
-logger.setLevel(logging.INFO)
-logger.handlers = []  # Remove any existing handlers
+# Smallest number of variations worth shipping to a worker process
+MIN_WORKER_SHARD = 50
 
-# Create handlers
-file_handler = logging.FileHandler(paths.get_log_file('image_matcher'), mode='w')
-console_handler = logging.StreamHandler()
+# Square upload pipeline: concurrent uploads share one token bucket sized to
+# stay under Square's catalog rate limits, and retry throttled/5xx responses
+UPLOAD_WORKERS = 4
+SQUARE_REQUESTS_PER_SECOND = 10
+SQUARE_BURST = 10
+SQUARE_MAX_RETRIES = 5
+SQUARE_RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-# Create formatters and add it to handlers
-log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(log_format)
-console_handler.setFormatter(log_format)
+# Matches uploaded per freshness check (one batch_retrieve_catalog_objects call)
+UPLOAD_BATCH_SIZE = 100
+# Square's limit on object_ids per batch_retrieve_catalog_objects call
+SQUARE_BATCH_RETRIEVE_LIMIT = 1000
+# Square's limit on objects per batch in batch_upsert_catalog_objects
+SQUARE_BATCH_UPSERT_LIMIT = 1000
+# Times a batch of variation associations is refetched and resent after version conflicts
+ASSOCIATION_CONFLICT_RETRIES = 3
 
-# Add handlers to the logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# Per-process matcher used by match_batch worker processes
+_worker_matcher = None
+
+def _init_match_worker():
+    """Build the worker's matcher once; its image indexes are reused across shards"""
+    global _worker_matcher
+    _worker_matcher = ImageMatcher(connect_square=False)
+
+def _match_shard(variations):
+    """Match one shard of variations (all from the same vendor) in a worker process"""
+    return _worker_matcher.match_batch(variations)
 
 class ImageMatcher:
-    def __init__(self):
+    def __init__(self, connect_square=True):
+        # Persistent cache of directory listings and parsed config
+        self.image_catalog = ImageCatalog()
+        
         # Load vendor directory mappings from vendor config
-        with open(paths.VENDOR_CONFIG, 'r') as f:
-            self.config = yaml.safe_load(f)
+        self.config = self.image_catalog.get_config(paths.VENDOR_CONFIG)
         
         # Base directory is now under DATA_DIR/images
         self.base_dir = os.path.join(paths.DATA_DIR, 'images')
         self.vendors = self.config['vendors']
         self.aliases = self.config.get('aliases', {})
         
+        # Per-vendor image indexes, built lazily once per run
+        self._image_indexes = {}
+        self._vendor_directories = {}
+        
+        # Matching-only instances (worker processes) never talk to Square
+        if not connect_square:
+            return
+        
         # Initialize Square catalog
         self.square = SquareCatalog()
         
@@ -61,33 +95,35 @@ class ImageMatcher:
             environment=os.getenv('SQUARE_ENVIRONMENT', 'sandbox')
         )
         self.catalog_api = self.client.catalog
+        self.rate_limiter = TokenBucket(SQUARE_REQUESTS_PER_SECOND, SQUARE_BURST)
         
     def get_vendor_directory(self, vendor_name):
         """Get the directory for a vendor, including alias check"""
         if not vendor_name:
             return None
         
+        if vendor_name not in self._vendor_directories:
+            self._vendor_directories[vendor_name] = self._lookup_vendor_directory(vendor_name)
+        return self._vendor_directories[vendor_name]
+    
+    def _lookup_vendor_directory(self, vendor_name):
+        """Resolve a vendor name to its image directory from the loaded vendor config"""
         # Check aliases first
         vendor_name = self.aliases.get(vendor_name, vendor_name)
         
-        # Load vendor directory mappings from vendor config
-        with open(paths.VENDOR_CONFIG, 'r') as f:
-            config = yaml.safe_load(f)
-            websites = config.get('websites', [])
-            
-            # Look for matching website configuration
-            for website in websites:
-                if website['name'].lower() == vendor_name.lower():
-                    # For Supreme, use the URL from the website config
-                    if 'url' in website:
-                        domain = website['url'].split('//')[1].split('/')[0]
-                        # Remove www. prefix if present
-                        return domain.replace('www.', '')
-                    elif 'urls' in website:
-                        # If multiple URLs, use the first one
-                        domain = website['urls'][0].split('//')[1].split('/')[0]
-                        # Remove www. prefix if present
-                        return domain.replace('www.', '')
+        # Look for matching website configuration
+        for website in self.config.get('websites', []):
+            if website['name'].lower() == vendor_name.lower():
+                # For Supreme, use the URL from the website config
+                if 'url' in website:
+                    domain = website['url'].split('//')[1].split('/')[0]
+                    # Remove www. prefix if present
+                    return domain.replace('www.', '')
+                elif 'urls' in website:
+                    # If multiple URLs, use the first one
+                    domain = website['urls'][0].split('//')[1].split('/')[0]
+                    # Remove www. prefix if present
+                    return domain.replace('www.', '')
         
         # If no match found in websites.yaml, try the original vendors mapping
         vendor_dir = self.vendors.get(vendor_name)
@@ -96,11 +132,11 @@ class ImageMatcher:
             return vendor_dir.replace('www.', '')
         return None
     
-    def get_image_files(self, vendor_dir):
-        """Get list of image files in vendor directory"""
+    def _resolve_image_dir(self, vendor_dir):
+        """Get the full path of a vendor image directory, or None if it does not exist"""
         if not vendor_dir:
             logger.warning("No vendor directory specified")
-            return []
+            return None
         
         # Construct path using data/images directory
         full_path = os.path.join(self.base_dir, vendor_dir)
@@ -109,12 +145,22 @@ class ImageMatcher:
             # Try alternate path without www prefix
             alt_path = os.path.join(self.base_dir, vendor_dir.replace('www.', ''))
             if os.path.exists(alt_path):
-                full_path = alt_path
-            else:
-                return []
-        
-        return [f for f in os.listdir(full_path) 
-                if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))]
+                return alt_path
+            return None
+        return full_path
+    
+    def _get_catalog_entry(self, vendor_dir):
+        """Get (files, cleaned_names, compact_names) for a vendor directory from the image catalog"""
+        full_path = self._resolve_image_dir(vendor_dir)
+        if not full_path:
+            return [], [], []
+        entry = self.image_catalog.get_directory(full_path, self.clean_name, compact_sku)
+        return entry or ([], [], [])
+    
+    def get_image_files(self, vendor_dir):
+        """Get list of image files in vendor directory"""
+        files, _, _ = self._get_catalog_entry(vendor_dir)
+        return list(files)
     
     def clean_name(self, name, is_red_rhino=False):
         """Clean product name for better matching"""
@@ -130,7 +176,7 @@ class ImageMatcher:
         if is_red_rhino:
             name = re.sub(r'^[a-z0-9]{3,30}-', '', name, flags=re.IGNORECASE)
             name = re.sub(r'^[a-z0-9]{3,30}\s+', '', name, flags=re.IGNORECASE)
-            logger.info(f"After product code removal: '{name}'")
+            logger.debug(f"After product code removal: '{name}'")
         
         # Define descriptive terms to remove
         descriptive_terms = [
@@ -193,7 +239,7 @@ class ImageMatcher:
         # 2. One of the words is a number
         # 3. Removing the term would leave just a number
         if word_count <= 2 or numeric_words:
-            logger.info(f"Simple name detected: '{name}' - keeping descriptive terms")
+            logger.debug(f"Simple name detected: '{name}' - keeping descriptive terms")
             cleaned = name
         else:
             # Remove descriptive terms only for longer names
@@ -232,32 +278,35 @@ class ImageMatcher:
             logger.warning(f"Cleaning resulted in empty string for input: '{name}'")
             return name
         
-        logger.info(f"Cleaned name: '{name}' -> '{cleaned}'")
+        logger.debug(f"Cleaned name: '{name}' -> '{cleaned}'")
         return cleaned
     
-    def find_best_match(self, name_to_match, image_files, sku=None, vendor_sku=None):
-        """Find best matching image file for a given name"""
-        if not image_files:
-            logger.warning("No valid image names to match against")
-            return None, 0
-        
-        logger.info(f"\n=== Starting Match Process ===")
-        logger.info(f"Looking for match: '{name_to_match}'")
-        logger.info(f"Square SKU: '{sku}'")
-        logger.info(f"Vendor SKU: '{vendor_sku}'")
-        logger.info(f"Number of images to check: {len(image_files)}")
-        
+    def get_image_index(self, vendor_dir):
+        """Get the candidate index for a vendor directory, building it once per run"""
+        if vendor_dir not in self._image_indexes:
+            files, cleaned_names, compact_names = self._get_catalog_entry(vendor_dir)
+            logger.info(f"Building image index for {vendor_dir} ({len(files)} files)")
+            self._image_indexes[vendor_dir] = ImageIndex(
+                files, self.clean_name, cleaned_names=cleaned_names, compact_names=compact_names
+            )
+        return self._image_indexes[vendor_dir]
+    
+    def _match_by_sku(self, index, sku=None, vendor_sku=None, verbose=True):
+        """Return the first image file matching the Square SKU or vendor SKU, if any"""
         # First try to match by Square SKU
         if sku:
-            logger.info(f"\nTrying to match by Square SKU: {sku}")
-            for image_file in image_files:
-                base_name = os.path.splitext(image_file)[0].lower()
-                logger.info(f"  Checking against: {base_name}")
+            if verbose:
+                logger.info(f"\nTrying to match by Square SKU: {sku}")
+            for pos in index.sku_candidates(sku):
+                image_file = index.files[pos]
+                base_name = index.base_names[pos]
+                if verbose:
+                    logger.debug(f"  Checking against: {base_name}")
                 
                 # Try exact match first
                 if sku.lower() == base_name:
                     logger.info(f"  Found exact Square SKU match: {image_file}")
-                    return image_file, 100
+                    return image_file
                     
                 # Then try as part of filename
                 if sku.lower() in base_name:
@@ -265,21 +314,25 @@ class ImageMatcher:
                     sku_pattern = rf'\b{re.escape(sku.lower())}\b'
                     if re.search(sku_pattern, base_name):
                         logger.info(f"  Found Square SKU in filename: {image_file}")
-                        return image_file, 100
+                        return image_file
                     else:
                         logger.debug(f"  SKU found but not at word boundary: {base_name}")
         
         # Then try to match by vendor SKU
         if vendor_sku:
-            logger.info(f"\nTrying to match by Vendor SKU: {vendor_sku}")
-            for image_file in image_files:
-                base_name = os.path.splitext(image_file)[0].lower()
-                logger.info(f"  Checking against: {base_name}")
+            if verbose:
+                logger.info(f"\nTrying to match by Vendor SKU: {vendor_sku}")
+            clean_sku = compact_sku(vendor_sku.lower())
+            for pos in index.sku_candidates(vendor_sku):
+                image_file = index.files[pos]
+                base_name = index.base_names[pos]
+                if verbose:
+                    logger.debug(f"  Checking against: {base_name}")
                 
                 # Try exact match first
                 if vendor_sku.lower() == base_name:
                     logger.info(f"  Found exact Vendor SKU match: {image_file}")
-                    return image_file, 100
+                    return image_file
                 
                 # Then try as part of filename
                 if vendor_sku.lower() in base_name:
@@ -287,55 +340,180 @@ class ImageMatcher:
                     sku_pattern = rf'\b{re.escape(vendor_sku.lower())}\b'
                     if re.search(sku_pattern, base_name):
                         logger.info(f"  Found Vendor SKU in filename: {image_file}")
-                        return image_file, 100
+                        return image_file
                     else:
                         logger.debug(f"  Vendor SKU found but not at word boundary: {base_name}")
                 
                 # Try without special characters
-                clean_sku = re.sub(r'[^a-zA-Z0-9]', '', vendor_sku.lower())
-                clean_name = re.sub(r'[^a-zA-Z0-9]', '', base_name)
-                if clean_sku and clean_sku in clean_name:
+                if clean_sku and clean_sku in index.compact_names[pos]:
                     logger.info(f"  Found Vendor SKU (cleaned) in filename: {image_file}")
-                    return image_file, 100
+                    return image_file
+        
+        return None
+    
+    def find_best_match(self, name_to_match, image_files, sku=None, vendor_sku=None):
+        """Find best matching image file for a given name
+        
+        image_files may be a plain list of filenames or a prebuilt ImageIndex
+        (see get_image_index). The index only narrows which files get compared;
+        the returned match and score are the same as a full linear scan.
+        """
+        if not image_files:
+            logger.warning("No valid image names to match against")
+            return None, 0
+        
+        index = image_files if isinstance(image_files, ImageIndex) else ImageIndex(image_files, self.clean_name)
+        
+        logger.debug(f"\n=== Starting Match Process ===")
+        logger.debug(f"Looking for match: '{name_to_match}'")
+        logger.debug(f"Square SKU: '{sku}'")
+        logger.debug(f"Vendor SKU: '{vendor_sku}'")
+        logger.debug(f"Number of images to check: {len(index)}")
+        
+        sku_match = self._match_by_sku(index, sku=sku, vendor_sku=vendor_sku)
+        if sku_match:
+            return sku_match, 100
         
         # Finally, fall back to name matching
-        logger.info("\nFalling back to name matching...")
+        logger.debug("\nFalling back to name matching...")
         clean_name = self.clean_name(name_to_match)
-        logger.info(f"Final name to match: '{clean_name}'")
+        logger.debug(f"Final name to match: '{clean_name}'")
         
-        best_match = None
-        best_ratio = 0
+        # Per-comparison tracing also forces the slower scoring path, so only when it is written
+        def log_comparison(clean_image, ratio, is_new_best):
+            logger.debug(f"Comparing:")
+            logger.debug(f"  Clean name: '{clean_name}'")
+            logger.debug(f"  Image name: '{clean_image}'")
+            logger.debug(f"  Match ratio: {ratio}%")
+            if is_new_best:
+                logger.debug(f"  New best match! Score: {ratio}%")
         
-        for image_file in image_files:
-            base_name = os.path.splitext(image_file)[0]
-            clean_image = self.clean_name(base_name)
-            
-            ratio = fuzz.ratio(clean_name, clean_image)
-            logger.info(f"Comparing:")
-            logger.info(f"  Clean name: '{clean_name}'")
-            logger.info(f"  Image name: '{clean_image}'")
-            logger.info(f"  Match ratio: {ratio}%")
-            
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_match = image_file
-                logger.info(f"  New best match! Score: {ratio}%")
-                
-                if ratio == 100:
-                    logger.info("Found perfect match - stopping search")
-                    break
-        
-        if best_match and best_ratio >= 80:
-            logger.info(f"\nFinal Match Found:")
-            logger.info(f"Original name: '{name_to_match}'")
-            logger.info(f"Matched with: '{best_match}'")
-            logger.info(f"Match score: {best_ratio}%")
+        best_pos, best_ratio = index.best_name_match(
+            clean_name, on_compare=log_comparison if logger.isEnabledFor(logging.DEBUG) else None)
+        best_match = index.files[best_pos] if best_pos is not None else None
+        
+        if best_match and best_ratio >= MIN_MATCH_SCORE:
+            logger.debug(f"\nFinal Match Found:")
+            logger.debug(f"Original name: '{name_to_match}'")
+            logger.debug(f"Matched with: '{best_match}'")
+            logger.debug(f"Match score: {best_ratio}%")
             return best_match, best_ratio
         else:
-            logger.info(f"\nNo match found meeting minimum score (80%)")
-            logger.info(f"Best match was: '{best_match}' with score: {best_ratio}%")
+            logger.debug(f"\nNo match found meeting minimum score ({MIN_MATCH_SCORE}%)")
+            logger.debug(f"Best match was: '{best_match}' with score: {best_ratio}%")
             return None, best_ratio
     
+    def match_batch(self, variations, workers=1):
+        """Match many variations at once, grouped by vendor directory.
+        
+        Each entry in variations is a dict with 'name' (the name to match),
+        'vendor_name', 'square_sku' and 'vendor_sku'. Returns one dict per
+        entry, in the same order, with 'vendor_dir', 'image_file', 'image_path'
+        and 'match_ratio' (image_file is None if nothing matched, vendor_dir is
+        None if the vendor has no image directory).
+        
+        Results are the same as calling find_best_match per variation, but
+        names are cleaned once, identical names within a vendor are scored once,
+        and every name x filename score goes straight to python-Levenshtein
+        without per-comparison logging.
+        
+        With workers > 1 the vendor groups are split into shards and matched
+        in a process pool; results are merged back by row, so the output is
+        identical to a single-process run.
+        """
+        results = [None] * len(variations)
+        
+        # Group row numbers by vendor directory
+        groups = {}
+        for row, var in enumerate(variations):
+            vendor_dir = self.get_vendor_directory(var.get('vendor_name'))
+            if not vendor_dir:
+                results[row] = {'vendor_dir': None, 'image_file': None, 'image_path': None, 'match_ratio': 0}
+                continue
+            groups.setdefault(vendor_dir, []).append(row)
+        
+        if workers > 1 and len(variations) > MIN_WORKER_SHARD:
+            self._match_groups_in_pool(variations, groups, results, workers)
+            return results
+        
+        cleaned_cache = {}
+        for vendor_dir, rows in groups.items():
+            index = self.get_image_index(vendor_dir)
+            logger.info(f"Batch matching {len(rows)} variations against {len(index)} images in {vendor_dir}")
+            start_time = time.time()
+            
+            # SKU matches first; everything else falls back to name scoring
+            name_rows = {}
+            for row in rows:
+                var = variations[row]
+                image_file = None
+                match_ratio = 0
+                if index:
+                    image_file = self._match_by_sku(
+                        index, sku=var.get('square_sku'), vendor_sku=var.get('vendor_sku'), verbose=False
+                    )
+                if image_file:
+                    match_ratio = 100
+                elif index:
+                    name = var.get('name')
+                    if name not in cleaned_cache:
+                        cleaned_cache[name] = self.clean_name(name)
+                    name_rows.setdefault(cleaned_cache[name], []).append(row)
+                results[row] = {'vendor_dir': vendor_dir, 'image_file': image_file, 'match_ratio': match_ratio}
+            
+            # One row of the similarity matrix per distinct cleaned name
+            for clean_name, same_name_rows in name_rows.items():
+                best_pos, best_ratio = index.best_name_match(clean_name)
+                image_file = index.files[best_pos] if best_pos is not None and best_ratio >= MIN_MATCH_SCORE else None
+                for row in same_name_rows:
+                    results[row]['image_file'] = image_file
+                    results[row]['match_ratio'] = best_ratio
+            
+            matched = sum(1 for row in rows if results[row]['image_file'])
+            logger.info(f"  Matched {matched}/{len(rows)} in {time.time() - start_time:.2f}s "
+                        f"({len(name_rows)} distinct names scored)")
+        
+        for result in results:
+            result['image_path'] = (
+                os.path.join(self.base_dir, result['vendor_dir'], result['image_file'])
+                if result['image_file'] else None
+            )
+        return results
+    
+    def _match_groups_in_pool(self, variations, groups, results, workers):
+        """Match vendor groups in a ProcessPoolExecutor, writing results back by row"""
+        # Refresh the image catalog here so workers start from a warm sidecar
+        # instead of all rescanning (and rewriting) it at once
+        for vendor_dir in groups:
+            self.get_image_files(vendor_dir)
+        
+        # Split large vendors so one big directory does not leave cores idle
+        total_rows = sum(len(rows) for rows in groups.values())
+        shard_size = max(MIN_WORKER_SHARD, math.ceil(total_rows / workers))
+        shards = []
+        for vendor_dir, rows in groups.items():
+            for start in range(0, len(rows), shard_size):
+                shards.append(rows[start:start + shard_size])
+        
+        logger.info(f"Matching {total_rows} variations in {len(shards)} shards across {workers} workers")
+        start_time = time.time()
+        
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_init_match_worker) as executor:
+            futures = [
+                executor.submit(_match_shard, [variations[row] for row in shard_rows])
+                for shard_rows in shards
+            ]
+            for shard_rows, future in zip(shards, futures):
+                for row, result in zip(shard_rows, future.result()):
+                    # Rebuild the path against this process's base directory
+                    result['image_path'] = (
+                        os.path.join(self.base_dir, result['vendor_dir'], result['image_file'])
+                        if result['image_file'] else None
+                    )
+                    results[row] = result
+        
+        logger.info(f"Parallel matching finished in {time.time() - start_time:.2f}s")
+    
     def get_vendor_code(self, vendor_name, variation_name):
         """Extract vendor code from variation name or vendor name"""
         # Common vendor codes
@@ -375,7 +553,8 @@ class ImageMatcher:
             logger.debug(f"\nProcessing Square Item: '{item_name}'")
             
             # Double check with Square API that this item still needs images
-            item_result = self.catalog_api.retrieve_catalog_object(
+            item_result = track_square_call(
+                'retrieve_catalog_object', self.catalog_api.retrieve_catalog_object,
                 object_id=item['id']
             )
             
@@ -394,7 +573,8 @@ class ImageMatcher:
                 vendor_sku = var['vendor_sku']
                 
                 # Double check variation still needs image
-                var_result = self.catalog_api.retrieve_catalog_object(
+                var_result = track_square_call(
+                    'retrieve_catalog_object', self.catalog_api.retrieve_catalog_object,
                     object_id=var['id']
                 )
                 
@@ -419,7 +599,7 @@ class ImageMatcher:
                     continue
                 
                 logger.info(f"  Looking in directory: {vendor_dir}")
-                image_files = self.get_image_files(vendor_dir)
+                image_files = self.get_image_index(vendor_dir)
                 
                 best_match, match_ratio = self.find_best_match(
                     item_name,
@@ -446,19 +626,31 @@ class ImageMatcher:
         
         return matches
     
-    def upload_image_to_square(self, image_path, variation_id, needs_primary=True):
-        """Upload an image to Square and associate it with item/variations as needed."""
+    def upload_image_to_square(self, image_path, variation_id, needs_primary=True, variation=None, item=None,
+                               pending_associations=None):
+        """Upload an image to Square and associate it with item/variations as needed.
+        
+        variation and item are already-fetched catalog objects (see
+        fetch_catalog_objects); when given, they are used instead of
+        retrieving the objects again. If pending_associations is a list, the
+        variation association is appended to it as (image_id, variation_id,
+        variation) for associate_images_with_variations instead of being
+        upserted immediately.
+        """
         try:
             # First, get the variation to ensure it exists and get the item ID
-            result = self.catalog_api.retrieve_catalog_object(
-                object_id=variation_id
-            )
-            
-            if not result.is_success():
-                logger.error("Failed to get variation details")
-                return None
+            if variation is None:
+                result = self._call_square(
+                    'retrieve_catalog_object', f"retrieve variation {variation_id}",
+                    lambda: self.catalog_api.retrieve_catalog_object(object_id=variation_id)
+                )
+                
+                if not result.is_success():
+                    logger.error("Failed to get variation details")
+                    return None
+                variation = result.body['object']
             
-            variation_data = result.body['object'].get('item_variation_data', {})
+            variation_data = variation.get('item_variation_data', {})
             item_id = variation_data.get('item_id')
             
             # Check if variation already has images
@@ -468,15 +660,18 @@ class ImageMatcher:
             
             # Get item details to check for primary image if needed
             if needs_primary:
-                item_result = self.catalog_api.retrieve_catalog_object(
-                    object_id=item_id
-                )
-                
-                if not item_result.is_success():
-                    logger.error("Failed to get item details")
-                    return None
+                if item is None:
+                    item_result = self._call_square(
+                        'retrieve_catalog_object', f"retrieve item {item_id}",
+                        lambda: self.catalog_api.retrieve_catalog_object(object_id=item_id)
+                    )
+                    
+                    if not item_result.is_success():
+                        logger.error("Failed to get item details")
+                        return None
+                    item = item_result.body['object']
                 
-                if item_result.body['object']['item_data'].get('image_ids'):
+                if item['item_data'].get('image_ids'):
                     logger.info("Item already has primary image - skipping upload")
                     return "SKIPPED"
             
@@ -512,14 +707,18 @@ class ImageMatcher:
             # Upload the image
             with open(image_path, 'rb') as f:
                 image_data = f.read()
+            
+            def create_image():
+                # Fresh file object per attempt since a failed attempt consumes it
                 image_file_obj = io.BytesIO(image_data)
                 image_file_obj.name = file_name
-                
-                result = self.catalog_api.create_catalog_image(
+                return self.catalog_api.create_catalog_image(
                     request=request,
                     image_file=image_file_obj
                 )
             
+            result = self._call_square('create_catalog_image', f"upload image for {variation_id}", create_image)
+            
             if result.is_success():
                 # Get the image ID
                 image_id = result.body.get('image', {}).get('id') or result.body.get('catalog_object', {}).get('id')
@@ -531,8 +730,12 @@ class ImageMatcher:
                 logger.info(f"Upload successful! Image ID: {image_id}")
                 
                 # Associate with variation if needed
-                if not needs_primary:
-                    success = self._associate_image_with_variation(image_id, variation_id)
+                if not needs_primary and pending_associations is not None:
+                    # The upload did not touch the variation, so its version is still current
+                    pending_associations.append((image_id, variation_id, variation))
+                    logger.info(f"Queued association of image {image_id} with variation {variation_id}")
+                elif not needs_primary:
+                    success = self._associate_image_with_variation(image_id, variation_id, variation)
                     if not success:
                         logger.warning(f"Failed to associate image with variation {variation_id}")
                 
@@ -553,53 +756,41 @@ class ImageMatcher:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
     
-    def _associate_image_with_variation(self, image_id, variation_id):
+    def _associate_image_with_variation(self, image_id, variation_id, current_variation=None):
         """Associate an uploaded image with a catalog item variation."""
         try:
-            # First get the variation to ensure it exists
-            variation_result = self.catalog_api.retrieve_catalog_object(
-                object_id=variation_id
-            )
-            
-            if not variation_result.is_success():
-                logger.error(f"Failed to retrieve variation {variation_id}")
-                return False
-            
-            # Get the current variation data
-            current_variation = variation_result.body['object']
-            current_data = current_variation.get('item_variation_data', {})
-            
-            # Create a copy of the current data and add our image_ids
-            updated_data = current_data.copy()
-            updated_data['image_ids'] = [image_id]
+            # First get the variation to ensure it exists (unless the caller already has it)
+            if current_variation is None:
+                variation_result = self._call_square(
+                    'retrieve_catalog_object', f"retrieve variation {variation_id}",
+                    lambda: self.catalog_api.retrieve_catalog_object(object_id=variation_id)
+                )
+                
+                if not variation_result.is_success():
+                    logger.error(f"Failed to retrieve variation {variation_id}")
+                    return False
+                
+                current_variation = variation_result.body['object']
             
             # Create the batch upsert request
             batch_request = {
                 "idempotency_key": f"update_{image_id}_{variation_id}_{int(time.time())}",
                 "batches": [
                     {
-                        "objects": [
-                            {
-                                "type": "ITEM_VARIATION",
-                                "id": variation_id,
-                                "version": current_variation.get('version'),
-                                "present_at_all_locations": current_variation.get('present_at_all_locations'),
-                                "present_at_location_ids": current_variation.get('present_at_location_ids'),
-                                "item_variation_data": updated_data
-                            }
-                        ]
+                        "objects": [self._variation_with_image(current_variation, image_id)]
                     }
                 ]
             }
             
             logger.debug("\nCurrent variation data:")
-            logger.debug(pformat(current_variation))
+            logger.debug("%s", lazy(pformat, current_variation))
             logger.debug("\nSending batch upsert request:")
-            logger.debug(pformat(batch_request))
+            logger.debug("%s", lazy(pformat, batch_request))
             
             # Use BatchUpsertCatalogObjects to associate the image
-            update_result = self.catalog_api.batch_upsert_catalog_objects(
-                body=batch_request
+            update_result = self._call_square(
+                'batch_upsert_catalog_objects', f"associate image with {variation_id}",
+                lambda: self.catalog_api.batch_upsert_catalog_objects(body=batch_request)
             )
             
             if update_result.is_success():
@@ -613,35 +804,292 @@ class ImageMatcher:
             logger.error(f"Exception while associating image: {str(e)}")
             return False
     
-    def process_matches(self, matches):
-        """Process matches and upload images to Square."""
-        logger.info("\n=== Processing Matches and Uploading Images ===")
+    def _variation_with_image(self, variation, image_id):
+        """Upsert payload for a variation with its image_ids set to the uploaded image"""
+        # Create a copy of the current data and add our image_ids
+        updated_data = variation.get('item_variation_data', {}).copy()
+        updated_data['image_ids'] = [image_id]
+        return {
+            "type": "ITEM_VARIATION",
+            "id": variation['id'],
+            "version": variation.get('version'),
+            "present_at_all_locations": variation.get('present_at_all_locations'),
+            "present_at_location_ids": variation.get('present_at_location_ids'),
+            "item_variation_data": updated_data
+        }
+    
+    def associate_images_with_variations(self, associations):
+        """Attach uploaded images to their variations with batched upserts.
         
-        successful_uploads = 0
-        failed_uploads = 0
+        associations is a list of (image_id, variation_id, variation) where
+        variation is the catalog object the upload saw, or None to fetch it.
+        Variations are upserted up to SQUARE_BATCH_UPSERT_LIMIT per request.
+        A batch is rejected as a whole, so if it fails on a version conflict
+        the variations named in the errors are refetched and the batch is
+        resent; if it conflicts again the whole batch is refetched.
         
-        for match in matches:
-            logger.info(f"\nProcessing match for {match['item_name']} - {match['variation_name']}")
+        Returns (associated, failed) counts.
+        """
+        if not associations:
+            return 0, 0
+        
+        logger.info(f"\n=== Associating {len(associations)} images with variations ===")
+        
+        images = {}
+        variations = {}
+        for image_id, variation_id, variation in associations:
+            images[variation_id] = image_id
+            if variation is not None:
+                variations[variation_id] = variation
+        
+        missing = [vid for vid in images if vid not in variations]
+        if missing:
+            try:
+                variations.update(self.fetch_catalog_objects(missing))
+            except Exception as e:
+                logger.error(f"Failed to fetch variations for association: {str(e)}")
+        
+        associated = 0
+        failed = len([vid for vid in images if vid not in variations])
+        variation_ids = [vid for vid in images if vid in variations]
+        
+        for start in range(0, len(variation_ids), SQUARE_BATCH_UPSERT_LIMIT):
+            batch_ids = variation_ids[start:start + SQUARE_BATCH_UPSERT_LIMIT]
+            if self._upsert_variation_batch(batch_ids, images, variations):
+                associated += len(batch_ids)
+            else:
+                failed += len(batch_ids)
+        
+        logger.info(f"Associated {associated} images with variations ({failed} failed)")
+        return associated, failed
+    
+    def _upsert_variation_batch(self, batch_ids, images, variations):
+        """Upsert one batch of variation image associations, refetching on version conflicts"""
+        for attempt in range(ASSOCIATION_CONFLICT_RETRIES + 1):
+            batch_request = {
+                "idempotency_key": str(uuid.uuid4()),
+                "batches": [
+                    {
+                        "objects": [self._variation_with_image(variations[vid], images[vid]) for vid in batch_ids]
+                    }
+                ]
+            }
             
-            image_id = self.upload_image_to_square(
-                match['image_path'],
-                match['variation_id'],
-                needs_primary=match['needs_primary']
-            )
+            try:
+                result = self._call_square(
+                    'batch_upsert_catalog_objects', f"associate {len(batch_ids)} variation images",
+                    lambda: self.catalog_api.batch_upsert_catalog_objects(body=batch_request)
+                )
+            except Exception as e:
+                logger.error(f"Exception while associating images: {str(e)}")
+                return False
             
-            if image_id:
-                if image_id == "SKIPPED":
-                    logger.info(f"Skipped upload for {match['item_name']} - item already has images")
-                else:
-                    successful_uploads += 1
-                    logger.info(f"Successfully processed match with image ID: {image_id}")
+            if result.is_success():
+                for obj in result.body.get('objects', []):
+                    if obj.get('id') in variations:
+                        variations[obj['id']] = obj
+                return True
+            
+            errors = result.errors or []
+            if not any(error.get('code') == 'VERSION_MISMATCH' for error in errors):
+                logger.error(f"Failed to associate images: {errors}")
+                return False
+            
+            # Refetch only the variations the errors point at; if that was not
+            # enough (Square may report just the first conflict), refetch the batch
+            error_text = ' '.join(f"{error.get('field', '')} {error.get('detail', '')}" for error in errors)
+            conflicting = [vid for vid in batch_ids if vid in error_text] if attempt == 0 else []
+            conflicting = conflicting or batch_ids
+            logger.warning(f"Version conflict on {len(conflicting)} variations - refetching "
+                           f"(attempt {attempt + 1}/{ASSOCIATION_CONFLICT_RETRIES})")
+            try:
+                fresh = self.fetch_catalog_objects(conflicting)
+            except Exception as e:
+                logger.error(f"Failed to refetch conflicting variations: {str(e)}")
+                return False
+            
+            deleted = [vid for vid in conflicting if vid not in fresh]
+            if deleted:
+                logger.error(f"Variations no longer exist: {deleted}")
+                return False
+            variations.update(fresh)
+        
+        logger.error(f"Giving up on {len(batch_ids)} associations after repeated version conflicts")
+        return False
+    
+    def _call_square(self, operation, description, request):
+        """Make a rate-limited Square API call, retrying 429/5xx responses and connection errors.
+        
+        request is a zero-argument callable so every attempt sends a fresh
+        request; each attempt is recorded under the SDK operation name.
+        Backoff is exponential with jitter, honouring Retry-After when Square
+        sends it; a 429 also pauses the shared token bucket so the other
+        upload workers back off too.
+        """
+        for attempt in range(SQUARE_MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            try:
+                result = track_square_call(operation, request)
+            except Exception as e:
+                if attempt == SQUARE_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{description} failed ({str(e)}) - retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            if result.status_code not in SQUARE_RETRY_STATUSES or attempt == SQUARE_MAX_RETRIES:
+                return result
+            
+            delay = self._retry_delay(attempt, result.headers)
+            logger.warning(f"{description} returned {result.status_code} - retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{SQUARE_MAX_RETRIES})")
+            if result.status_code == 429:
+                # The drained bucket makes the next acquire() (ours included) wait out the delay
+                self.rate_limiter.pause(delay)
             else:
-                failed_uploads += 1
-                logger.error(f"Failed to process match for variation {match['variation_id']}")
+                time.sleep(delay)
+    
+    def _retry_delay(self, attempt, headers=None):
+        """Seconds to wait before the next retry"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        try:
+            return max(0.0, float(headers['retry-after']))
+        except (KeyError, TypeError, ValueError):
+            return min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+    
+    def fetch_catalog_objects(self, object_ids):
+        """Fetch current catalog objects by ID with batch_retrieve_catalog_objects.
+        
+        Returns a dict of object ID -> catalog object. IDs that no longer exist
+        are missing from the result; raises if Square returns an error.
+        """
+        object_ids = list(dict.fromkeys(object_ids))
+        objects = {}
+        for start in range(0, len(object_ids), SQUARE_BATCH_RETRIEVE_LIMIT):
+            chunk = object_ids[start:start + SQUARE_BATCH_RETRIEVE_LIMIT]
+            result = self._call_square(
+                'batch_retrieve_catalog_objects', f"batch retrieve {len(chunk)} objects",
+                lambda: self.catalog_api.batch_retrieve_catalog_objects(
+                    body={"object_ids": chunk, "include_related_objects": False}
+                )
+            )
+            if not result.is_success():
+                raise RuntimeError(f"Failed to batch retrieve catalog objects: {result.errors}")
+            for obj in result.body.get('objects', []):
+                objects[obj['id']] = obj
+        return objects
+    
+    def _refresh_matches(self, matches):
+        """Freshness check for a batch of matches carrying their catalog versions.
+        
+        One batch retrieve covers every variation and item in the batch. Returns
+        a list of (variation, item) objects per match; (None, None) when the
+        variation no longer exists.
+        """
+        object_ids = [m['variation_id'] for m in matches] + [m['item_id'] for m in matches if m['needs_primary']]
+        objects = self.fetch_catalog_objects(object_ids)
+        
+        stale = 0
+        refreshed = []
+        for match in matches:
+            variation = objects.get(match['variation_id'])
+            item = objects.get(match['item_id']) if match['needs_primary'] else None
+            if variation is None or (match['needs_primary'] and item is None):
+                logger.error(f"Catalog object for {match['item_name']} - {match['variation_name']} no longer exists")
+                refreshed.append((None, None))
+                continue
+            if variation.get('version') != match['variation_version'] or (
+                    item is not None and item.get('version') != match['item_version']):
+                stale += 1
+            refreshed.append((variation, item))
+        
+        if stale:
+            logger.info(f"{stale} of {len(matches)} matches changed in Square since they were fetched")
+        return refreshed
+    
+    def _process_match(self, match, variation=None, item=None, pending_associations=None):
+        """Upload the image for one match (runs in an upload worker thread)"""
+        logger.info(f"\nProcessing match for {match['item_name']} - {match['variation_name']}")
+        return self.upload_image_to_square(
+            match['image_path'],
+            match['variation_id'],
+            needs_primary=match['needs_primary'],
+            variation=variation,
+            item=item,
+            pending_associations=pending_associations
+        )
+    
+    def process_matches(self, matches, workers=UPLOAD_WORKERS):
+        """Process matches and upload images to Square.
+        
+        Uploads run on a pool of worker threads; every Square call goes
+        through the shared token bucket and retry logic in _call_square.
+        Items and variations that already have images are still skipped.
+        
+        Matches that carry their catalog versions (item_id, variation_version,
+        item_version from process_catalog_items) are uploaded in batches of
+        UPLOAD_BATCH_SIZE, each preceded by a single batch retrieve that
+        replaces the per-match variation and item GETs.
+        
+        Variation image associations are deferred until every upload is done
+        and then written with batched upserts (associate_images_with_variations).
+        """
+        logger.info("\n=== Processing Matches and Uploading Images ===")
+        logger.info(f"Uploading {len(matches)} matches with {workers} workers")
+        
+        successful_uploads = 0
+        failed_uploads = 0
+        start_time = time.time()
+        
+        pending_associations = []
+        prefetched = all('variation_version' in match for match in matches)
+        batch_size = UPLOAD_BATCH_SIZE if prefetched else max(1, len(matches))
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for start in range(0, len(matches), batch_size):
+                batch = matches[start:start + batch_size]
+                objects = [(None, None)] * len(batch)
+                if prefetched:
+                    try:
+                        objects = self._refresh_matches(batch)
+                    except Exception as e:
+                        logger.error(f"Freshness check failed: {str(e)}")
+                        failed_uploads += len(batch)
+                        continue
+                
+                futures = {}
+                for match, (variation, item) in zip(batch, objects):
+                    if prefetched and variation is None:
+                        failed_uploads += 1
+                        continue
+                    futures[executor.submit(self._process_match, match, variation, item, pending_associations)] = match
+                
+                for future in as_completed(futures):
+                    match = futures[future]
+                    image_id = future.result()
+                    
+                    if image_id:
+                        if image_id == "SKIPPED":
+                            logger.info(f"Skipped upload for {match['item_name']} - item already has images")
+                        else:
+                            successful_uploads += 1
+                            logger.info(f"Successfully processed match with image ID: {image_id}")
+                    else:
+                        failed_uploads += 1
+                        logger.error(f"Failed to process match for variation {match['variation_id']}")
+        
+        associated, failed_associations = self.associate_images_with_variations(pending_associations)
+        
+        # Catalog API responses cached by the web app are now stale
+        if successful_uploads or associated:
+            invalidate_catalog_cache()
         
         logger.info("\n=== Image Upload Summary ===")
         logger.info(f"Successful uploads: {successful_uploads}")
         logger.info(f"Failed uploads: {failed_uploads}")
+        logger.info(f"Variation associations: {associated} ({failed_associations} failed)")
+        logger.info(f"Upload time: {time.time() - start_time:.2f}s")
         
         return successful_uploads, failed_uploads
     
@@ -702,6 +1150,15 @@ class ImageMatcher:
             logger.info(pformat(item))
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Match vendor images to Square items and upload them')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes for the matching phase (default: 1)')
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS,
+                        help=f'Number of concurrent Square uploads (default: {UPLOAD_WORKERS})')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='Re-sync the whole Square catalog instead of only changes since the last sync')
+    args = parser.parse_args()
+    
     # Verify paths first
     verifier = PathVerifier()
     if not verifier.verify_all():
@@ -714,48 +1171,15 @@ if __name__ == "__main__":
     # Get items needing images from Square Catalog
     catalog = SquareCatalog()
     
-    # Get all items using Square Catalog's improved pagination
-    all_items = []
-    cursor = None
-    batch_size = 100
-    
-    logger.info("Fetching all items from Square...")
-    
-    while True:
-        # Get batch of items
-        body = {
-            "product_types": ["REGULAR"],
-            "state_filters": {"states": ["ACTIVE"]},
-            "limit": batch_size
-        }
-        
-        if cursor:
-            body["cursor"] = cursor
-        
-        result = catalog.client.catalog.search_catalog_items(body=body)
-        
-        if not result.is_success():
-            logger.error("Failed to fetch items from Square API")
-            logger.error(pformat(result.errors))
-            break
-        
-        # Process this batch
-        batch_items = catalog.process_catalog_items(result.body)
-        all_items.extend(batch_items)
-        
-        # Get cursor for next batch
-        cursor = result.body.get('cursor')
-        logger.info(f"Fetched batch of {len(batch_items)} items. Total so far: {len(all_items)}")
-        
-        # If no cursor, we've got all items
-        if not cursor:
-            break
+    # Bring the local catalog mirror up to date and read the items from it
+    catalog_sync = SquareCatalogSync(catalog)
+    catalog_sync.sync(full=args.full_sync)
+    all_items = catalog_sync.get_items()
     
     logger.info(f"\nFetched {len(all_items)} total items")
     
-    # Find matches for items needing images
-    matches = []
-    unmatched_items = []  # Track unmatched items
+    # Collect every variation needing an image, then match them in one batch
+    pending = []
     
     for item in all_items:
         item_name = item['name']
@@ -771,88 +1195,65 @@ if __name__ == "__main__":
             if item_needs_primary:
                 logger.info("Looking for primary image for single item")
                 # Take first variation's vendor info for matching
-                var = item['variations'][0]
-                vendor_name = var['vendor_name']
-                square_sku = var['square_sku']
-                vendor_sku = var['vendor_sku']
-                
-                vendor_dir = matcher.get_vendor_directory(vendor_name)
-                if vendor_dir:
-                    image_files = matcher.get_image_files(vendor_dir)
-                    best_match, match_ratio = matcher.find_best_match(
-                        item_name,
-                        image_files,
-                        sku=square_sku,
-                        vendor_sku=vendor_sku
-                    )
-                    
-                    if best_match:
-                        match_data = {
-                            'item_name': item_name,
-                            'variation_name': var['name'],
-                            'variation_id': var['id'],
-                            'vendor': vendor_name,
-                            'image_file': best_match,
-                            'image_path': os.path.join(matcher.base_dir, vendor_dir, best_match),
-                            'match_ratio': match_ratio,
-                            'needs_primary': True
-                        }
-                        matches.append(match_data)
-                        logger.info(f"Found match for primary image: {best_match} ({match_ratio}%)")
-                    else:
-                        unmatched_items.append({
-                            'item_name': item_name,
-                            'variation_name': var['name'],
-                            'vendor': vendor_name,
-                            'vendor_sku': vendor_sku
-                        })
+                pending.append((item, item['variations'][0], True))
         else:
             # Item with variations - process in order
             first_variation = True
             for var in item['variations']:
                 if var['needs_image'] or (first_variation and item_needs_primary):
-                    logger.info(f"\nProcessing variation: {var['name']}")
-                    vendor_name = var['vendor_name']
-                    square_sku = var['square_sku']
-                    vendor_sku = var['vendor_sku']
-                    
-                    vendor_dir = matcher.get_vendor_directory(vendor_name)
-                    if vendor_dir:
-                        image_files = matcher.get_image_files(vendor_dir)
-                        best_match, match_ratio = matcher.find_best_match(
-                            item_name,
-                            image_files,
-                            sku=square_sku,
-                            vendor_sku=vendor_sku
-                        )
-                        
-                        if best_match:
-                            match_data = {
-                                'item_name': item_name,
-                                'variation_name': var['name'],
-                                'variation_id': var['id'],
-                                'vendor': vendor_name,
-                                'image_file': best_match,
-                                'image_path': os.path.join(matcher.base_dir, vendor_dir, best_match),
-                                'match_ratio': match_ratio,
-                                'needs_primary': first_variation and item_needs_primary
-                            }
-                            matches.append(match_data)
-                            logger.info(f"Found match: {best_match} ({match_ratio}%)")
-                            if first_variation and item_needs_primary:
-                                logger.info("This will also be set as the primary image")
-                        else:
-                            unmatched_items.append({
-                                'item_name': item_name,
-                                'variation_name': var['name'],
-                                'vendor': vendor_name,
-                                'vendor_sku': vendor_sku
-                            })
+                    logger.info(f"\nQueued variation: {var['name']}")
+                    pending.append((item, var, first_variation and item_needs_primary))
                 first_variation = False
     
+    logger.info(f"\nMatching {len(pending)} variations...")
+    results = matcher.match_batch([
+        {
+            'name': item['name'],
+            'vendor_name': var['vendor_name'],
+            'square_sku': var['square_sku'],
+            'vendor_sku': var['vendor_sku']
+        }
+        for item, var, _ in pending
+    ], workers=args.workers)
+    
+    # Find matches for items needing images
+    matches = []
+    unmatched_items = []  # Track unmatched items
+    
+    for (item, var, needs_primary), result in zip(pending, results):
+        if not result['vendor_dir']:
+            continue
+        
+        if result['image_file']:
+            match_data = {
+                'item_name': item['name'],
+                'item_id': item['id'],
+                'item_version': item['version'],
+                'variation_name': var['name'],
+                'variation_id': var['id'],
+                'variation_version': var['version'],
+                'variation_image_ids': var['image_ids'],
+                'vendor': var['vendor_name'],
+                'image_file': result['image_file'],
+                'image_path': result['image_path'],
+                'match_ratio': result['match_ratio'],
+                'needs_primary': needs_primary
+            }
+            matches.append(match_data)
+            logger.info(f"Found match for {item['name']} - {var['name']}: {result['image_file']} ({result['match_ratio']}%)")
+            if needs_primary:
+                logger.info("This will also be set as the primary image")
+        else:
+            unmatched_items.append({
+                'item_name': item['name'],
+                'variation_name': var['name'],
+                'vendor': var['vendor_name'],
+                'vendor_sku': var['vendor_sku']
+            })
+    
     # Process any matches found
     if matches:
-        successful_uploads, failed_uploads = matcher.process_matches(matches)
+        successful_uploads, failed_uploads = matcher.process_matches(matches, workers=args.upload_workers)
         logger.info("\n=== Final Summary ===")
         logger.info(f"Total matches found: {len(matches)}")
         logger.info(f"Successful uploads: {successful_uploads}")
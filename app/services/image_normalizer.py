@@ -0,0 +1,130 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from PIL import Image
+from app.utils.logger import setup_logger
+
+logger = setup_logger('image_normalizer')
+
+# Leave a core for the crawl's event loop and download threads
+NORMALIZE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Images waiting for or in conversion before submit() blocks the caller
+NORMALIZE_QUEUE_SIZE = 32
+
+
+def normalize_image_bytes(data: bytes) -> Tuple[bytes, bool, float]:
+    """Convert image bytes to an opaque PNG; returns (png_bytes, reencoded, seconds).
+
+    Transparent images are flattened onto white. Images that are already
+    PNGs without an alpha channel are returned untouched instead of being
+    decoded and optimized again.
+    """
+    start_time = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    if image.format == 'PNG' and image.mode not in ('RGBA', 'LA'):
+        return data, False, time.perf_counter() - start_time
+
+    # Convert to RGB if needed (in case of RGBA)
+    if image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        image = background
+
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue(), True, time.perf_counter() - start_time
+
+
+class ImageNormalizer:
+    """Converts downloaded images to PNG in a process pool, off the crawl threads.
+
+    submit() queues the raw bytes and returns at once; when a conversion
+    finishes, its on_done callback receives the PNG bytes (e.g. to save
+    them through the image store), or on_failed the error if the
+    conversion or on_done failed. At most `max_pending` images are queued
+    or converting, so a fast crawl waits for the pool instead of holding
+    every image in memory. wait() blocks until the queue is empty; close()
+    also shuts the pool down and logs the encode times.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = NORMALIZE_QUEUE_SIZE):
+        # spawn: the crawl runs threads, which a forked worker must not inherit
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers or NORMALIZE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        # Notified whenever a queued image has been handed to its callbacks
+        self.idle = threading.Condition(self.lock)
+        self.pending = 0
+        self.stats = {'images': 0, 'reencoded': 0, 'kept': 0, 'failed': 0, 'encode_seconds': 0.0}
+
+    def submit(self, data: bytes, on_done: Callable[[bytes], None], label: str = '',
+               on_failed: Optional[Callable[[Exception], None]] = None) -> Future:
+        """Queue image bytes for conversion; blocks while the queue is full"""
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(normalize_image_bytes, data)
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.pending += 1
+        future.add_done_callback(lambda done: self._finish(done, on_done, label, on_failed))
+        return future
+
+    def _finish(self, future: Future, on_done: Callable[[bytes], None], label: str,
+                on_failed: Optional[Callable[[Exception], None]]) -> None:
+        try:
+            png_bytes, reencoded, seconds = future.result()
+            on_done(png_bytes)
+            with self.lock:
+                self.stats['images'] += 1
+                self.stats['reencoded' if reencoded else 'kept'] += 1
+                self.stats['encode_seconds'] += seconds
+            logger.info(f"Normalized {label}: {'re-encoded' if reencoded else 'already PNG'} "
+                        f"in {seconds * 1000:.0f} ms")
+        except Exception as e:
+            with self.lock:
+                self.stats['failed'] += 1
+            logger.error(f"Error normalizing image {label}: {str(e)}")
+            if on_failed:
+                try:
+                    on_failed(e)
+                except Exception as callback_error:
+                    logger.error(f"Error handling failed image {label}: {str(callback_error)}")
+        finally:
+            self.slots.release()
+            with self.lock:
+                self.pending -= 1
+                self.idle.notify_all()
+
+    def wait(self) -> None:
+        """Block until every queued image has been converted and handed to its callbacks"""
+        with self.lock:
+            self.idle.wait_for(lambda: self.pending == 0)
+
+    def close(self) -> Dict:
+        """Wait for queued images, shut the pool down and log a summary"""
+        # Done callbacks run on the executor's management thread, which shutdown joins
+        self.executor.shutdown(wait=True)
+
+        images = self.stats['images']
+        if images or self.stats['failed']:
+            average_ms = self.stats['encode_seconds'] * 1000 / images if images else 0
+            logger.info(f"Normalized {images} images ({self.stats['reencoded']} re-encoded, "
+                        f"{self.stats['kept']} already PNG, {self.stats['failed']} failed), "
+                        f"{self.stats['encode_seconds']:.2f}s encoding, {average_ms:.0f} ms average")
+        return dict(self.stats)
+
+
+def normalize_inline(data: bytes) -> bytes:
+    """Convert image bytes on the calling thread (used outside a crawl)"""
+    png_bytes, reencoded, seconds = normalize_image_bytes(data)
+    logger.debug(f"Normalized image inline ({'re-encoded' if reencoded else 'already PNG'}) in {seconds * 1000:.0f} ms")
+    return png_bytes
@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from typing import Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.db.engine import get_engine
+from app.models.product import Base, ImageBlob, ImageManifestEntry
+from app.utils.logger import setup_logger
+from app.utils.paths import paths
+from app.utils.verify_paths import PathVerifier
+
+logger = setup_logger('image_store')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+# Read size when hashing existing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(filepath) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def format_bytes(size: float) -> str:
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+class ImageStore:
+    """Content-addressed store for scraped images.
+
+    Each distinct image is stored once as a blob named by its SHA-256 under
+    paths.IMAGE_STORE_DIR. The product-named files in the vendor image
+    folders are hard links to those blobs, so everything that lists or opens
+    the vendor folders (ImageMatcher, ImageCatalog) keeps working unchanged
+    while identical bytes take up space only once. The image_manifest table
+    maps each named file to its blob, vendor, product and source URL.
+
+    Saving an image whose URL is already in the manifest links the existing
+    blob instead of downloading it again. Named files are always replaced
+    via a temporary link and os.replace, never written in place, so a blob
+    is never modified through one of its links.
+    """
+
+    def __init__(self, store_dir=None, engine=None):
+        self.store_dir = store_dir or paths.IMAGE_STORE_DIR
+        self.engine = engine or get_engine()
+        self.schema_ready = False
+        self.lock = threading.Lock()
+
+    def _ensure_schema(self):
+        if not self.schema_ready:
+            Base.metadata.create_all(self.engine, tables=[ImageBlob.__table__, ImageManifestEntry.__table__])
+            self.schema_ready = True
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.store_dir, sha256[:2], sha256)
+
+    def find_by_url(self, source_url: str) -> Optional[str]:
+        """SHA-256 of the blob last saved from this URL, if it is still in the store"""
+        if not source_url:
+            return None
+        with self.lock:
+            self._ensure_schema()
+            with Session(self.engine) as session:
+                entry = (session.query(ImageManifestEntry)
+                         .filter_by(source_url=source_url)
+                         .order_by(ImageManifestEntry.updated_at.desc())
+                         .first())
+                sha256 = entry.sha256 if entry else None
+        if sha256 and os.path.exists(self.blob_path(sha256)):
+            return sha256
+        return None
+
+    def save(self, data: bytes, local_path, vendor_name: str = None,
+             product_name: str = None, source_url: str = None) -> str:
+        """Store image bytes and make local_path a link to their blob; returns the SHA-256"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp_file = f"{blob}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, blob)
+        else:
+            logger.info(f"Image content already stored, linking {os.path.basename(str(local_path))}")
+
+        self._link(blob, local_path)
+        self._record(sha256, len(data), local_path, vendor_name, product_name, source_url)
+        return sha256
+
+    def link(self, sha256: str, local_path, vendor_name: str = None,
+             product_name: str = None, source_url: str = None) -> bool:
+        """Point local_path at an existing blob (used to skip re-downloading a known URL)"""
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob):
+            return False
+        self._link(blob, local_path)
+        self._record(sha256, os.path.getsize(blob), local_path, vendor_name, product_name, source_url)
+        return True
+
+    def _link(self, blob: str, local_path) -> None:
+        """Atomically replace local_path with a hard link to blob (a copy if linking fails)"""
+        local_path = str(local_path)
+        try:
+            if os.path.samefile(blob, local_path):
+                return
+        except FileNotFoundError:
+            pass
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_file = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(blob, tmp_file)
+        except OSError:
+            # Hard links are unavailable (e.g. different filesystems), fall back to a copy
+            shutil.copyfile(blob, tmp_file)
+        os.replace(tmp_file, local_path)
+
+    def _record(self, sha256: str, size: int, local_path, vendor_name: str,
+                product_name: str, source_url: str) -> None:
+        """Upsert the blob row and the manifest entry for local_path"""
+        local_path = str(local_path)
+        with self.lock:
+            self._ensure_schema()
+            with Session(self.engine) as session:
+                if not session.query(ImageBlob.id).filter_by(sha256=sha256).first():
+                    session.add(ImageBlob(sha256=sha256, size=size))
+
+                entry = session.query(ImageManifestEntry).filter_by(local_path=local_path).first()
+                if entry is None:
+                    entry = ImageManifestEntry(local_path=local_path)
+                    session.add(entry)
+                entry.sha256 = sha256
+                entry.vendor_name = vendor_name or entry.vendor_name
+                entry.product_name = product_name or entry.product_name
+                entry.source_url = source_url or entry.source_url
+                session.commit()
+
+    def import_tree(self, root=None) -> Dict:
+        """Move an existing image tree into the store, replacing duplicate files with links.
+
+        Vendor names in the manifest default to the domain folder name.
+        Returns counts and the bytes reclaimed.
+        """
+        root = str(root or paths.IMAGES_DIR)
+        logger.info(f"\n=== Importing images under {root} into the image store ===")
+        report = {'files': 0, 'new_blobs': 0, 'duplicates': 0, 'already_linked': 0, 'bytes_reclaimed': 0}
+
+        for dirpath, _, filenames in os.walk(root):
+            vendor_name = os.path.relpath(dirpath, root).split(os.sep)[0]
+            for filename in sorted(filenames):
+                if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                try:
+                    size = os.path.getsize(filepath)
+                    sha256 = sha256_file(filepath)
+                    blob = self.blob_path(sha256)
+                    report['files'] += 1
+
+                    if not os.path.exists(blob):
+                        # First copy of these bytes becomes the blob
+                        os.makedirs(os.path.dirname(blob), exist_ok=True)
+                        try:
+                            os.link(filepath, blob)
+                        except OSError:
+                            shutil.copyfile(filepath, blob)
+                        report['new_blobs'] += 1
+                    elif os.path.samefile(blob, filepath):
+                        report['already_linked'] += 1
+                    else:
+                        self._link(blob, filepath)
+                        report['duplicates'] += 1
+                        report['bytes_reclaimed'] += size
+
+                    self._record(sha256, size, filepath, vendor_name, os.path.splitext(filename)[0], None)
+                except Exception as e:
+                    logger.error(f"Error importing {filepath}: {str(e)}")
+
+        logger.info(f"Imported {report['files']} files: {report['new_blobs']} new blobs, "
+                    f"{report['duplicates']} duplicates linked, {report['already_linked']} already linked")
+        logger.info(f"Space reclaimed: {format_bytes(report['bytes_reclaimed'])}")
+        return report
+
+    def report(self) -> Dict:
+        """Logical size of all manifest files versus the unique bytes actually stored"""
+        with self.lock:
+            self._ensure_schema()
+            with Session(self.engine) as session:
+                files = session.query(func.count(ImageManifestEntry.id)).scalar() or 0
+                blobs, stored_bytes = session.query(func.count(ImageBlob.id), func.sum(ImageBlob.size)).one()
+                logical_bytes = (session.query(func.sum(ImageBlob.size))
+                                 .join(ImageManifestEntry, ImageManifestEntry.sha256 == ImageBlob.sha256)
+                                 .scalar())
+
+        stored_bytes = stored_bytes or 0
+        logical_bytes = logical_bytes or 0
+        summary = {
+            'files': files,
+            'blobs': blobs or 0,
+            'logical_bytes': logical_bytes,
+            'stored_bytes': stored_bytes,
+            'bytes_reclaimed': logical_bytes - stored_bytes
+        }
+
+        logger.info("\n=== Image Store Report ===")
+        logger.info(f"Files in manifest: {summary['files']}")
+        logger.info(f"Unique blobs: {summary['blobs']}")
+        logger.info(f"Logical size: {format_bytes(logical_bytes)}")
+        logger.info(f"Stored size: {format_bytes(stored_bytes)}")
+        logger.info(f"Space reclaimed by deduplication: {format_bytes(summary['bytes_reclaimed'])}")
+        return summary
+
+
+# Shared instance used by the scrapers
+image_store = ImageStore()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Content-addressed image store maintenance')
+    parser.add_argument('--import-tree', action='store_true',
+                        help='Import the existing vendor image folders, linking duplicate files to shared blobs')
+    args = parser.parse_args()
+
+    # Verify paths first
+    verifier = PathVerifier()
+    if not verifier.verify_all():
+        logger.error("Path verification failed!")
+        sys.exit(1)
+
+    if args.import_tree:
+        image_store.import_tree()
+    image_store.report()
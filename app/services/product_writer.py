@@ -0,0 +1,229 @@
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.db.engine import get_engine
+from app.db.migrations import migrate
+from app.models.product import BaseProduct, VendorProduct
+from app.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from app.scrapers.base_scraper import ProductData
+
+logger = setup_logger('product_writer')
+
+# Rows written per transaction; also bounds the IN (...) lists of each flush
+WRITE_BATCH_SIZE = 500
+# VendorProduct columns a record can set; a None value keeps what is stored (unless coalesce=False)
+VENDOR_COLUMNS = (
+    'vendor_sku', 'vendor_price', 'vendor_description', 'vendor_category',
+    'vendor_image_url', 'local_image_path', 'vendor_product_url', 'vendor_video_url'
+)
+
+
+def parse_price(price) -> Optional[float]:
+    """Price text like '$1,299.99' as a float, None if there is no number in it"""
+    if price is None or isinstance(price, (int, float)):
+        return price
+    digits = re.sub(r'[^\d.]', '', str(price))
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+class ProductWriter:
+    """Buffers scraped products and writes them to the database in bulk.
+
+    add() only appends to an in-memory buffer; every `batch_size` records
+    (and on flush()/close()) the buffer is written in one transaction: the
+    base products for all names are resolved with a single IN (...) query,
+    missing names are inserted together, and the vendor products are
+    written with one INSERT ... ON CONFLICT (base_product_id, vendor_name)
+    DO UPDATE. This replaces two SELECTs and a commit per product.
+
+    Fields that are None in a record keep their stored value; with
+    coalesce=False a record replaces every column instead, None included.
+    updated_at is set on every write, so unchanged products still count as
+    recently seen for incremental crawls. Safe to call from the crawl's
+    worker threads.
+
+    Given a connection, batches are written inside its current transaction
+    and left for the caller to commit or roll back (e.g. after a batch
+    failed); otherwise each batch commits on its own.
+    """
+
+    def __init__(self, vendor_name: str = None, batch_size: int = WRITE_BATCH_SIZE, engine=None,
+                 coalesce: bool = True, connection=None):
+        self.vendor_name = vendor_name
+        self.batch_size = batch_size
+        self.connection = connection
+        self.engine = engine or (connection.engine if connection is not None else get_engine())
+        self.coalesce = coalesce
+        self.buffer: List[Dict] = []
+        self.lock = threading.Lock()
+        # Held while writing so batches from different threads commit one at a time
+        self.write_lock = threading.Lock()
+        self.schema_ready = False
+        # Called with the rows of a batch that failed to write
+        self.on_failed = None
+        self.stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'batches': 0}
+
+    def add(self, product: 'ProductData', **columns) -> None:
+        """Queue a scraped product; keyword arguments set or override VendorProduct columns"""
+        row = {
+            'vendor_sku': product.sku,
+            'vendor_price': parse_price(product.price),
+            'vendor_description': product.description,
+            'vendor_category': product.category,
+            'vendor_image_url': product.image_url,
+            'vendor_product_url': product.url
+        }
+        row.update(columns)
+        self.add_row(product.name, **row)
+
+    def add_row(self, name: str, vendor_name: str = None, **columns) -> None:
+        """Queue a product given as column values"""
+        unknown = set(columns) - set(VENDOR_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown vendor product columns: {', '.join(sorted(unknown))}")
+        vendor_name = vendor_name or self.vendor_name
+        if not name or not vendor_name:
+            raise ValueError("Products need a name and a vendor name")
+
+        row = {column: columns.get(column) for column in VENDOR_COLUMNS}
+        row.update(name=name, vendor_name=vendor_name)
+        with self.lock:
+            self.buffer.append(row)
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> Dict:
+        """Write everything buffered so far; returns the counts for this flush"""
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        if not rows:
+            return counts
+
+        with self.write_lock:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                try:
+                    for key, value in self._write_batch(batch).items():
+                        counts[key] += value
+                except Exception as e:
+                    counts['failed'] += len(batch)
+                    logger.error(f"Error writing batch of {len(batch)} products: {str(e)}")
+                    if self.on_failed:
+                        self.on_failed(batch)
+                self.stats['batches'] += 1
+            for key, value in counts.items():
+                self.stats[key] += value
+
+        logger.info(f"Wrote {len(rows)} products: {counts['inserted']} new, {counts['updated']} updated, "
+                    f"{counts['unchanged']} unchanged, {counts['failed']} failed")
+        return counts
+
+    def close(self) -> Dict:
+        """Flush the buffer and return the totals for this writer"""
+        self.flush()
+        return dict(self.stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _ensure_schema(self) -> None:
+        """Apply pending migrations, which add the unique index ON CONFLICT relies on"""
+        if not self.schema_ready:
+            migrate(self.engine)
+            self.schema_ready = True
+
+    @contextmanager
+    def _transaction(self):
+        """The caller's connection, or a new transaction that commits on success"""
+        if self.connection is not None:
+            yield self.connection
+            return
+        with self.engine.begin() as conn:
+            yield conn
+
+    def _write_batch(self, rows: List[Dict]) -> Dict:
+        """Upsert one batch in a single transaction"""
+        # Later records for the same product win, field by field (whole records without coalescing)
+        merged: Dict = {}
+        for row in rows:
+            key = (row['name'], row['vendor_name'])
+            if key in merged and self.coalesce:
+                merged[key].update({k: v for k, v in row.items() if v is not None})
+            else:
+                merged[key] = dict(row)
+
+        base_table = BaseProduct.__table__
+        vendor_table = VendorProduct.__table__
+        names = list({name for name, _ in merged})
+        now = datetime.utcnow()
+
+        self._ensure_schema()
+        with self._transaction() as conn:
+            # Resolve every name at once; duplicate names resolve to their first row
+            name_query = (select(base_table.c.name, func.min(base_table.c.id))
+                          .where(base_table.c.name.in_(names))
+                          .group_by(base_table.c.name))
+            base_ids = dict(conn.execute(name_query).all())
+            missing = [name for name in names if name not in base_ids]
+            if missing:
+                conn.execute(base_table.insert(), [{'name': name, 'created_at': now, 'updated_at': now}
+                                                   for name in missing])
+                base_ids.update(conn.execute(name_query.where(base_table.c.name.in_(missing))).all())
+
+            # Current values, to report what actually changed
+            existing = {
+                (row.base_product_id, row.vendor_name): row
+                for row in conn.execute(
+                    select(vendor_table.c.base_product_id, vendor_table.c.vendor_name,
+                           *[vendor_table.c[column] for column in VENDOR_COLUMNS])
+                    .where(vendor_table.c.base_product_id.in_(list(base_ids.values())))
+                )
+            }
+
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            values = []
+            for (name, vendor_name), row in merged.items():
+                base_product_id = base_ids[name]
+                current = existing.get((base_product_id, vendor_name))
+                if current is None:
+                    counts['inserted'] += 1
+                elif any((row[column] is not None or not self.coalesce)
+                         and row[column] != current._mapping[column]
+                         for column in VENDOR_COLUMNS):
+                    counts['updated'] += 1
+                else:
+                    counts['unchanged'] += 1
+                values.append({
+                    'base_product_id': base_product_id,
+                    'vendor_name': vendor_name,
+                    'created_at': now,
+                    'updated_at': now,
+                    **{column: row[column] for column in VENDOR_COLUMNS}
+                })
+
+            upsert = sqlite_insert(vendor_table)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[vendor_table.c.base_product_id, vendor_table.c.vendor_name],
+                set_={
+                    **{column: (func.coalesce(upsert.excluded[column], vendor_table.c[column])
+                                if self.coalesce else upsert.excluded[column])
+                       for column in VENDOR_COLUMNS},
+                    'updated_at': upsert.excluded.updated_at
+                }
+            )
+            conn.execute(upsert, values)
+        return counts
@@ -3,19 +3,28 @@ import yaml
 import logging
 import sys
 import time
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.models.product import Base, BaseProduct, VendorProduct
+from app.db.engine import get_engine
+from app.db.migrations import migrate
+from app.models.product import Base
 import importlib
-import requests
+import multiprocessing
+import argparse
 import asyncio
 import aiohttp
 from aiohttp import ClientSession
-from cachetools import TTLCache
-from ratelimit import limits, sleep_and_retry
+from concurrent.futures import ProcessPoolExecutor, as_completed
+try:
+    import resource  # POSIX only; used for per-worker memory limits
+except ImportError:
+    resource = None
 from app.utils.paths import paths
 from app.utils.verify_paths import PathVerifier
 from app.utils.logger import setup_logger
+from app.utils.transport import transport
+from app.scrapers.base_scraper import ScraperStats
+from app.services.image_store import image_store
+from app.services.product_writer import ProductWriter, parse_price
 
 logger = setup_logger('scrape_fireworks')
 
@@ -31,20 +40,14 @@ headers = {
 }
 
 # Database setup
-engine = create_engine(f'sqlite:///{paths.DB_FILE}')  # Use path from paths.py
+engine = get_engine()  # Shared engine for paths.DB_FILE
 Base.metadata.create_all(engine)
 Session = sessionmaker(bind=engine)
 
-# Cache responses for 1 hour
-page_cache = TTLCache(maxsize=100, ttl=3600)
-
 def get_cached_page(url, headers):
-    if url in page_cache:
-        return page_cache[url]
-        
-    response = requests.get(url, headers=headers, verify=False)
-    page_cache[url] = response.text
-    return response.text
+    """Fetch a page through the persistent conditional-GET cache"""
+    text, _ = transport.get_page(url, headers=headers)
+    return text
 
 def load_websites():
     """Load website configurations"""
@@ -55,8 +58,7 @@ async def download_image(session, url, filepath, headers):
         async with session.get(url, headers=headers) as response:
             if response.status == 200:
                 content = await response.read()
-                with open(filepath, 'wb') as f:
-                    f.write(content)
+                await asyncio.to_thread(image_store.save, content, filepath, source_url=url)
                 return True
     except Exception as e:
         logger.error(f"Error downloading {url}: {str(e)}")
@@ -73,51 +75,32 @@ async def process_product_batch(products, session, domain_dir, headers):
     return await asyncio.gather(*tasks)
 
 def process_product_batch_db(products, db_session):
-    """Process multiple products in a single database transaction using new model structure"""
+    """Process multiple products in a single database transaction using new model structure
+    
+    Each dict needs 'name' and 'vendor_name'; the other VendorProduct
+    fields use the keys the scrapers produce ('description', 'image_url',
+    'product_url', ...) and replace the stored values, missing keys
+    clearing them. The rows are written in bulk on db_session's
+    connection, then committed (or rolled back on failure).
+    """
     try:
+        writer = ProductWriter(connection=db_session.connection(), coalesce=False)
         for product_data in products:
-            # Find or create BaseProduct
-            base_product = db_session.query(BaseProduct).filter_by(
-                name=product_data['name']
-            ).first()
-            
-            if not base_product:
-                base_product = BaseProduct(name=product_data['name'])
-                db_session.add(base_product)
-                db_session.flush()  # Get the ID
-            
-            # Find or create/update VendorProduct
-            vendor_product = db_session.query(VendorProduct).filter_by(
-                base_product_id=base_product.id,
-                vendor_name=product_data['vendor_name']
-            ).first()
-            
-            if vendor_product:
-                # Update existing vendor product
-                vendor_product.vendor_sku = product_data.get('vendor_sku')
-                vendor_product.vendor_price = product_data.get('vendor_price')
-                vendor_product.vendor_description = product_data.get('description')
-                vendor_product.vendor_category = product_data.get('category')
-                vendor_product.vendor_image_url = product_data.get('image_url')
-                vendor_product.local_image_path = product_data.get('local_image_path')
-                vendor_product.vendor_product_url = product_data.get('product_url')
-                vendor_product.vendor_video_url = product_data.get('video_url')
-            else:
-                # Create new vendor product
-                vendor_product = VendorProduct(
-                    base_product_id=base_product.id,
-                    vendor_name=product_data['vendor_name'],
-                    vendor_sku=product_data.get('vendor_sku'),
-                    vendor_price=product_data.get('vendor_price'),
-                    vendor_description=product_data.get('description'),
-                    vendor_category=product_data.get('category'),
-                    vendor_image_url=product_data.get('image_url'),
-                    local_image_path=product_data.get('local_image_path'),
-                    vendor_product_url=product_data.get('product_url'),
-                    vendor_video_url=product_data.get('video_url')
-                )
-                db_session.add(vendor_product)
-        
+            writer.add_row(
+                product_data['name'],
+                vendor_name=product_data['vendor_name'],
+                vendor_sku=product_data.get('vendor_sku'),
+                vendor_price=parse_price(product_data.get('vendor_price')),
+                vendor_description=product_data.get('description'),
+                vendor_category=product_data.get('category'),
+                vendor_image_url=product_data.get('image_url'),
+                local_image_path=product_data.get('local_image_path'),
+                vendor_product_url=product_data.get('product_url'),
+                vendor_video_url=product_data.get('video_url')
+            )
+        if writer.close()['failed']:
+            db_session.rollback()
+            return False
         db_session.commit()
         return True
     except Exception as e:
@@ -125,9 +108,89 @@ def process_product_batch_db(products, db_session):
         logger.error(f"Error processing batch: {str(e)}")
         return False
 
-def run_scrapers():
-    """Run scrapers based on websites.yaml configuration"""
+def load_scraper_class(scraper_name):
+    """Import a scraper module and return its class (e.g. redrhino_scraper -> RedrhinoFireworksScraper)"""
+    module_name = f"app.scrapers.{scraper_name}"
+    
+    # Convert scraper name to class name
+    class_name = ''.join(
+        word.capitalize() 
+        for word in scraper_name.replace('_scraper', '').split('_')
+    ) + 'FireworksScraper'
+    
+    logger.info(f"Scraper name from config: {scraper_name}")
+    logger.info(f"Generated class name: {class_name}")
+    
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(f"Could not import scraper module {module_name}: {str(e)}") from e
+    
+    logger.debug(f"Available attributes in module: {dir(module)}")
+    logger.info(f"Attempting to load {class_name} from {module_name}")
+    try:
+        return getattr(module, class_name)
+    except AttributeError as e:
+        raise AttributeError(f"Could not find scraper class {class_name} in {module_name}") from e
+
+def set_memory_limit(memory_limit_mb):
+    """Cap this process's address space; allocations past it raise MemoryError"""
+    if resource is None:
+        logger.warning("Memory limits are not supported on this platform, running without one")
+        return
+    limit = int(memory_limit_mb) * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def run_scraper(website, full_refresh=False, memory_limit_mb=None, resume=False):
+    """Run one website's scraper and return its ScraperStats (None if it could not start).
+    
+    Module-level so it can be the target of a worker process.
+    """
+    site_name = website.get('name')
+    scraper = None
+    start_time = time.time()
+    try:
+        if memory_limit_mb:
+            set_memory_limit(memory_limit_mb)
+        scraper_class = load_scraper_class(website.get('scraper'))
+        
+        # Initialize and run the scraper
+        logger.info(f"Starting scrape for {site_name}...")
+        scraper = scraper_class()
+        scraper.run(full_refresh=full_refresh, resume=resume)
+        logger.info(f"Completed scrape for {site_name} in {time.time() - start_time:.1f}s")
+    except MemoryError:
+        logger.error(f"Scraper for {site_name} exceeded its memory limit of {memory_limit_mb} MB")
+        if scraper:
+            scraper.stats.errors += 1
+    except (ImportError, AttributeError) as e:
+        logger.error(f"Could not load scraper for {site_name}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error running scraper for {site_name}: {str(e)}")
+        if scraper:
+            scraper.stats.errors += 1
+    finally:
+        # Close pooled connections; in a worker process nothing else will
+        transport.close()
+    return scraper.stats if scraper else None
+
+def run_scrapers(full_refresh=False, max_parallel=1, memory_limit_mb=None, resume=False):
+    """Run scrapers based on websites.yaml configuration
+    
+    With max_parallel > 1 each website's scraper runs in its own worker
+    process, up to max_parallel at a time; the vendors are different hosts,
+    so per-host politeness is unaffected. memory_limit_mb caps each
+    worker's address space. Every scraper still prints its own summary and
+    the overall summary covers all of them; a vendor whose scraper could not
+    start counts as one error. With resume=True scrapers
+    continue interrupted crawls from their checkpoints.
+    """
     all_stats = []
+    failed = []  # Vendors whose scraper could not start or whose worker died
+    start_time = time.time()
     
     # Load website configurations
     with open(paths.WEBSITES_CONFIG, 'r') as f:
@@ -140,11 +203,16 @@ def run_scrapers():
         return
         
     logger.info(f"Found {len(websites)} websites in configuration")
+    
+    # Bring an older database up to date (indexes, unique keys) before writing to it
+    applied = migrate(engine)
+    if applied:
+        logger.info(f"Applied database migrations: {applied}")
     logger.info("Website order from config:")
     for idx, website in enumerate(websites, 1):
         logger.info(f"{idx}. {website.get('name')} ({website.get('scraper')})")
     
-    # Process each website in order
+    selected = []
     for website in websites:
         site_name = website.get('name')
         scraper_name = website.get('scraper')
@@ -156,43 +224,38 @@ def run_scrapers():
         if not website.get('enabled', True):  # Default to enabled if not specified
             logger.info(f"Skipping disabled scraper for {site_name}")
             continue
-            
-        try:
-            # Import the scraper class dynamically
-            module_name = f"app.scrapers.{scraper_name}"
-            
-            # Convert scraper name to class name
-            class_name = ''.join(
-                word.capitalize() 
-                for word in scraper_name.replace('_scraper', '').split('_')
-            ) + 'FireworksScraper'
-            
-            logger.info(f"Scraper name from config: {scraper_name}")
-            logger.info(f"Generated class name: {class_name}")
-            
-            # Import the module first
-            module = importlib.import_module(module_name)
-            
-            # Now we can log module attributes
-            logger.info(f"Available attributes in module: {dir(module)}")
-            logger.info(f"Attempting to load {class_name} from {module_name}")
-            
-            # Get the class
-            scraper_class = getattr(module, class_name)
-            
-            # Initialize and run the scraper
-            logger.info(f"Starting scrape for {site_name}...")
-            scraper = scraper_class()
-            scraper.run()
-            all_stats.append(scraper.stats)
-            logger.info(f"Completed scrape for {site_name}")
-            
-        except ImportError as e:
-            logger.error(f"Could not import scraper module for {site_name} ({module_name}): {str(e)}")
-        except AttributeError as e:
-            logger.error(f"Could not find scraper class {class_name} for {site_name}: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error running scraper for {site_name}: {str(e)}")
+        selected.append(website)
+    
+    if max_parallel > 1 and len(selected) > 1:
+        workers = min(max_parallel, len(selected))
+        logger.info(f"Running {len(selected)} scrapers in up to {workers} worker processes")
+        # spawn: each worker is a fresh interpreter, and each vendor is a single task
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {
+                executor.submit(run_scraper, website, full_refresh, memory_limit_mb, resume): website['name']
+                for website in selected
+            }
+            for future in as_completed(futures):
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    # e.g. the worker was killed by the OS for running out of memory
+                    logger.error(f"Worker for {futures[future]} failed: {str(e)}")
+                    stats = None
+                if not stats:
+                    failed.append(futures[future])
+                    stats = ScraperStats(vendor_name=futures[future], errors=1)
+                all_stats.append(stats)
+    else:
+        if memory_limit_mb:
+            logger.warning("Memory limits only apply to worker processes (max_parallel > 1), ignoring")
+        # Process each website in order
+        for website in selected:
+            stats = run_scraper(website, full_refresh, memory_limit_mb=None, resume=resume)
+            if not stats:
+                failed.append(website['name'])
+                stats = ScraperStats(vendor_name=website['name'], errors=1)
+            all_stats.append(stats)
             
     # Print overall summary
     logger.info("\n" + "="*50)
@@ -205,22 +268,36 @@ def run_scrapers():
     total_existing = sum(stat.images_existing for stat in all_stats)
     total_errors = sum(stat.errors for stat in all_stats)
     
+    logger.info(f"Scrapers Completed: {len(selected) - len(failed)} of {len(selected)}")
+    if failed:
+        logger.info(f"Scrapers Failed: {', '.join(failed)}")
     logger.info(f"Total Pages Processed: {total_pages}")
     logger.info(f"Total Products Found: {total_products}")
     logger.info(f"\nTotal Images:")
     logger.info(f"  • Downloaded: {total_downloads}")
     logger.info(f"  • Already Existed: {total_existing}")
     logger.info(f"  • Total: {total_downloads + total_existing}")
+    logger.info(f"\nDatabase Records:")
+    logger.info(f"  • New: {sum(stat.db_inserts for stat in all_stats)}")
+    logger.info(f"  • Updated: {sum(stat.db_updates for stat in all_stats)}")
     if total_errors > 0:
         logger.info(f"\nTotal Errors: {total_errors}")
+    logger.info(f"\nTotal Time: {time.time() - start_time:.1f}s")
     logger.info("="*50)
-
-@sleep_and_retry
-@limits(calls=30, period=60)  # 30 calls per minute
-def rate_limited_request(url, headers):
-    return requests.get(url, headers=headers, verify=False)
+    return all_stats
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scrape product images from vendor websites')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='Fetch every product page, ignoring each vendor\'s freshness_days window')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue interrupted crawls from their last checkpoint instead of page 1')
+    parser.add_argument('--max-parallel', type=int, default=1,
+                        help='Run up to this many vendor scrapers at once, each in its own process')
+    parser.add_argument('--memory-limit', type=int, metavar='MB',
+                        help='Address space limit per scraper worker process (with --max-parallel)')
+    args = parser.parse_args()
+    
     # Verify paths first
     verifier = PathVerifier()
     if not verifier.verify_all():
@@ -229,6 +306,7 @@ if __name__ == "__main__":
     
     logger.info("Starting scraper...")
     try:
-        run_scrapers()
+        run_scrapers(full_refresh=args.full_refresh, max_parallel=args.max_parallel,
+                     memory_limit_mb=args.memory_limit, resume=args.resume)
     except Exception as e:
         logger.error("Fatal error in main execution", exc_info=True)
\ No newline at end of file
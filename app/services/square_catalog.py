@@ -3,10 +3,14 @@ from fastapi import HTTPException
 from typing import List, Optional
 from pprint import pformat
 from app.core.config import settings
-from app.utils.logger import setup_logger
+from app.utils.logger import lazy, setup_logger
+from app.utils.metrics import track_square_call
 from app.utils.paths import paths
 from app.utils.verify_paths import PathVerifier
+from app.services.square_catalog_sync import SquareCatalogSync
+from app.services.vendor_map import vendor_map_cache
 import sys
+import argparse
 
 logger = setup_logger('square_catalog')
 
@@ -16,53 +20,20 @@ class SquareCatalog:
             access_token=settings.SQUARE_ACCESS_TOKEN,
             environment=settings.SQUARE_ENVIRONMENT
         )
-        # Get vendor mapping on initialization
-        self.vendor_map = self.get_vendors()
+        
+    @property
+    def vendor_map(self):
+        """Vendor id -> name, from the shared persisted map (refreshed in the background)"""
+        return vendor_map_cache.get(self.client)
         
     def get_vendors(self):
-        """Fetch all vendors using the Vendors API"""
-        try:
-            logger.info("\n=== Fetching Vendors Using Vendors API ===")
-            vendor_map = {}
-            
-            body = {
-                "filter": {
-                    "status": ["ACTIVE"]
-                },
-                "sort": {
-                    "field": "NAME",
-                    "order": "ASC"
-                }
-            }
-            
-            result = self.client.vendors.search_vendors(
-                body=body
-            )
-            
-            if result.is_success():
-                vendors = result.body.get('vendors', [])
-                logger.info(f"Found {len(vendors)} vendors")
-                
-                for vendor in vendors:
-                    vendor_id = vendor.get('id')
-                    vendor_name = vendor.get('name')
-                    if vendor_id and vendor_name:
-                        vendor_map[vendor_id] = vendor_name
-                        logger.info(f"Mapped vendor: {vendor_id} -> {vendor_name}")
-                
-                return vendor_map
-            else:
-                logger.error("Failed to fetch vendors:")
-                logger.error(pformat(result.errors))
-                return {}
-                
-        except Exception as e:
-            logger.error(f"Error fetching vendors: {str(e)}")
-            return {}
+        """Fetch all vendors using the Vendors API, updating the shared vendor map"""
+        return vendor_map_cache.refresh(self.client) or {}
         
     def verify_item_needs_images(self, item_id):
         """Verify if an item needs images by checking directly with the API"""
-        result = self.client.catalog.retrieve_catalog_object(
+        result = track_square_call(
+            'retrieve_catalog_object', self.client.catalog.retrieve_catalog_object,
             object_id=item_id
         )
         if not result.is_success():
@@ -82,7 +53,8 @@ class SquareCatalog:
             return needs_primary, []
             
         # Batch request for all variations
-        batch_result = self.client.catalog.batch_retrieve_catalog_objects(
+        batch_result = track_square_call(
+            'batch_retrieve_catalog_objects', self.client.catalog.batch_retrieve_catalog_objects,
             body={
                 "object_ids": variation_ids
             }
@@ -132,7 +104,7 @@ class SquareCatalog:
                 if cursor:
                     body["cursor"] = cursor
                 
-                result = self.client.catalog.search_catalog_items(body=body)
+                result = track_square_call('search_catalog_items', self.client.catalog.search_catalog_items, body=body)
                 
                 if not result.is_success():
                     logger.error(f"Error fetching catalog: {result.errors}")
@@ -140,7 +112,7 @@ class SquareCatalog:
                     
                 # Log the raw response for debugging
                 logger.debug("\nSquare Search Response:")
-                logger.debug(pformat(result.body))
+                logger.debug("%s", lazy(pformat, result.body))
                     
                 batch_items = result.body.get('items', [])
                 related_objects = result.body.get('related_objects', [])
@@ -160,18 +132,18 @@ class SquareCatalog:
                     obj_type = obj.get('type')
                     if obj_type == 'ITEM_VARIATION':
                         variations_lookup[obj['id']] = obj
-                        logger.debug(f"\nVariation object:\n{pformat(obj)}")
+                        logger.debug("\nVariation object:\n%s", lazy(pformat, obj))
                     elif obj_type == 'CATEGORY':
                         category_lookup[obj['id']] = obj
-                        logger.debug(f"\nCategory object:\n{pformat(obj)}")
+                        logger.debug("\nCategory object:\n%s", lazy(pformat, obj))
                     elif obj_type == 'ITEM_VARIATION_VENDOR_INFO_ASSOCIATION':
                         vendor_infos_lookup[obj['id']] = obj
-                        logger.debug(f"\nVendor info object:\n{pformat(obj)}")
+                        logger.debug("\nVendor info object:\n%s", lazy(pformat, obj))
                 
                 # First, collect all items and variations that might need images
                 items_to_check = []
                 for item in batch_items:
-                    logger.debug(f"\nProcessing item:\n{pformat(item)}")
+                    logger.debug("\nProcessing item:\n%s", lazy(pformat, item))
                     item_data = item.get('item_data', {})
                     variations = item_data.get('variations', [])
                     
@@ -193,7 +165,8 @@ class SquareCatalog:
                             items_to_check.append(item.get('id'))
                 
                 if items_to_check:
-                    batch_result = self.client.catalog.batch_retrieve_catalog_objects(
+                    batch_result = track_square_call(
+                        'batch_retrieve_catalog_objects', self.client.catalog.batch_retrieve_catalog_objects,
                         body={
                             "object_ids": items_to_check,
                             "include_related_objects": True,
@@ -204,7 +177,7 @@ class SquareCatalog:
                     if batch_result.is_success():
                         # Log the raw batch response for debugging
                         logger.debug("\nSquare Batch Retrieve Response:")
-                        logger.debug(pformat(batch_result.body))
+                        logger.debug("%s", lazy(pformat, batch_result.body))
                         
                         objects = batch_result.body.get('objects', [])
                         related = batch_result.body.get('related_objects', [])
@@ -214,17 +187,17 @@ class SquareCatalog:
                             obj_type = obj.get('type')
                             if obj_type == 'ITEM_VARIATION':
                                 variations_lookup[obj['id']] = obj
-                                logger.debug(f"\nAdditional variation object:\n{pformat(obj)}")
+                                logger.debug("\nAdditional variation object:\n%s", lazy(pformat, obj))
                             elif obj_type == 'CATEGORY':
                                 category_lookup[obj['id']] = obj
-                                logger.debug(f"\nAdditional category object:\n{pformat(obj)}")
+                                logger.debug("\nAdditional category object:\n%s", lazy(pformat, obj))
                             elif obj_type == 'ITEM_VARIATION_VENDOR_INFO_ASSOCIATION':
                                 vendor_infos_lookup[obj['id']] = obj
-                                logger.debug(f"\nAdditional vendor info object:\n{pformat(obj)}")
+                                logger.debug("\nAdditional vendor info object:\n%s", lazy(pformat, obj))
                         
                         # Process each item
                         for obj in objects:
-                            logger.debug(f"\nProcessing batch item:\n{pformat(obj)}")
+                            logger.debug("\nProcessing batch item:\n%s", lazy(pformat, obj))
                             item_data = obj.get('item_data', {})
                             variations = item_data.get('variations', [])
                             is_single_variation = len(variations) <= 1
@@ -250,7 +223,7 @@ class SquareCatalog:
                                 if vendor_id in self.vendor_map:
                                     item_vendor_id = vendor_id
                                     item_vendor_sku = vendor_info.get('sku', '')
-                                    logger.debug(f"\nFound item-level vendor info:\n{pformat(vendor_info)}")
+                                    logger.debug("\nFound item-level vendor info:\n%s", lazy(pformat, vendor_info))
                                     break
                             
                             for var_ref in variations:
@@ -263,15 +236,15 @@ class SquareCatalog:
                                 # If variation not found in lookup, fetch it directly
                                 if not var:
                                     logger.debug(f"Variation {var_id} not in lookup, fetching directly...")
-                                    var_result = self.client.catalog.retrieve_catalog_object(object_id=var_id)
+                                    var_result = track_square_call('retrieve_catalog_object', self.client.catalog.retrieve_catalog_object, object_id=var_id)
                                     if var_result.is_success():
                                         var = var_result.body.get('object', {})
-                                        logger.debug(f"Retrieved variation directly: {pformat(var)}")
+                                        logger.debug("Retrieved variation directly: %s", lazy(pformat, var))
                                     else:
                                         logger.error(f"Failed to retrieve variation {var_id}: {var_result.errors}")
                                         continue
                                 
-                                logger.debug(f"\nProcessing variation:\n{pformat(var)}")
+                                logger.debug("\nProcessing variation:\n%s", lazy(pformat, var))
                                 var_data = var.get('item_variation_data', {})
                                 
                                 # Get Square SKU directly from variation data
@@ -289,10 +262,10 @@ class SquareCatalog:
                                 
                                 if vendor_infos:
                                     vendor_info = vendor_infos[0]
-                                    logger.debug(f"Processing vendor info: {pformat(vendor_info)}")
+                                    logger.debug("Processing vendor info: %s", lazy(pformat, vendor_info))
                                     if vendor_info:
                                         vendor_info_data = vendor_info.get('item_variation_vendor_info_data', {})
-                                        logger.debug(f"Vendor info data: {pformat(vendor_info_data)}")
+                                        logger.debug("Vendor info data: %s", lazy(pformat, vendor_info_data))
                                         if vendor_info_data:
                                             vendor_id = vendor_info_data.get('vendor_id')
                                             vendor_sku = vendor_info_data.get('sku', '')
@@ -546,6 +519,8 @@ class SquareCatalog:
                 
                 variation_info = {
                     'id': variation.get('id'),
+                    'version': variation.get('version'),
+                    'image_ids': var_data.get('image_ids', []),
                     'name': var_data.get('name', ''),
                     'square_sku': square_sku,
                     'vendor_sku': vendor_sku,
@@ -573,8 +548,10 @@ class SquareCatalog:
             
             item_info = {
                 'id': item_id,
+                'version': item.get('version'),
                 'name': name,
                 'description': description,
+                'image_ids': item_data.get('image_ids', []),
                 'has_primary_image': has_primary_image,
                 'needs_primary_image': needs_primary_image,
                 'variations': variations,
@@ -587,6 +564,11 @@ class SquareCatalog:
         return items
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Report Square catalog items that need images')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='Re-sync the whole Square catalog instead of only changes since the last sync')
+    args = parser.parse_args()
+    
     # Verify paths first
     verifier = PathVerifier()
     if not verifier.verify_all():
@@ -596,41 +578,10 @@ if __name__ == "__main__":
     # Initialize Square Catalog
     catalog = SquareCatalog()
     
-    all_items = []
-    cursor = None
-    batch_size = 100
-    
-    logger.info("Fetching all items from Square...")
-    
-    while True:
-        # Get batch of items
-        body = {
-            "product_types": ["REGULAR"],
-            "state_filters": {"states": ["ACTIVE"]},
-            "limit": batch_size
-        }
-        
-        if cursor:
-            body["cursor"] = cursor
-        
-        result = catalog.client.catalog.search_catalog_items(body=body)
-        
-        if not result.is_success():
-            logger.error("Failed to fetch items from Square API")
-            logger.error(pformat(result.errors))
-            break
-        
-        # Process this batch
-        batch_items = catalog.process_catalog_items(result.body)
-        all_items.extend(batch_items)
-        
-        # Get cursor for next batch
-        cursor = result.body.get('cursor')
-        logger.info(f"Fetched batch of {len(batch_items)} items. Total so far: {len(all_items)}")
-        
-        # If no cursor, we've got all items
-        if not cursor:
-            break
+    # Bring the local catalog mirror up to date and read the items from it
+    catalog_sync = SquareCatalogSync(catalog)
+    catalog_sync.sync(full=args.full_sync)
+    all_items = catalog_sync.get_items()
     
     logger.info(f"\nFetched {len(all_items)} total items")
     
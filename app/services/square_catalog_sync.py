@@ -0,0 +1,257 @@
+import json
+import time
+from datetime import datetime
+from sqlalchemy import or_
+from sqlalchemy.orm import sessionmaker
+from app.db.engine import get_engine
+from app.db.migrations import migrate
+from app.models.product import SquareProduct, SquareVariation, SquareCategory, SquareSyncState
+from app.utils.logger import setup_logger
+from app.utils.metrics import track_square_call
+from app.utils.paths import paths
+
+logger = setup_logger('square_catalog_sync')
+
+# Catalog object types mirrored locally
+SYNC_OBJECT_TYPES = ['ITEM', 'ITEM_VARIATION', 'CATEGORY']
+# Objects per search_catalog_objects page (Square's maximum)
+SYNC_PAGE_SIZE = 1000
+# Row name in square_sync_state
+SYNC_STATE_NAME = 'catalog'
+
+
+class SquareCatalogSync:
+    """Incremental mirror of the Square catalog in the local database.
+
+    sync() pages through search_catalog_objects for items, variations and
+    categories updated since the last completed sync (all of them on the
+    first run or with full=True) and upserts them into square_products,
+    square_variations and square_categories. The begin_time for the next
+    run is kept in square_sync_state.
+
+    get_items() then rebuilds the active catalog from the mirror in the
+    same shape as SquareCatalog.process_catalog_items, so matching and
+    reporting no longer re-paginate Square.
+    """
+
+    def __init__(self, catalog, engine=None):
+        self.catalog = catalog
+        self.client = catalog.client
+        self.engine = engine or get_engine()
+        self._ensure_schema()
+        self.Session = sessionmaker(bind=self.engine)
+
+    def _ensure_schema(self):
+        """Create the mirror tables and apply pending migrations (e.g. columns missing from an older square_products table)"""
+        migrate(self.engine)
+
+    def sync(self, full=False):
+        """Bring the local mirror up to date; returns counts of synced objects"""
+        session = self.Session()
+        start_time = time.time()
+        try:
+            state = session.query(SquareSyncState).filter_by(name=SYNC_STATE_NAME).first()
+            begin_time = None if full or state is None else state.last_synced_at
+
+            if begin_time:
+                logger.info(f"\n=== Syncing Square catalog changes since {begin_time} ===")
+            else:
+                logger.info("\n=== Running full Square catalog sync ===")
+
+            products = {row.square_id: row for row in session.query(SquareProduct)}
+            variations = {row.square_id: row for row in session.query(SquareVariation)}
+            categories = {row.square_id: row for row in session.query(SquareCategory)}
+
+            counts = {'items': 0, 'variations': 0, 'categories': 0, 'deleted': 0}
+            seen = set()
+            latest_time = None
+            cursor = None
+
+            while True:
+                body = {
+                    "object_types": SYNC_OBJECT_TYPES,
+                    # Incremental runs need deletions; a full run rebuilds from live objects
+                    "include_deleted_objects": bool(begin_time),
+                    "limit": SYNC_PAGE_SIZE
+                }
+                if begin_time:
+                    body["begin_time"] = begin_time
+                if cursor:
+                    body["cursor"] = cursor
+
+                result = track_square_call('search_catalog_objects', self.client.catalog.search_catalog_objects, body=body)
+                if not result.is_success():
+                    raise RuntimeError(f"Failed to search catalog objects: {result.errors}")
+
+                objects = result.body.get('objects', [])
+                for obj in objects:
+                    seen.add(obj['id'])
+                    if obj.get('updated_at') and (latest_time is None or obj['updated_at'] > latest_time):
+                        latest_time = obj['updated_at']
+
+                    obj_type = obj.get('type')
+                    if obj.get('is_deleted'):
+                        counts['deleted'] += self._mark_deleted(obj, products, variations, categories)
+                    elif obj_type == 'ITEM':
+                        self._apply_item(session, obj, products, variations)
+                        seen.update(var['id'] for var in obj.get('item_data', {}).get('variations', []))
+                        counts['items'] += 1
+                    elif obj_type == 'ITEM_VARIATION':
+                        self._apply_variation(session, obj, variations, products)
+                        counts['variations'] += 1
+                    elif obj_type == 'CATEGORY':
+                        self._apply_category(session, obj, categories)
+                        counts['categories'] += 1
+
+                latest_time = result.body.get('latest_time') or latest_time
+                cursor = result.body.get('cursor')
+                logger.info(f"Synced page of {len(objects)} objects")
+                if not cursor:
+                    break
+
+            if begin_time is None:
+                # Anything not returned by a full sync no longer exists in Square
+                for rows in (products, variations, categories):
+                    for square_id, row in rows.items():
+                        if square_id not in seen and not row.is_deleted:
+                            row.is_deleted = True
+                            counts['deleted'] += 1
+
+            # Link variations whose item arrived later in the sync
+            for row in variations.values():
+                if row.square_product_id is None and row.item_square_id in products:
+                    row.square_product = products[row.item_square_id]
+
+            if state is None:
+                state = SquareSyncState(name=SYNC_STATE_NAME)
+                session.add(state)
+            if latest_time:
+                state.last_synced_at = latest_time
+
+            session.commit()
+            logger.info(f"Catalog sync finished in {time.time() - start_time:.2f}s: {counts}")
+            return counts
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error syncing Square catalog: {str(e)}")
+            raise
+        finally:
+            session.close()
+
+    def _apply_item(self, session, obj, products, variations):
+        """Upsert an ITEM and the variations nested in it"""
+        item_data = obj.get('item_data', {})
+        row = products.get(obj['id'])
+        if row is None:
+            row = SquareProduct(square_id=obj['id'])
+            session.add(row)
+            products[obj['id']] = row
+
+        category_id = item_data.get('category_id')
+        if not category_id and item_data.get('categories'):
+            category_id = item_data['categories'][0].get('id')
+
+        # Variations are mirrored in their own rows so they can change independently
+        stored = dict(obj)
+        stored['item_data'] = {k: v for k, v in item_data.items() if k != 'variations'}
+
+        row.square_version = obj.get('version')
+        row.name = item_data.get('name', '')
+        row.description = item_data.get('description', '')
+        row.category_id = category_id
+        row.image_ids = json.dumps(item_data.get('image_ids', []))
+        row.product_type = item_data.get('product_type')
+        row.is_archived = bool(item_data.get('is_archived'))
+        row.is_deleted = False
+        row.square_updated_at = obj.get('updated_at')
+        row.catalog_object = json.dumps(stored)
+        row.updated_at = datetime.utcnow()
+
+        for variation in item_data.get('variations', []):
+            self._apply_variation(session, variation, variations, products)
+
+    def _apply_variation(self, session, obj, variations, products):
+        """Upsert an ITEM_VARIATION"""
+        var_data = obj.get('item_variation_data', {})
+        row = variations.get(obj['id'])
+        if row is None:
+            row = SquareVariation(square_id=obj['id'])
+            session.add(row)
+            variations[obj['id']] = row
+
+        vendor_infos = var_data.get('item_variation_vendor_infos', [])
+        vendor_info = vendor_infos[0].get('item_variation_vendor_info_data', {}) if vendor_infos else {}
+
+        row.square_version = obj.get('version')
+        row.item_square_id = var_data.get('item_id')
+        row.square_product = products.get(var_data.get('item_id'))
+        row.name = var_data.get('name', '')
+        row.sku = var_data.get('sku', '')
+        row.ordinal = var_data.get('ordinal')
+        row.price_money = var_data.get('price_money', {}).get('amount')
+        row.unit_cost = var_data.get('default_unit_cost', {}).get('amount')
+        row.vendor_id = vendor_info.get('vendor_id')
+        row.vendor_sku = vendor_info.get('sku', '')
+        row.vendor_price = vendor_info.get('price_money', {}).get('amount')
+        row.vendor_infos = json.dumps(vendor_infos)
+        row.image_ids = json.dumps(var_data.get('image_ids', []))
+        row.is_deleted = False
+        row.square_updated_at = obj.get('updated_at')
+        row.catalog_object = json.dumps(obj)
+        row.updated_at = datetime.utcnow()
+
+    def _apply_category(self, session, obj, categories):
+        """Upsert a CATEGORY"""
+        row = categories.get(obj['id'])
+        if row is None:
+            row = SquareCategory(square_id=obj['id'])
+            session.add(row)
+            categories[obj['id']] = row
+
+        row.square_version = obj.get('version')
+        row.name = obj.get('category_data', {}).get('name', '')
+        row.is_deleted = False
+        row.updated_at = datetime.utcnow()
+
+    def _mark_deleted(self, obj, products, variations, categories):
+        """Flag a deleted object's row; returns 1 if a mirrored row was deleted"""
+        rows = {'ITEM': products, 'ITEM_VARIATION': variations, 'CATEGORY': categories}.get(obj.get('type'), {})
+        row = rows.get(obj['id'])
+        if row is None or row.is_deleted:
+            return 0
+        row.is_deleted = True
+        row.square_version = obj.get('version')
+        row.updated_at = datetime.utcnow()
+        return 1
+
+    def get_items(self):
+        """Active REGULAR items from the mirror, shaped like SquareCatalog.process_catalog_items"""
+        session = self.Session()
+        try:
+            products = (
+                session.query(SquareProduct)
+                .filter(SquareProduct.is_deleted == False)
+                .filter(or_(SquareProduct.is_archived == False, SquareProduct.is_archived.is_(None)))
+                .filter(or_(SquareProduct.product_type == 'REGULAR', SquareProduct.product_type.is_(None)))
+                .filter(SquareProduct.catalog_object.isnot(None))
+                .order_by(SquareProduct.name)
+                .all()
+            )
+
+            variations_by_item = {}
+            for row in (session.query(SquareVariation)
+                        .filter(SquareVariation.is_deleted == False)
+                        .order_by(SquareVariation.ordinal, SquareVariation.id)):
+                variations_by_item.setdefault(row.item_square_id, []).append(json.loads(row.catalog_object))
+
+            raw_items = []
+            for product in products:
+                item = json.loads(product.catalog_object)
+                item['item_data']['variations'] = variations_by_item.get(product.square_id, [])
+                raw_items.append(item)
+
+            logger.info(f"Loaded {len(raw_items)} items from the local catalog mirror")
+            return self.catalog.process_catalog_items({'items': raw_items})
+        finally:
+            session.close()
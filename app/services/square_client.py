@@ -1,25 +1,82 @@
+import httpx
+import time
 from square.client import Client
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from app.core.config import settings
 from app.utils.logger import setup_logger
+from app.utils.metrics import SQUARE_REQUEST_SECONDS, SQUARE_REQUESTS, track_square_call
 
 logger = setup_logger(__name__)
 
+# Shared connection pool for the async Square API calls
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+class SquareApiResult:
+    """Minimal stand-in for the SDK's ApiResponse for calls made over httpx"""
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.body = response.json() if response.content else {}
+        self.errors = self.body.get('errors')
+        
+    def is_success(self) -> bool:
+        return 200 <= self.status_code < 300
+
 class SquareClient:
+    """Square API access for the FastAPI endpoints.
+    
+    Catalog reads go over a shared httpx.AsyncClient (keep-alive connection
+    pool) so they never block the event loop. Calls that still need the
+    squareup SDK run in the threadpool.
+    """
     def __init__(self):
         self.client = Client(
             access_token=settings.SQUARE_ACCESS_TOKEN,
             environment=settings.SQUARE_ENVIRONMENT
         )
+        self._http: Optional[httpx.AsyncClient] = None
+        
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared async HTTP client, created on first use inside the running event loop"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.client.config.get_base_uri(),
+                headers={
+                    "Authorization": f"Bearer {settings.SQUARE_ACCESS_TOKEN}",
+                    "Square-Version": self.client.config.square_version,
+                    "Accept": "application/json"
+                },
+                limits=HTTP_POOL_LIMITS,
+                timeout=HTTP_TIMEOUT
+            )
+        return self._http
+        
+    async def close(self) -> None:
+        """Close the shared connection pool (called on app shutdown)"""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        
+    async def _get(self, operation: str, path: str, params: Optional[dict] = None) -> SquareApiResult:
+        """GET a Square API path over the shared connection pool, recording it under operation"""
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = await self.http.get(path, params=params)
+            status = str(response.status_code)
+        finally:
+            SQUARE_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+            SQUARE_REQUESTS.inc(operation=operation, status=status)
+        return SquareApiResult(response)
         
     async def get_catalog_items(self, cursor: Optional[str] = None) -> List[dict]:
         """Get catalog items from Square"""
         try:
-            result = self.client.catalog.list_catalog(
-                types="ITEM",
-                cursor=cursor
-            )
+            result = await self._get("list_catalog", "/v2/catalog/list", params={"types": "ITEM", "cursor": cursor})
             
             if result.is_success():
                 return result.body.get('objects', [])
@@ -37,9 +94,7 @@ class SquareClient:
     async def get_catalog_item(self, item_id: str) -> dict:
         """Get a specific catalog item from Square"""
         try:
-            result = self.client.catalog.retrieve_catalog_object(
-                object_id=item_id
-            )
+            result = await self._get("retrieve_catalog_object", f"/v2/catalog/object/{item_id}")
             
             if result.is_success():
                 return result.body.get('object')
@@ -57,7 +112,9 @@ class SquareClient:
     async def upload_image(self, image_data: bytes, filename: str) -> dict:
         """Upload an image to Square"""
         try:
-            result = self.client.catalog.create_catalog_image(
+            # Multipart image upload stays on the SDK, off the event loop
+            result = await run_in_threadpool(
+                track_square_call, 'create_catalog_image', self.client.catalog.create_catalog_image,
                 request={
                     "idempotency_key": filename,
                     "image": {
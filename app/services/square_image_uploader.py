@@ -7,6 +7,7 @@ from fastapi import HTTPException
 from square.client import Client
 from app.config import ImageDownloadConfig
 from app.utils.logger import setup_logger
+from app.utils.metrics import track_square_call
 from app.utils.paths import paths
 from app.core.config import settings
 from app.utils.verify_paths import PathVerifier
@@ -52,7 +53,8 @@ class SquareImageUploader:
 
     async def upload_image_to_square(self, item_id: str, image_data: bytes) -> None:
         try:
-            result = self.client.catalog.create_catalog_image(
+            result = track_square_call(
+                'create_catalog_image', self.client.catalog.create_catalog_image,
                 request={
                     "idempotency_key": str(uuid.uuid4()),
                     "object_id": item_id,
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from pprint import pformat
+from typing import Dict, Optional
+from app.core.config import settings
+from app.utils.logger import setup_logger
+from app.utils.metrics import track_square_call
+from app.utils.paths import paths
+
+logger = setup_logger('vendor_map')
+
+# Vendors per search_vendors page
+VENDOR_PAGE_SIZE = 100
+# Seconds before retrying after a failed fetch
+VENDOR_MAP_RETRY_DELAY = 60
+
+
+def fetch_vendors(client) -> Optional[Dict[str, str]]:
+    """All active vendors as {vendor_id: name}, following pagination cursors; None on failure"""
+    vendor_map = {}
+    cursor = None
+    while True:
+        body = {
+            "filter": {
+                "status": ["ACTIVE"]
+            },
+            "sort": {
+                "field": "NAME",
+                "order": "ASC"
+            },
+            "limit": VENDOR_PAGE_SIZE
+        }
+        if cursor:
+            body["cursor"] = cursor
+
+        result = track_square_call('search_vendors', client.vendors.search_vendors, body=body)
+        if not result.is_success():
+            logger.error("Failed to fetch vendors:")
+            logger.error(pformat(result.errors))
+            return None
+
+        for vendor in result.body.get('vendors', []):
+            vendor_id = vendor.get('id')
+            vendor_name = vendor.get('name')
+            if vendor_id and vendor_name:
+                vendor_map[vendor_id] = vendor_name
+                logger.debug(f"Mapped vendor: {vendor_id} -> {vendor_name}")
+
+        cursor = result.body.get('cursor')
+        if not cursor:
+            return vendor_map
+
+
+class VendorMapCache:
+    """Square vendor id -> name map shared by every SquareCatalog.
+
+    The map is kept in memory and persisted to paths.VENDOR_MAP, so new
+    catalog instances (and new processes) reuse it instead of calling
+    search_vendors. Once it is older than settings.VENDOR_MAP_TTL the stale
+    map keeps being served while one background thread refreshes it; only
+    the very first lookup, with nothing stored yet, waits for the API.
+    """
+
+    def __init__(self, map_file=None, ttl: Optional[int] = None):
+        self.map_file = map_file or paths.VENDOR_MAP
+        self.ttl = ttl or settings.VENDOR_MAP_TTL
+        self.vendors: Optional[Dict[str, str]] = None
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def get(self, client) -> Dict[str, str]:
+        """Current vendor map, refreshing it in the background when it is stale"""
+        with self.lock:
+            if self.vendors is None:
+                self._load()
+            vendors = self.vendors
+            stale = time.time() - self.fetched_at > self.ttl
+            start_refresh = stale and vendors is not None and not self.refreshing
+            if start_refresh:
+                self.refreshing = True
+
+        if vendors is None:
+            # Nothing to serve yet; fetch on this thread
+            return self.refresh(client) or {}
+        if start_refresh:
+            logger.info("Vendor map is stale, refreshing in the background")
+            threading.Thread(target=self.refresh, args=(client,), daemon=True).start()
+        return vendors
+
+    def refresh(self, client) -> Optional[Dict[str, str]]:
+        """Fetch the vendors now and store them; keeps the previous map if the fetch fails"""
+        try:
+            logger.info("\n=== Fetching Vendors Using Vendors API ===")
+            vendors = fetch_vendors(client)
+        except Exception as e:
+            logger.error(f"Error fetching vendors: {str(e)}")
+            vendors = None
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+        if vendors is None:
+            with self.lock:
+                # Serve what we have (or nothing) until the retry delay has passed
+                if self.vendors is None:
+                    self.vendors = {}
+                self.fetched_at = time.time() - self.ttl + VENDOR_MAP_RETRY_DELAY
+            return None
+        logger.info(f"Found {len(vendors)} vendors")
+        fetched_at = time.time()
+        with self.lock:
+            self.vendors = vendors
+            self.fetched_at = fetched_at
+        self._save(vendors, fetched_at)
+        return vendors
+
+    def _load(self) -> None:
+        """Read the persisted map (called with the lock held)"""
+        try:
+            with open(self.map_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.vendors = data['vendors']
+            self.fetched_at = data['fetched_at']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vendor map {self.map_file}: {str(e)}")
+
+    def _save(self, vendors: Dict[str, str], fetched_at: float) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.map_file), exist_ok=True)
+            tmp_file = f"{self.map_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': fetched_at, 'vendors': vendors}, f)
+            os.replace(tmp_file, self.map_file)
+        except Exception as e:
+            logger.error(f"Error saving vendor map: {str(e)}")
+
+
+# Shared instance used by SquareCatalog
+vendor_map_cache = VendorMapCache()
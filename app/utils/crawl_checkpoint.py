@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from app.utils.logger import setup_logger
+from app.utils.paths import paths
+
+logger = setup_logger('crawl_checkpoint')
+
+# Checkpoints older than this are ignored by --resume and the crawl starts over
+CHECKPOINT_MAX_AGE = 24 * 3600
+# Minimum seconds between checkpoint writes while a crawl is running
+CHECKPOINT_INTERVAL = 30
+
+
+@dataclass
+class CrawlCheckpoint:
+    """Progress of one scraper's crawl of one start URL"""
+    scraper: str
+    start_url: str
+    # Listing start URL -> next listing page to fetch (None once that listing is finished)
+    listings: Dict[str, Optional[str]] = field(default_factory=dict)
+    # Product URLs found on finished listing pages, and those fully processed
+    products_found: List[str] = field(default_factory=list)
+    products_done: List[str] = field(default_factory=list)
+    # What product pages need from their listing page (e.g. Winco's product names), by product URL
+    listing_data: Dict[str, Dict] = field(default_factory=dict)
+    completed: bool = False
+    updated_at: float = 0.0
+
+
+class CrawlProgress:
+    """Records a running crawl's progress and periodically writes it to its checkpoint.
+
+    Listing pages are recorded with page_done() once their product links
+    are known, along with anything their products need from the listing
+    page, and products with product_done() once they are saved. A save is
+    written at most every CHECKPOINT_INTERVAL seconds (and by save()); the
+    optional before_save hook runs first, so anything buffered for the
+    products marked done (e.g. database rows) is persisted before the
+    checkpoint claims them.
+    """
+
+    def __init__(self, store: 'CheckpointStore', checkpoint: CrawlCheckpoint, resumed: bool = False):
+        self.store = store
+        self.checkpoint = checkpoint
+        self.resumed = resumed
+        self.found = set(checkpoint.products_found)
+        self.done = set(checkpoint.products_done)
+        self.before_save: Optional[Callable[[], None]] = None
+        self.lock = threading.Lock()
+        self.last_saved = time.time()
+
+    def resume_from(self, listing_url: str) -> Optional[str]:
+        """Listing page to start this listing at: its recorded next page, None if finished"""
+        return self.checkpoint.listings.get(listing_url, listing_url)
+
+    def pending_products(self) -> List[str]:
+        """Products found on finished listing pages but not yet done"""
+        return [url for url in self.checkpoint.products_found if url not in self.done]
+
+    def listing_data_for(self, product_url: str) -> Optional[Dict]:
+        """What the product's listing page recorded for it, if anything"""
+        return self.checkpoint.listing_data.get(product_url)
+
+    def is_done(self, product_url: str) -> bool:
+        return product_url in self.done
+
+    def is_finished(self, listing_url: str) -> bool:
+        """True once the listing has no next page and all its products are done"""
+        return self.resume_from(listing_url) is None and not self.pending_products()
+
+    def page_done(self, listing_url: str, product_urls: List[str], next_url: Optional[str],
+                  listing_data: Optional[Dict[str, Dict]] = None) -> None:
+        """A listing page's links are queued; the listing continues at next_url"""
+        with self.lock:
+            new_urls = [url for url in product_urls if url not in self.found]
+            self.found.update(new_urls)
+            self.checkpoint.products_found.extend(new_urls)
+            for url in new_urls:
+                if listing_data and url in listing_data:
+                    self.checkpoint.listing_data[url] = listing_data[url]
+            self.checkpoint.listings[listing_url] = next_url
+        self.maybe_save()
+
+    def product_done(self, product_url: str) -> None:
+        with self.lock:
+            if product_url not in self.done:
+                self.done.add(product_url)
+                self.checkpoint.products_done.append(product_url)
+                self.checkpoint.listing_data.pop(product_url, None)
+        self.maybe_save()
+
+    def maybe_save(self) -> None:
+        if time.time() - self.last_saved >= CHECKPOINT_INTERVAL:
+            self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint now"""
+        with self.lock:
+            self.last_saved = time.time()
+        if self.before_save:
+            self.before_save()
+        with self.lock:
+            self.store.save(self.checkpoint)
+
+    def complete(self) -> None:
+        """Mark the crawl finished so a resumed run skips it"""
+        self.checkpoint.completed = True
+        self.save()
+
+
+class CheckpointStore:
+    """Crawl checkpoints on disk, one JSON file per (scraper, start URL).
+
+    Files live under paths.CRAWL_CHECKPOINT_DIR, named by the SHA-256 of
+    the scraper name and start URL. A normal run starts a new checkpoint;
+    a --resume run picks up the last one unless it is older than max_age.
+    """
+
+    def __init__(self, checkpoint_dir=None, max_age: float = CHECKPOINT_MAX_AGE):
+        self.checkpoint_dir = checkpoint_dir or paths.CRAWL_CHECKPOINT_DIR
+        self.max_age = max_age
+
+    def _path(self, scraper: str, start_url: str) -> str:
+        digest = hashlib.sha256(f"{scraper}\n{start_url}".encode('utf-8')).hexdigest()
+        return os.path.join(self.checkpoint_dir, f"{digest}.json")
+
+    def load(self, scraper: str, start_url: str) -> Optional[CrawlCheckpoint]:
+        """Last checkpoint for this crawl, or None if missing, unreadable or expired"""
+        try:
+            with open(self._path(scraper, start_url), 'r', encoding='utf-8') as f:
+                checkpoint = CrawlCheckpoint(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint for {scraper} {start_url}: {str(e)}")
+            return None
+
+        if checkpoint.start_url != start_url or time.time() - checkpoint.updated_at > self.max_age:
+            return None
+        return checkpoint
+
+    def open(self, scraper: str, start_url: str, resume: bool = False) -> CrawlProgress:
+        """Progress tracker for a crawl, continuing the last checkpoint when resuming"""
+        checkpoint = self.load(scraper, start_url) if resume else None
+        if checkpoint is None:
+            return CrawlProgress(self, CrawlCheckpoint(scraper=scraper, start_url=start_url))
+        return CrawlProgress(self, checkpoint, resumed=True)
+
+    def save(self, checkpoint: CrawlCheckpoint) -> None:
+        checkpoint.updated_at = time.time()
+        filepath = self._path(checkpoint.scraper, checkpoint.start_url)
+        try:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            tmp_file = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint.__dict__, f)
+            os.replace(tmp_file, filepath)
+        except Exception as e:
+            logger.error(f"Error saving checkpoint for {checkpoint.scraper} {checkpoint.start_url}: {str(e)}")
+
+
+# Shared instance used by the scrapers
+checkpoint_store = CheckpointStore()
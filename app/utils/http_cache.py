@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from app.utils.logger import setup_logger
+from app.utils.paths import paths
+
+logger = setup_logger('http_cache')
+
+# Entries not stored or revalidated (304) for this long are refetched unconditionally
+HTTP_CACHE_MAX_AGE = 7 * 24 * 3600
+
+
+@dataclass
+class CachedPage:
+    """A cached response body and its validators"""
+    url: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+
+
+class HttpCache:
+    """Persistent conditional-GET cache for crawled pages.
+
+    Each URL is stored as one JSON file (body plus ETag / Last-Modified)
+    under paths.HTTP_CACHE_DIR, named by the URL's SHA-256. Requests send the
+    stored validators as If-None-Match / If-Modified-Since, and a 304 reply
+    is answered from the stored body. Responses without validators are not
+    cached since they can never come back as 304.
+    """
+
+    def __init__(self, cache_dir=None, max_age: float = HTTP_CACHE_MAX_AGE):
+        self.cache_dir = cache_dir or paths.HTTP_CACHE_DIR
+        self.max_age = max_age
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Cached page for a URL, or None if missing, unreadable or expired"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = CachedPage(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {str(e)}")
+            return None
+
+        if entry.url != url or time.time() - entry.stored_at > self.max_age:
+            return None
+        return entry
+
+    def conditional_headers(self, entry: Optional[CachedPage]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a cached page"""
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, body: str, response_headers) -> None:
+        """Cache a 200 response body if it came with validators"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        self._write(CachedPage(url=url, body=body, etag=etag, last_modified=last_modified, stored_at=time.time()))
+
+    def revalidated(self, entry: CachedPage, response_headers) -> None:
+        """Restart an entry's max age after a 304, taking any new validators the server sent"""
+        entry.etag = response_headers.get('ETag') or entry.etag
+        entry.last_modified = response_headers.get('Last-Modified') or entry.last_modified
+        entry.stored_at = time.time()
+        self._write(entry)
+
+    def _write(self, entry: CachedPage) -> None:
+        filepath = self._path(entry.url)
+        try:
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            tmp_file = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entry.__dict__, f)
+            os.replace(tmp_file, filepath)
+        except Exception as e:
+            logger.error(f"Error caching {entry.url}: {str(e)}")
+
+    def forget(self, url: str) -> None:
+        """Drop a URL so its next fetch is unconditional"""
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+
+# Shared instance used by the transport
+http_cache = HttpCache()
@@ -1,21 +1,192 @@
+import atexit
 import logging
+import multiprocessing.util
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app.utils.paths import paths
 
+# Level for every logger LOG_LEVELS does not name; when unset each logger keeps
+# the level it was set up with (DEBUG unless setup_logger was given one)
+DEFAULT_LOG_LEVEL = os.getenv('LOG_LEVEL', '').upper() or None
+# Per-logger overrides, e.g. LOG_LEVELS="image_matcher=DEBUG,app.api=WARNING";
+# a name also covers its dotted children
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+
 # Track initialized loggers to prevent duplicate handlers
 _initialized_loggers = set()
+# Levels loggers were set up with, and the LOG_LEVELS overrides
+_declared_levels = {}
+_levels = {}
+for _entry in filter(None, (part.strip() for part in LOG_LEVELS.split(','))):
+    _name, _, _level = _entry.partition('=')
+    _levels[_name.strip()] = _level.strip().upper()
+
+
+class LazyMessage:
+    """Log argument that is only rendered if the record is actually written.
+
+    Use it for expensive payloads: logger.debug("Response:\n%s", lazy(pformat, body))
+    costs nothing while DEBUG is off for that logger.
+    """
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+
+def lazy(func, *args, **kwargs):
+    """Defer func(*args, **kwargs) until the log record is formatted"""
+    return LazyMessage(func, *args, **kwargs)
+
+
+class _LogDispatcher(logging.Handler):
+    """Runs on the listener thread: writes each record to its logger's file, INFO and up to the console.
+
+    Records from child loggers that were never set up (e.g. "scraper.http")
+    go to the file of their closest set-up parent, as they did when they
+    propagated to its handlers.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.file_handlers = {}
+        self.console = logging.StreamHandler()
+        self.console.setLevel(logging.INFO)
+        self.console.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+
+    def emit(self, record):
+        file_handler = self._file_handler_for(record.name)
+        if file_handler:
+            file_handler.handle(record)
+        if record.levelno >= self.console.level:
+            self.console.handle(record)
+
+    def _file_handler_for(self, name):
+        while name:
+            file_handler = self.file_handlers.get(name)
+            if file_handler:
+                return file_handler
+            name = name.rpartition('.')[0]
+        return None
+
+
+class _AsyncHandler(QueueHandler):
+    """Queues records for the listener thread; writes directly once logging is stopped"""
+
+    def emit(self, record):
+        if _listener is None:
+            _dispatcher.handle(record)
+        else:
+            super().emit(record)
+
+
+_dispatcher = _LogDispatcher()
+_queue_handler = _AsyncHandler(queue.SimpleQueue())
+_listener = None
+_listener_lock = threading.Lock()
+_stopped = False
+_inherited_streams = []
+
+
+def _start_listener():
+    """Start this process's writer thread"""
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, _dispatcher)
+    _listener.start()
+    _register_stop()
+
+
+def _register_stop(*_):
+    # multiprocessing children skip atexit but run these finalizers
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=100)
+
+
+def _restart_after_fork():
+    """The parent's writer thread does not exist in a forked child"""
+    global _listener, _listener_lock
+    _listener_lock = threading.Lock()
+    # That thread may have been mid-write on the inherited files: reopen them, and
+    # keep the old streams alive so the parent's buffered lines are not written twice
+    for handler in _dispatcher.file_handlers.values():
+        if handler.stream is not None:
+            _inherited_streams.append(handler.stream)
+            handler.stream = None
+    if _listener is not None:
+        _start_listener()
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread; later records are written synchronously"""
+    global _listener, _stopped
+    with _listener_lock:
+        listener, _listener = _listener, None
+        _stopped = True
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_after_fork)
+# Child processes clear the finalizers they inherited before running
+multiprocessing.util.register_after_fork(_dispatcher, _register_stop)
+
+
+def _level_for(name):
+    """Configured level for a logger: its own or its closest dotted parent's override,
+    else LOG_LEVEL, else the level it was set up with"""
+    parts = name.split('.')
+    for i in range(len(parts), 0, -1):
+        level = _levels.get('.'.join(parts[:i]))
+        if level:
+            return level
+    return DEFAULT_LOG_LEVEL or _declared_levels.get(name, 'DEBUG')
+
+
+def set_log_level(level, name=None):
+    """Change log levels at runtime: one logger (and its dotted children), or the default for all"""
+    level = logging.getLevelName(level) if isinstance(level, int) else str(level).upper()
+    if name is None:
+        global DEFAULT_LOG_LEVEL
+        DEFAULT_LOG_LEVEL = level
+    else:
+        _levels[name] = level
+    for logger_name in _initialized_loggers:
+        logging.getLogger(logger_name).setLevel(_level_for(logger_name))
+
+
+def get_log_levels():
+    """Effective level of every logger set up so far"""
+    return {name: logging.getLevelName(logging.getLogger(name).level) for name in sorted(_initialized_loggers)}
+
+
+def setup_logger(name, max_file_size_mb=10, backup_count=5, level=None):
+    """Set up logger with file and console output, with rotation and no duplicates.
 
-def setup_logger(name, max_file_size_mb=10, backup_count=5):
-    """Set up logger with file and console handlers, with rotation and no duplicates"""
+    Records are handed to a queue and written (to the rotating
+    logs/<name>.log file and, INFO and up, the console) by one background
+    thread per process, so callers never wait on disk or terminal I/O. The
+    logger's level is `level` (default DEBUG) unless LOG_LEVEL / LOG_LEVELS
+    say otherwise, and can be changed with set_log_level(); records below
+    it are never created.
+    """
     logger = logging.getLogger(name)
     
     # Prevent duplicate handler setup
     if name in _initialized_loggers:
         return logger
     
-    logger.setLevel(logging.DEBUG)
+    if level is not None:
+        _declared_levels[name] = logging.getLevelName(level) if isinstance(level, int) else str(level).upper()
+    logger.setLevel(_level_for(name))
     
     # Clear any existing handlers to prevent duplicates
     logger.handlers.clear()
@@ -33,21 +204,18 @@ def setup_logger(name, max_file_size_mb=10, backup_count=5):
         maxBytes=max_bytes, 
         backupCount=backup_count
     )
-    file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     file_handler.setFormatter(file_formatter)
+    _dispatcher.file_handlers[name] = file_handler
     
-    # Console handler - keep at INFO level
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(levelname)s: %(message)s')
-    console_handler.setFormatter(console_formatter)
+    with _listener_lock:
+        if _listener is None and not _stopped:
+            _start_listener()
     
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Everything goes through the queue to the writer thread
+    logger.addHandler(_queue_handler)
     
     # Prevent propagation to root logger (prevents duplicate console output)
     logger.propagate = False
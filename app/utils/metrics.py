@@ -0,0 +1,216 @@
+import asyncio
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Sequence, Tuple
+
+# Latency buckets in seconds for HTTP and Square API calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Database statements are mostly sub-millisecond
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Background tasks (scrapes) run for minutes
+TASK_BUCKETS = (1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """A named metric with a fixed set of label names"""
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield from self._render_value(key, value)
+
+    def _render_value(self, key, value):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def _render_value(self, key, value):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies) over fixed buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        # Index of the first bucket the value fits in (len(buckets) is +Inf)
+        position = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # Per-bucket counts, then the +Inf count, then the sum
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[position] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key, counts):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames + ('le',), key + (_format_value(bound),))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(counts[-1])}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, rendered in the Prometheus text format.
+
+    Values live in memory and are per process: the API's /metrics reports
+    what the API process (including its background tasks) did. Metrics are
+    thread-safe and cheap enough to update from hot paths.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry exposed at /metrics
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    'http_requests_total', 'HTTP requests handled, by route template and status code',
+    ('method', 'route', 'status'))
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Time to produce an HTTP response', ('method', 'route'))
+SQUARE_REQUESTS = metrics.counter(
+    'square_api_requests_total', 'Square API calls, by operation and HTTP status ("error" if no response)',
+    ('operation', 'status'))
+SQUARE_REQUEST_SECONDS = metrics.histogram(
+    'square_api_request_duration_seconds', 'Square API call latency', ('operation',))
+TASK_SECONDS = metrics.histogram(
+    'background_task_duration_seconds', 'Background task run time, by outcome', ('task', 'status'),
+    buckets=TASK_BUCKETS)
+DB_QUERY_SECONDS = metrics.histogram(
+    'db_query_duration_seconds', 'SQL statement execution time', ('database', 'statement'),
+    buckets=DB_BUCKETS)
+CATALOG_CACHE_REQUESTS = metrics.counter(
+    'catalog_cache_requests_total', 'Catalog cache lookups, by hit or miss', ('result',))
+
+
+def track_square_call(operation: str, call: Callable, *args, **kwargs):
+    """Make one Square API call, recording its latency and response status"""
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        result = call(*args, **kwargs)
+        status = str(getattr(result, 'status_code', None) or 'error')
+        return result
+    finally:
+        SQUARE_REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+        SQUARE_REQUESTS.inc(operation=operation, status=status)
+
+
+def track_task(task: str, func: Callable) -> Callable:
+    """Wrap a background task function so its run time and outcome are recorded"""
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def run_async(*args, **kwargs):
+            status = 'error'
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                status = 'ok'
+                return result
+            finally:
+                TASK_SECONDS.observe(time.perf_counter() - start, task=task, status=status)
+        return run_async
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            status = 'ok'
+            return result
+        finally:
+            TASK_SECONDS.observe(time.perf_counter() - start, task=task, status=status)
+    return run
@@ -24,6 +24,24 @@ class ProjectPaths:
         # Database
         self.DB_FILE = self.APP_DIR / 'fireworks.db'
         
+        # Cached vendor image directory listings (see app/services/image_catalog.py)
+        self.IMAGE_CATALOG = self.DATA_DIR / 'image_catalog.json'
+        
+        # Square vendor id -> name map (see app/services/vendor_map.py)
+        self.VENDOR_MAP = self.DATA_DIR / 'vendor_map.json'
+        
+        # Touched to invalidate catalog API caches (see app/services/catalog_cache.py)
+        self.CATALOG_CACHE_STAMP = self.DATA_DIR / 'catalog_cache.stamp'
+        
+        # Conditional-GET cache of crawled pages (see app/utils/http_cache.py)
+        self.HTTP_CACHE_DIR = self.DATA_DIR / 'http_cache'
+        
+        # Content-addressed image blobs (see app/services/image_store.py)
+        self.IMAGE_STORE_DIR = self.DATA_DIR / 'image_store'
+        
+        # Progress of in-flight crawls, for --resume (see app/utils/crawl_checkpoint.py)
+        self.CRAWL_CHECKPOINT_DIR = self.DATA_DIR / 'crawl_checkpoints'
+        
         # Required directories
         self.REQUIRED_DIRS = {
             'config': self.CONFIG_DIR,
@@ -85,6 +103,12 @@ class ProjectPaths:
             f"  DATA_DIR: {self.DATA_DIR}",
             f"  IMAGES_DIR: {self.IMAGES_DIR}",
             f"  DB_FILE: {self.DB_FILE}",
+            f"  IMAGE_CATALOG: {self.IMAGE_CATALOG}",
+            f"  VENDOR_MAP: {self.VENDOR_MAP}",
+            f"  CATALOG_CACHE_STAMP: {self.CATALOG_CACHE_STAMP}",
+            f"  HTTP_CACHE_DIR: {self.HTTP_CACHE_DIR}",
+            f"  IMAGE_STORE_DIR: {self.IMAGE_STORE_DIR}",
+            f"  CRAWL_CHECKPOINT_DIR: {self.CRAWL_CHECKPOINT_DIR}",
             "Config Files:",
             f"  VENDOR_CONFIG: {self.VENDOR_CONFIG}",
             f"  WEBSITES_CONFIG: {self.WEBSITES_CONFIG}"
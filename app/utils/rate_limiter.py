@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short
+    bursts of up to `capacity` calls go through immediately and the sustained
+    rate never exceeds `rate` calls per second.
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until `tokens` tokens are available, then take them"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so every caller waits at least `seconds` (e.g. after a 429)"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
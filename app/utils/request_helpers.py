@@ -1,11 +1,8 @@
-import requests
-import warnings
-from urllib3.exceptions import InsecureRequestWarning
+from app.utils.transport import transport
 
 def get_with_ssl_ignore(url, headers=None, timeout=30):
     """
     Make a GET request ignoring SSL verification warnings
+    (through the shared pooled transport, retrying transient failures)
     """
-    with warnings.catch_warnings():
-        warnings.filterwarnings('ignore', category=InsecureRequestWarning)
-        return requests.get(url, headers=headers, verify=False, timeout=timeout) 
\ No newline at end of file
+    return transport.get(url, headers=headers, timeout=timeout)
@@ -0,0 +1,224 @@
+import asyncio
+import random
+import threading
+import time
+import warnings
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InsecureRequestWarning
+from app.utils.http_cache import http_cache
+from app.utils.logger import setup_logger
+
+logger = setup_logger('transport')
+
+# Connection pool size per host session (matches the widest scraper thread pools)
+POOL_MAXSIZE = 32
+DEFAULT_TIMEOUT = 30
+# Retry policy for GETs: attempts after the first, and the backoff base/cap in seconds
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 10.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Idle keep-alive connections are kept this long by the aiohttp connector
+KEEPALIVE_TIMEOUT = 30
+# How long aiohttp caches DNS lookups
+DNS_CACHE_TTL = 300
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry `attempt` (0-based): Retry-After if given, else full-jitter backoff"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class Transport:
+    """Shared HTTP transport for scrapers.
+
+    Keeps one pooled requests.Session per host so keep-alive connections,
+    TLS sessions and DNS results are reused across pages and images, retries
+    GETs on connection errors and 429/5xx with jittered exponential backoff,
+    and remembers per host whether HTTPS works so http:// URLs stop being
+    probed once it is known. Async crawls get aiohttp sessions configured
+    the same way.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, requests.Session] = {}
+        self.https_hosts: Dict[str, bool] = {}
+        self.lock = threading.Lock()
+
+    def session_for(self, url: str) -> requests.Session:
+        """Pooled session for the URL's host"""
+        host = urlparse(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled in get() so they can be jittered and logged
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+        return session
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: float = DEFAULT_TIMEOUT,
+            retries: int = MAX_RETRIES, **kwargs) -> requests.Response:
+        """GET with pooling, SSL verification disabled and retry on transient failures.
+
+        Like requests.get, non-retryable error statuses are returned, not
+        raised; the last response (or exception) is surfaced once retries
+        are exhausted.
+        """
+        session = self.session_for(url)
+        # Passed per request: a session-level verify=False is overridden by REQUESTS_CA_BUNDLE
+        kwargs.setdefault('verify', False)
+        for attempt in range(retries + 1):
+            try:
+                with warnings.catch_warnings():
+                    warnings.filterwarnings('ignore', category=InsecureRequestWarning)
+                    response = session.get(url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"Request to {url} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+            logger.warning(f"Got status {response.status_code} from {url}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def prefer_https(self, url: str, headers: Optional[Dict] = None) -> str:
+        """Upgrade an http:// URL to https:// if its host serves HTTPS.
+
+        The host is settled by the first probe that gets a 2xx/3xx over
+        HTTPS (supported) or fails to connect (unsupported). An error status
+        only keeps that URL on HTTP, since it says nothing about the host.
+        """
+        if not url.startswith('http://'):
+            return url
+        host = urlparse(url).netloc
+        supported = self.https_hosts.get(host)
+        https_url = url.replace('http://', 'https://', 1)
+        if supported is None:
+            try:
+                response = self.get(https_url, headers=headers, timeout=10, retries=0, stream=True)
+                response.close()
+            except requests.RequestException:
+                # Connection refused, TLS handshake failure, timeout: no HTTPS on this host
+                self.https_hosts[host] = False
+                logger.debug(f"HTTPS unavailable for {host}")
+                return url
+            if response.status_code >= 400:
+                return url
+            supported = self.https_hosts[host] = True
+            logger.debug(f"HTTPS available for {host}")
+        return https_url if supported else url
+
+    def create_async_session(self, headers: Optional[Dict] = None, limit_per_host: int = 0,
+                             timeout: float = DEFAULT_TIMEOUT) -> aiohttp.ClientSession:
+        """aiohttp session with keep-alive, DNS caching and SSL verification disabled.
+
+        aiohttp sessions are bound to an event loop, so each crawl creates
+        its own and closes it when done.
+        """
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL
+        )
+        return aiohttp.ClientSession(
+            headers=headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+        )
+
+    async def fetch_text(self, session: aiohttp.ClientSession, url: str,
+                         retries: int = MAX_RETRIES) -> Optional[str]:
+        """GET a page's text with the same retry policy as get(); None on failure"""
+        result = await self._request(session, url, retries=retries)
+        if result is None:
+            return None
+        status, text, _ = result
+        if status != 200:
+            logger.error(f"Error making request to {url}: status {status}")
+            return None
+        return text
+
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str,
+                         retries: int = MAX_RETRIES) -> Optional[Tuple[str, bool]]:
+        """Conditional GET through the on-disk page cache.
+
+        Returns (text, changed), where changed is False when the server
+        answered 304 and text came from the cache; None on failure.
+        """
+        entry = http_cache.get(url)
+        result = await self._request(session, url, http_cache.conditional_headers(entry), retries)
+        if result is None:
+            return None
+        status, text, response_headers = result
+        if status == 304 and entry:
+            http_cache.revalidated(entry, response_headers)
+            return entry.body, False
+        if status != 200:
+            logger.error(f"Error making request to {url}: status {status}")
+            return None
+        http_cache.store(url, text, response_headers)
+        return text, True
+
+    async def _request(self, session: aiohttp.ClientSession, url: str, headers: Optional[Dict] = None,
+                       retries: int = MAX_RETRIES) -> Optional[Tuple[int, str, Mapping]]:
+        """GET with retries on 429/5xx and connection errors; (status, text, headers) or None"""
+        for attempt in range(retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status not in RETRY_STATUSES or attempt >= retries:
+                        text = await response.text(errors='replace') if response.status == 200 else ''
+                        return response.status, text, response.headers.copy()
+                    delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+                    logger.warning(f"Got status {response.status} from {url}, retrying in {delay:.1f}s")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    logger.error(f"Error making request to {url}: {str(e)}")
+                    return None
+                delay = backoff_delay(attempt)
+                logger.warning(f"Request to {url} failed ({str(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return None
+
+    def get_page(self, url: str, headers: Optional[Dict] = None,
+                 timeout: float = DEFAULT_TIMEOUT) -> Tuple[str, bool]:
+        """Blocking counterpart of fetch_page; raises on connection errors or bad statuses"""
+        entry = http_cache.get(url)
+        request_headers = dict(headers or {})
+        request_headers.update(http_cache.conditional_headers(entry))
+        response = self.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and entry:
+            http_cache.revalidated(entry, response.headers)
+            return entry.body, False
+        response.raise_for_status()
+        http_cache.store(url, response.text, response.headers)
+        return response.text, True
+
+    def close(self) -> None:
+        """Close every pooled session"""
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+
+# Shared instance used by all scrapers
+transport = Transport()
@@ -0,0 +1,65 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Square clients are created when their modules are imported
+os.environ.setdefault('SQUARE_ACCESS_TOKEN', 'test-token')
+
+from app.utils.paths import paths
+
+
+@pytest.fixture
+def matcher(tmp_path, monkeypatch):
+    """Matching-only ImageMatcher whose image catalog and vendor images live under tmp_path"""
+    from app.services.image_matcher import ImageMatcher
+
+    monkeypatch.setattr(paths, 'IMAGE_CATALOG', tmp_path / 'image_catalog.json')
+    image_matcher = ImageMatcher(connect_square=False)
+    image_matcher.base_dir = str(tmp_path / 'images')
+    return image_matcher
+
+
+class FakeSite:
+    """Queued responses per path for a local HTTP server, and the requests it received"""
+
+    def __init__(self, url):
+        self.url = url
+        self.responses = {}
+        self.requests = []
+
+    def add(self, path, status=200, body='', headers=None):
+        """Queue a response for path; the last one queued keeps being served"""
+        self.responses.setdefault(path, []).append((status, body, headers or {}))
+
+    def next_response(self, path):
+        queued = self.responses.get(path) or [(404, '', {})]
+        return queued.pop(0) if len(queued) > 1 else queued[0]
+
+
+@pytest.fixture
+def site():
+    """FakeSite served on localhost from a background thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fake.requests.append((self.path, dict(self.headers)))
+            status, body, headers = fake.next_response(self.path)
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    fake = FakeSite(f"http://127.0.0.1:{server.server_port}")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield fake
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,207 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.scrapers import base_scraper as base_scraper_module
+from app.scrapers.base_scraper import ProductData
+from app.scrapers.supreme_scraper import SupremeFireworksScraper
+from app.scrapers.winco_scraper import WincoFireworksScraper
+from app.utils import crawl_checkpoint as crawl_checkpoint_module
+from app.utils.crawl_checkpoint import CheckpointStore
+from app.utils.paths import paths
+
+START_URL = 'https://winco.test/shop'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A CheckpointStore under tmp_path, also used by the crawl engine"""
+    checkpoints = CheckpointStore(checkpoint_dir=tmp_path / 'checkpoints')
+    monkeypatch.setattr(base_scraper_module, 'checkpoint_store', checkpoints)
+    return checkpoints
+
+
+def test_progress_is_saved_and_resumed(store):
+    progress = store.open('winco_scraper', START_URL)
+    assert not progress.resumed
+    progress.page_done(START_URL, ['p1', 'p2'], f"{START_URL}/page/2", {'p1': {'name': 'One'}})
+    progress.product_done('p2')
+    progress.save()
+
+    assert store.open('winco_scraper', START_URL).checkpoint.products_found == []
+    resumed = store.open('winco_scraper', START_URL, resume=True)
+    assert resumed.resumed
+    assert resumed.resume_from(START_URL) == f"{START_URL}/page/2"
+    assert resumed.pending_products() == ['p1']
+    assert resumed.listing_data_for('p1') == {'name': 'One'}
+    assert resumed.is_done('p2') and not resumed.is_finished(START_URL)
+
+    resumed.page_done(START_URL, ['p1', 'p3'], None)
+    resumed.product_done('p1')
+    resumed.product_done('p3')
+    assert resumed.is_finished(START_URL)
+    assert resumed.checkpoint.products_found == ['p1', 'p2', 'p3']
+    # Listing data is only kept while a product is pending
+    assert resumed.checkpoint.listing_data == {}
+
+
+def test_saves_are_throttled_and_flush_first(store, monkeypatch):
+    monkeypatch.setattr(crawl_checkpoint_module, 'CHECKPOINT_INTERVAL', 3600)
+    progress = store.open('winco_scraper', START_URL)
+    events = []
+    progress.before_save = lambda: events.append('flush')
+    saved = store.save
+    monkeypatch.setattr(store, 'save', lambda checkpoint: events.append('save') or saved(checkpoint))
+
+    progress.page_done(START_URL, ['p1'], None)
+    progress.product_done('p1')
+    assert events == []
+    progress.complete()
+    assert events == ['flush', 'save']
+    assert store.load('winco_scraper', START_URL).completed
+
+
+def test_unusable_checkpoints_start_over(store, monkeypatch):
+    progress = store.open('winco_scraper', START_URL)
+    progress.page_done(START_URL, ['p1'], None)
+    progress.save()
+    assert store.open('winco_scraper', 'https://winco.test/other', resume=True).resumed is False
+
+    monkeypatch.setattr(store, 'max_age', 0)
+    time.sleep(0.01)
+    assert store.load('winco_scraper', START_URL) is None
+
+    path = store._path('winco_scraper', START_URL)
+    with open(path, 'w') as f:
+        f.write('{not json')
+    assert store.load('winco_scraper', START_URL) is None
+
+
+def test_checkpoints_from_before_listing_data_still_load(store):
+    path = store._path('winco_scraper', START_URL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'scraper': 'winco_scraper', 'start_url': START_URL, 'listings': {START_URL: None},
+                   'products_found': ['p1'], 'products_done': [], 'completed': False,
+                   'updated_at': time.time()}, f)
+    resumed = store.open('winco_scraper', START_URL, resume=True)
+    assert resumed.pending_products() == ['p1']
+    assert resumed.listing_data_for('p1') is None
+
+
+def listing(*products, next_url=None):
+    cards = ''.join(f'<li class="product"><h3 class="product-title"><a href="{url}">{name}</a></h3></li>'
+                    for url, name in products)
+    more = f'<a class="next page-numbers" href="{next_url}">Next</a>' if next_url else ''
+    return f'<ul>{cards}</ul>{more}'
+
+
+class FakeWinco(WincoFireworksScraper):
+    """Winco scraper over canned pages; URLs in `failing` fail to fetch"""
+
+    PAGES = {
+        START_URL: listing((f'{START_URL}/p1', 'Big Bang'), (f'{START_URL}/p2', 'Sky King'),
+                           next_url=f'{START_URL}/page/2'),
+        f'{START_URL}/page/2': listing((f'{START_URL}/p3', 'Thunder Storm')),
+    }
+
+    def __init__(self, failing=(), resume=False):
+        super().__init__()
+        self.config['delay'] = 0
+        self.resume = resume
+        self.failing = set(failing)
+        self.fetched = []
+        self.saved = []
+
+    def load_fresh_urls(self):
+        return set()
+
+    async def fetch_page(self, session, url):
+        self.fetched.append(url)
+        if url in self.failing:
+            return None
+        if url in self.PAGES:
+            return self.PAGES[url], True
+        return f'<img class="wp-post-image" src="{url}.png">', True
+
+    def process_product(self, product, product_soup, domain_dir):
+        self.saved.append(product.name)
+        return True
+
+
+def test_resumed_winco_crawl_keeps_listing_names(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, 'IMAGES_DIR', tmp_path / 'images')
+
+    # Interrupted: the second listing page and one product page fail
+    first = FakeWinco(failing={f'{START_URL}/page/2', f'{START_URL}/p1'})
+    assert first.crawl(START_URL) == 1
+    assert first.saved == ['Sky King']
+
+    # A new process knows no product names until a listing page is parsed
+    second = FakeWinco(resume=True)
+    assert second.crawl(START_URL) == 2
+    assert sorted(second.saved) == ['Big Bang', 'Thunder Storm']
+    assert START_URL not in second.fetched
+    assert f'{START_URL}/p2' not in second.fetched
+
+    third = FakeWinco(resume=True)
+    assert third.crawl(START_URL) == 0
+    assert third.fetched == []
+
+
+def test_products_without_data_stay_pending(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, 'IMAGES_DIR', tmp_path / 'images')
+    first = FakeWinco(failing={f'{START_URL}/page/2', f'{START_URL}/p1'})
+    first.crawl(START_URL)
+
+    # Without the recorded name the product cannot be extracted, and must not count as done
+    progress = store.open('winco_scraper', START_URL, resume=True)
+    progress.checkpoint.listing_data.clear()
+    progress.save()
+    second = FakeWinco(resume=True)
+    second.crawl(START_URL)
+    assert 'Big Bang' not in second.saved
+    assert store.open('winco_scraper', START_URL, resume=True).pending_products() == [f'{START_URL}/p1']
+
+
+class FakeSupreme(SupremeFireworksScraper):
+    """Supreme category crawl over one canned page; products in `failing` are not saved"""
+
+    CATEGORY_URL = 'http://supreme.test/usa'
+
+    def __init__(self, failing=(), resume=False):
+        super().__init__()
+        self.resume = resume
+        self.failing = set(failing)
+        self.saved = []
+
+    def make_request(self, url, timeout=30, max_retries=3):
+        return type('Response', (), {'text': '<html></html>'})()
+
+    def get_product_links(self, soup, base_url):
+        return [{'url': f'{self.CATEGORY_URL}/{code}', 'code': code} for code in ('p1', 'p2')]
+
+    def extract_product_data(self, product_soup, product_url, known_code=None):
+        return ProductData(name=known_code, url=product_url, image_url=f'{product_url}.jpg')
+
+    def save_product(self, product_data, domain_dir):
+        if product_data.name in self.failing:
+            return False
+        self.saved.append(product_data.name)
+        return True
+
+
+def test_unsaved_supreme_products_stay_pending(store):
+    first = FakeSupreme(failing={'p1'})
+    first.checkpoint = store.open(first.scraper_name, START_URL)
+    first.process_category(FakeSupreme.CATEGORY_URL, '/tmp')
+    first.checkpoint.save()
+    assert first.saved == ['p2']
+
+    second = FakeSupreme(resume=True)
+    second.checkpoint = store.open(second.scraper_name, START_URL, resume=True)
+    second.process_category(FakeSupreme.CATEGORY_URL, '/tmp')
+    assert second.saved == ['p1']
+    assert second.checkpoint.is_finished(FakeSupreme.CATEGORY_URL)
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from app.scrapers import base_scraper as base_scraper_module
+from app.scrapers.base_scraper import BaseScraper, ProductData
+from app.utils import transport as transport_module
+from app.utils.http_cache import HttpCache
+from app.utils.transport import Transport
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """An HttpCache under tmp_path, used by the transport and the crawl engine"""
+    page_cache = HttpCache(cache_dir=tmp_path / 'http_cache')
+    monkeypatch.setattr(transport_module, 'http_cache', page_cache)
+    monkeypatch.setattr(base_scraper_module, 'http_cache', page_cache)
+    return page_cache
+
+
+def fetch_page(url):
+    shared = Transport()
+
+    async def fetch():
+        async with shared.create_async_session() as session:
+            return await shared.fetch_page(session, url)
+
+    return asyncio.run(fetch())
+
+
+def test_conditional_get_and_304(site, cache):
+    url = f"{site.url}/listing"
+    site.add('/listing', body='v1', headers={'ETag': '"abc"', 'Last-Modified': 'Wed, 01 Jan 2026 00:00:00 GMT'})
+    site.add('/listing', status=304)
+
+    assert fetch_page(url) == ('v1', True)
+    assert fetch_page(url) == ('v1', False)
+    _, headers = site.requests[-1]
+    assert headers['If-None-Match'] == '"abc"'
+    assert headers['If-Modified-Since'] == 'Wed, 01 Jan 2026 00:00:00 GMT'
+
+
+def test_blocking_get_page_uses_the_same_cache(site, cache):
+    url = f"{site.url}/listing"
+    site.add('/listing', body='v1', headers={'ETag': '"abc"'})
+    site.add('/listing', status=304)
+    shared = Transport()
+    assert shared.get_page(url) == ('v1', True)
+    assert shared.get_page(url) == ('v1', False)
+
+
+def test_changed_page_replaces_the_entry(site, cache):
+    url = f"{site.url}/listing"
+    site.add('/listing', body='v1', headers={'ETag': '"1"'})
+    site.add('/listing', body='v2', headers={'ETag': '"2"'})
+    fetch_page(url)
+    assert fetch_page(url) == ('v2', True)
+    assert cache.get(url).etag == '"2"'
+
+
+def test_304_restarts_the_max_age(site, cache):
+    url = f"{site.url}/listing"
+    site.add('/listing', body='v1', headers={'ETag': '"1"'})
+    site.add('/listing', status=304, headers={'ETag': '"1b"'})
+    fetch_page(url)
+
+    entry = cache.get(url)
+    entry.stored_at = time.time() - cache.max_age + 60
+    cache._write(entry)
+    assert fetch_page(url) == ('v1', False)
+
+    entry = cache.get(url)
+    assert entry.stored_at > time.time() - 60
+    assert entry.etag == '"1b"'
+
+
+def test_pages_without_validators_are_not_cached(site, cache):
+    url = f"{site.url}/listing"
+    site.add('/listing', body='v1')
+    assert fetch_page(url) == ('v1', True)
+    assert cache.get(url) is None
+
+
+def test_expired_and_forgotten_entries(cache):
+    cache.store('http://vendor.test/p', 'body', {'ETag': '"1"'})
+    assert cache.get('http://vendor.test/p').body == 'body'
+    assert cache.conditional_headers(cache.get('http://vendor.test/p')) == {'If-None-Match': '"1"'}
+
+    cache.forget('http://vendor.test/p')
+    cache.forget('http://vendor.test/p')
+    assert cache.get('http://vendor.test/p') is None
+
+    expired = HttpCache(cache_dir=cache.cache_dir, max_age=0)
+    cache.store('http://vendor.test/p', 'body', {'ETag': '"1"'})
+    time.sleep(0.01)
+    assert expired.get('http://vendor.test/p') is None
+
+
+class Checkpoint:
+    def __init__(self):
+        self.done = []
+
+    def product_done(self, url):
+        self.done.append(url)
+
+
+class CachedScraper(BaseScraper):
+    """Crawl engine over a fixed product page whose extraction and saving can be made to fail"""
+
+    def __init__(self, product, save):
+        # Any configured scraper will do; nothing here touches its site
+        super().__init__('winco_scraper')
+        self.checkpoint = Checkpoint()
+        self.product = product
+        self.save = save
+
+    async def fetch_page(self, session, url):
+        return '<html></html>', True
+
+    def extract_product_data(self, product_soup, product_url):
+        return self.product
+
+    def process_product(self, product, product_soup, domain_dir):
+        return self.save(self)
+
+
+def crawl_product(scraper, url):
+    asyncio.run(scraper._crawl_product(None, url, '/tmp', -1, {'processed': 0}))
+
+
+@pytest.mark.parametrize('product, save', [
+    (None, lambda scraper: True),
+    (ProductData(name='Big Bang', url='u'), lambda scraper: scraper.count(errors=1)),
+    (ProductData(name='Big Bang', url='u'), lambda scraper: 1 / 0),
+])
+def test_products_that_are_not_saved_are_forgotten(cache, product, save):
+    url = 'http://vendor.test/product'
+    cache.store(url, 'page', {'ETag': '"1"'})
+    scraper = CachedScraper(product, save)
+    crawl_product(scraper, url)
+    assert cache.get(url) is None
+    assert scraper.checkpoint.done == []
+
+
+def test_saved_products_stay_cached(cache):
+    url = 'http://vendor.test/product'
+    cache.store(url, 'page', {'ETag': '"1"'})
+    scraper = CachedScraper(ProductData(name='Big Bang', url=url), lambda scraper: False)
+    crawl_product(scraper, url)
+    assert cache.get(url) is not None
+    assert scraper.checkpoint.done == [url]
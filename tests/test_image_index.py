@@ -0,0 +1,107 @@
+import os
+import random
+import re
+
+import pytest
+from fuzzywuzzy import fuzz
+
+from app.services.image_index import ImageIndex
+from app.services.image_matcher import MIN_MATCH_SCORE
+
+WORDS = ['golden', 'dragon', 'thunder', 'king', 'sky', 'fire', 'storm', 'blue', 'red', 'rhino',
+         'star', 'burst', 'night', 'crackle', 'willow', 'palm', 'comet', 'mine', 'peony', 'strobe']
+DESCRIPTIVE = ['500 gram', 'artillery shells', 'cake', 'repeater', 'finale']
+
+
+def linear_scan(matcher, name_to_match, image_files, sku=None, vendor_sku=None):
+    """find_best_match as it was before the index: SKU checks, then a fuzz.ratio scan of every file"""
+    for query in filter(None, [sku]):
+        for image_file in image_files:
+            base_name = os.path.splitext(image_file)[0].lower()
+            if query.lower() == base_name or re.search(rf'\b{re.escape(query.lower())}\b', base_name):
+                return image_file, 100
+    if vendor_sku:
+        clean_sku = re.sub(r'[^a-zA-Z0-9]', '', vendor_sku.lower())
+        for image_file in image_files:
+            base_name = os.path.splitext(image_file)[0].lower()
+            if vendor_sku.lower() == base_name or re.search(rf'\b{re.escape(vendor_sku.lower())}\b', base_name):
+                return image_file, 100
+            if clean_sku and clean_sku in re.sub(r'[^a-zA-Z0-9]', '', base_name):
+                return image_file, 100
+
+    clean_name = matcher.clean_name(name_to_match)
+    best_match, best_ratio = None, 0
+    for image_file in image_files:
+        ratio = fuzz.ratio(clean_name, matcher.clean_name(os.path.splitext(image_file)[0]))
+        if ratio > best_ratio:
+            best_match, best_ratio = image_file, ratio
+            if ratio == 100:
+                break
+    if best_match and best_ratio >= MIN_MATCH_SCORE:
+        return best_match, best_ratio
+    return None, best_ratio
+
+
+def random_name(rng):
+    words = rng.sample(WORDS, rng.randint(1, 3))
+    if rng.random() < 0.3:
+        words.append(rng.choice(DESCRIPTIVE))
+    return ' '.join(words)
+
+
+@pytest.fixture
+def image_files():
+    rng = random.Random(7)
+    files = []
+    for i in range(300):
+        name = random_name(rng).replace(' ', '-')
+        code = rng.choice(['', f'RR{1000 + i}-', f'sp-{i}-', f'{rng.randint(100, 999)}'])
+        files.append(f"{code}{name}{rng.choice(['.png', '.jpg', '.PNG'])}")
+    return files
+
+
+@pytest.fixture
+def queries():
+    rng = random.Random(11)
+    skus = [None, None, None, 'RR1005', 'sp-42', 'RR 1010', '999999', 'XYZ']
+    return [
+        (random_name(rng).title(), rng.choice(skus), rng.choice(skus))
+        for _ in range(150)
+    ]
+
+
+def test_find_best_match_agrees_with_linear_scan(matcher, image_files, queries):
+    index = ImageIndex(image_files, matcher.clean_name)
+    for name, sku, vendor_sku in queries:
+        expected = linear_scan(matcher, name, image_files, sku=sku, vendor_sku=vendor_sku)
+        assert matcher.find_best_match(name, index, sku=sku, vendor_sku=vendor_sku) == expected
+        assert matcher.find_best_match(name, image_files, sku=sku, vendor_sku=vendor_sku) == expected
+
+
+def test_pruned_and_full_row_scoring_agree(matcher, image_files, queries):
+    index = ImageIndex(image_files, matcher.clean_name)
+    for name, _, _ in queries:
+        clean_name = matcher.clean_name(name)
+        scored = []
+        pruned = index.best_name_match(clean_name, on_compare=lambda *args: scored.append(args))
+        assert pruned == index.best_name_match(clean_name)
+        assert len(scored) <= len(image_files)
+
+
+def test_ties_go_to_the_earlier_file(matcher):
+    files = ['blue-comet.png', 'Blue Comet.jpg', 'blue-comet-2.png']
+    index = ImageIndex(files, matcher.clean_name)
+    assert matcher.find_best_match('Blue Comet', index) == ('blue-comet.png', 100)
+
+
+def test_sku_candidates_cover_every_sku_match(matcher, image_files):
+    index = ImageIndex(image_files, matcher.clean_name)
+    for sku in ['RR1005', 'sp-42', 'RR 1010', 'rr10']:
+        compact = re.sub(r'[^a-zA-Z0-9]', '', sku.lower())
+        expected = [pos for pos, name in enumerate(index.compact_names) if compact in name]
+        assert set(expected) <= set(index.sku_candidates(sku))
+
+
+def test_empty_file_list(matcher):
+    assert matcher.find_best_match('Golden Dragon', []) == (None, 0)
+    assert ImageIndex([], matcher.clean_name).best_name_match('golden dragon') == (None, 0)
@@ -0,0 +1,76 @@
+import os
+import random
+
+import pytest
+import yaml
+
+from app.services.image_matcher import ImageMatcher
+from app.utils.paths import paths
+from test_image_index import random_name
+
+VENDORS = {'Acme': 'www.acmefireworks.com', 'Bolt': 'boltfireworks.com'}
+
+
+@pytest.fixture
+def vendor_matcher(tmp_path, monkeypatch):
+    """ImageMatcher over two generated vendor image directories and a vendor with none"""
+    config_file = tmp_path / 'vendor_directories.yaml'
+    config_file.write_text(yaml.safe_dump({'vendors': {**VENDORS, 'Empty': 'empty.com'},
+                                           'aliases': {'AC': 'Acme'}}))
+    monkeypatch.setattr(paths, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(paths, 'VENDOR_CONFIG', config_file)
+    monkeypatch.setattr(paths, 'IMAGE_CATALOG', tmp_path / 'image_catalog.json')
+
+    rng = random.Random(3)
+    for vendor_dir, count in [('acmefireworks.com', 200), ('boltfireworks.com', 80)]:
+        directory = tmp_path / 'images' / vendor_dir
+        directory.mkdir(parents=True)
+        for i in range(count):
+            code = rng.choice(['', f'AC{i}-', f'{rng.randint(100, 999)}-'])
+            (directory / f"{code}{random_name(rng).replace(' ', '-')}.png").write_bytes(b'')
+    return ImageMatcher(connect_square=False)
+
+
+@pytest.fixture
+def variations():
+    rng = random.Random(5)
+    names = [random_name(rng).title() for _ in range(60)]
+    return [
+        {
+            'name': rng.choice(names),
+            'vendor_name': rng.choice(['Acme', 'Bolt', 'AC', 'Empty', 'Unknown', None]),
+            'square_sku': rng.choice([None, None, 'AC12', '4242']),
+            'vendor_sku': rng.choice([None, None, 'ac-7', 'AC 150']),
+        }
+        for _ in range(240)
+    ]
+
+
+def expected_result(matcher, var):
+    vendor_dir = matcher.get_vendor_directory(var['vendor_name'])
+    if not vendor_dir:
+        return {'vendor_dir': None, 'image_file': None, 'image_path': None, 'match_ratio': 0}
+    image_file, ratio = matcher.find_best_match(
+        var['name'], matcher.get_image_index(vendor_dir), sku=var['square_sku'], vendor_sku=var['vendor_sku']
+    )
+    return {
+        'vendor_dir': vendor_dir,
+        'image_file': image_file,
+        'image_path': os.path.join(matcher.base_dir, vendor_dir, image_file) if image_file else None,
+        'match_ratio': ratio,
+    }
+
+
+def test_match_batch_agrees_with_find_best_match(vendor_matcher, variations):
+    results = vendor_matcher.match_batch(variations)
+    assert results == [expected_result(vendor_matcher, var) for var in variations]
+    assert any(result['image_file'] for result in results)
+    assert any(result['vendor_dir'] == 'empty.com' and not result['image_file'] for result in results)
+
+
+def test_worker_pool_gives_the_same_results(vendor_matcher, variations):
+    assert vendor_matcher.match_batch(variations, workers=3) == vendor_matcher.match_batch(variations)
+
+
+def test_empty_batch(vendor_matcher):
+    assert vendor_matcher.match_batch([]) == []
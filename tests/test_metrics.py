@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.metrics import metrics_middleware
+from app.utils.metrics import HTTP_REQUESTS, SQUARE_REQUESTS, TASK_SECONDS, MetricsRegistry, \
+    track_square_call, track_task
+
+
+def test_render_format():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests handled', ('method', 'route'))
+    latency = registry.histogram('latency_seconds', 'Request latency', ('route',), buckets=(0.1, 1.0))
+    plain = registry.counter('events_total', 'Events')
+
+    requests.inc(method='GET', route='/items/{id}')
+    requests.inc(2, method='GET', route='/items/{id}')
+    requests.inc(method='POST', route='/say "hi"\n')
+    latency.observe(0.05, route='/items')
+    latency.observe(0.5, route='/items')
+    latency.observe(3, route='/items')
+    plain.inc()
+
+    assert registry.render() == '\n'.join([
+        '# HELP requests_total Requests handled',
+        '# TYPE requests_total counter',
+        'requests_total{method="GET",route="/items/{id}"} 3',
+        'requests_total{method="POST",route="/say \\"hi\\"\\n"} 1',
+        '# HELP latency_seconds Request latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/items",le="0.1"} 1',
+        'latency_seconds_bucket{route="/items",le="1"} 2',
+        'latency_seconds_bucket{route="/items",le="+Inf"} 3',
+        'latency_seconds_sum{route="/items"} 3.55',
+        'latency_seconds_count{route="/items"} 3',
+        '# HELP events_total Events',
+        '# TYPE events_total counter',
+        'events_total 1',
+    ]) + '\n'
+
+
+def test_metrics_reject_wrong_labels_and_duplicate_names():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests handled', ('method',))
+    with pytest.raises(ValueError):
+        requests.inc(route='/')
+    with pytest.raises(ValueError):
+        registry.histogram('requests_total', 'Again')
+
+
+def test_histogram_bucket_bounds_are_inclusive():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Request latency', buckets=(1.0,))
+    latency.observe(1.0)
+    assert 'latency_seconds_bucket{le="1"} 1' in registry.render()
+
+
+def test_track_square_call_records_status():
+    ok_before = SQUARE_REQUESTS.values.get(('test_operation', '200'), 0)
+    error_before = SQUARE_REQUESTS.values.get(('test_operation', 'error'), 0)
+
+    result = track_square_call('test_operation', lambda body: SimpleNamespace(status_code=200, body=body), body=1)
+    assert result.body == 1
+    with pytest.raises(ConnectionError):
+        track_square_call('test_operation', lambda: (_ for _ in ()).throw(ConnectionError()))
+
+    assert SQUARE_REQUESTS.values[('test_operation', '200')] == ok_before + 1
+    assert SQUARE_REQUESTS.values[('test_operation', 'error')] == error_before + 1
+
+
+def task_runs(task, status):
+    """How many runs of task ended with status (the histogram's count)"""
+    counts = TASK_SECONDS.values.get((task, status))
+    return sum(counts[:-1]) if counts else 0
+
+
+def test_track_task_records_outcome():
+    def fail():
+        raise RuntimeError()
+
+    async def run_async(value):
+        return value
+
+    before = (task_runs('test_task', 'ok'), task_runs('test_task', 'error'), task_runs('test_async_task', 'ok'))
+    assert track_task('test_task', lambda: 'done')() == 'done'
+    with pytest.raises(RuntimeError):
+        track_task('test_task', fail)()
+    assert asyncio.run(track_task('test_async_task', run_async)(7)) == 7
+
+    after = (task_runs('test_task', 'ok'), task_runs('test_task', 'error'), task_runs('test_async_task', 'ok'))
+    assert after == tuple(count + 1 for count in before)
+
+
+def test_requests_are_labelled_with_their_route_template():
+    router = APIRouter()
+
+    @router.get('/items/{item_id}')
+    async def get_item(item_id: str):
+        return {'id': item_id}
+
+    app = FastAPI()
+    app.middleware('http')(metrics_middleware)
+    app.include_router(router, prefix='/test-api')
+    client = TestClient(app)
+
+    route_key = ('GET', '/test-api/items/{item_id}', '200')
+    before = HTTP_REQUESTS.values.get(route_key, 0)
+    missing_before = HTTP_REQUESTS.values.get(('GET', 'unmatched', '404'), 0)
+    client.get('/test-api/items/1')
+    client.get('/test-api/items/2')
+    client.get('/nowhere')
+
+    assert HTTP_REQUESTS.values[route_key] == before + 2
+    assert HTTP_REQUESTS.values[('GET', 'unmatched', '404')] == missing_before + 1
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from app.db.engine import get_engine
+from app.db.migrations import MIGRATIONS, applied_versions, check_schema, migrate
+from app.models.product import VendorProduct, VENDOR_PRODUCT_KEY_INDEX
+
+# The product tables as the original models created them
+BASELINE_SCHEMA = """
+CREATE TABLE base_products (
+    id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, created_at DATETIME, updated_at DATETIME
+);
+CREATE TABLE vendor_products (
+    id INTEGER PRIMARY KEY, base_product_id INTEGER REFERENCES base_products (id),
+    vendor_name VARCHAR(255) NOT NULL, vendor_sku VARCHAR(100), vendor_price FLOAT,
+    vendor_description TEXT, vendor_category VARCHAR(255), vendor_image_url VARCHAR(1024),
+    local_image_path VARCHAR(1024), vendor_product_url VARCHAR(1024), vendor_video_url VARCHAR(1024),
+    created_at DATETIME, updated_at DATETIME
+);
+CREATE TABLE square_products (
+    id INTEGER PRIMARY KEY, base_product_id INTEGER REFERENCES base_products (id),
+    square_id VARCHAR(255) UNIQUE, square_version INTEGER, name VARCHAR(255), description TEXT,
+    category_id VARCHAR(255), price_money INTEGER, image_ids TEXT, created_at DATETIME, updated_at DATETIME
+);
+INSERT INTO base_products (id, name) VALUES (1, 'Big Bang'), (2, 'Sky King');
+INSERT INTO vendor_products (id, base_product_id, vendor_name, vendor_sku) VALUES
+    (1, 1, 'Winco', 'WN1'), (2, 1, 'Winco', 'WN1-dup'), (3, 2, 'Winco', 'WN2'),
+    (4, 1, 'Red Rhino', 'RR1'), (5, 1, 'Winco', 'WN1-dup2'),
+    (6, NULL, 'Winco', 'orphan'), (7, NULL, 'Winco', 'orphan-2');
+INSERT INTO square_products (id, square_id, name, price_money) VALUES (1, 'SQ1', 'Big Bang', 1999);
+"""
+
+ALL_VERSIONS = [version for version, _, _ in MIGRATIONS]
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    db_file = tmp_path / 'baseline.db'
+    with sqlite3.connect(db_file) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    return get_engine(db_file)
+
+
+def vendor_skus(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT id, vendor_sku FROM vendor_products ORDER BY id")).all()
+
+
+def test_baseline_database_is_migrated(baseline_db):
+    assert check_schema(baseline_db)['pending'] == ALL_VERSIONS
+    assert migrate(baseline_db) == ALL_VERSIONS
+
+    # Duplicates keep their oldest row; rows without a base product are left alone
+    assert vendor_skus(baseline_db) == [(1, 'WN1'), (3, 'WN2'), (4, 'RR1'), (6, 'orphan'), (7, 'orphan-2')]
+
+    columns = {col['name'] for col in inspect(baseline_db).get_columns('square_products')}
+    assert {'product_type', 'is_archived', 'is_deleted', 'square_updated_at', 'catalog_object'} <= columns
+    with baseline_db.connect() as conn:
+        assert conn.execute(text("SELECT square_id, name, price_money FROM square_products")).all() == \
+            [('SQ1', 'Big Bang', 1999)]
+
+    assert check_schema(baseline_db) == {'pending': [], 'missing_indexes': []}
+    assert applied_versions(baseline_db) == set(ALL_VERSIONS)
+
+
+def test_migrating_again_changes_nothing(baseline_db):
+    migrate(baseline_db)
+    before = vendor_skus(baseline_db)
+    assert migrate(baseline_db) == []
+    assert vendor_skus(baseline_db) == before
+
+
+def test_unique_key_is_enforced(baseline_db):
+    migrate(baseline_db)
+    indexes = {index['name']: index for index in inspect(baseline_db).get_indexes('vendor_products')}
+    assert indexes[VENDOR_PRODUCT_KEY_INDEX]['unique']
+    with pytest.raises(IntegrityError):
+        with baseline_db.begin() as conn:
+            conn.execute(VendorProduct.__table__.insert().values(base_product_id=1, vendor_name='Winco'))
+
+
+def test_partially_migrated_database_gets_the_rest(baseline_db):
+    assert migrate(baseline_db) == ALL_VERSIONS
+    with baseline_db.begin() as conn:
+        conn.execute(text("DELETE FROM schema_migrations WHERE version > 1"))
+    assert migrate(baseline_db) == ALL_VERSIONS[1:]
+
+
+def test_new_database_gets_every_version_as_a_no_op(tmp_path):
+    engine = get_engine(tmp_path / 'new.db')
+    assert migrate(engine) == ALL_VERSIONS
+    assert check_schema(engine) == {'pending': [], 'missing_indexes': []}
+    with engine.connect() as conn:
+        assert conn.execute(select(VendorProduct.__table__.c.id)).all() == []
@@ -0,0 +1,164 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.engine import get_engine
+from app.db.migrations import migrate
+from app.models.product import BaseProduct, VendorProduct
+from app.scrapers.base_scraper import ProductData
+from app.services.product_writer import ProductWriter, parse_price
+
+
+@pytest.fixture
+def engine(tmp_path):
+    products_engine = get_engine(tmp_path / 'products.db')
+    migrate(products_engine)
+    return products_engine
+
+
+def vendor_rows(engine):
+    """{(name, vendor): VendorProduct row mapping} for everything written"""
+    table = VendorProduct.__table__
+    query = (select(BaseProduct.__table__.c.name, table)
+             .join(BaseProduct.__table__, BaseProduct.__table__.c.id == table.c.base_product_id))
+    with engine.connect() as conn:
+        return {(row.name, row.vendor_name): row._mapping for row in conn.execute(query)}
+
+
+def test_insert_update_and_unchanged(engine):
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add(ProductData(name='Big Bang', url='https://winco.test/big-bang', price='$1,299.99', sku='WN1'))
+        writer.add(ProductData(name='Sky King', url='https://winco.test/sky-king'))
+    assert writer.stats['inserted'] == 2
+
+    first_seen = vendor_rows(engine)[('Big Bang', 'Winco')]['updated_at']
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add(ProductData(name='Big Bang', url='https://winco.test/big-bang', price='$1,299.99', sku='WN1'))
+        writer.add(ProductData(name='Sky King', url='https://winco.test/sky-king', sku='WN2'))
+    assert (writer.stats['unchanged'], writer.stats['updated'], writer.stats['inserted']) == (1, 1, 0)
+
+    rows = vendor_rows(engine)
+    assert len(rows) == 2
+    assert rows[('Big Bang', 'Winco')]['vendor_price'] == 1299.99
+    assert rows[('Sky King', 'Winco')]['vendor_sku'] == 'WN2'
+    # Unchanged products are still marked as recently seen
+    assert rows[('Big Bang', 'Winco')]['updated_at'] > first_seen
+
+
+def test_none_fields_keep_the_stored_value(engine):
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add(ProductData(name='Big Bang', url='https://winco.test/big-bang', description='Loud'),
+                   local_image_path='/images/big-bang.png')
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add(ProductData(name='Big Bang', url=None, description=None, category='Cakes'))
+    assert writer.stats['updated'] == 1
+
+    row = vendor_rows(engine)[('Big Bang', 'Winco')]
+    assert row['vendor_description'] == 'Loud'
+    assert row['vendor_product_url'] == 'https://winco.test/big-bang'
+    assert row['local_image_path'] == '/images/big-bang.png'
+    assert row['vendor_category'] == 'Cakes'
+
+
+def test_vendors_share_one_base_product(engine):
+    with ProductWriter(engine=engine) as writer:
+        writer.add_row('Big Bang', vendor_name='Winco', vendor_sku='WN1')
+        writer.add_row('Big Bang', vendor_name='Red Rhino', vendor_sku='RR1')
+    with engine.connect() as conn:
+        assert conn.execute(select(BaseProduct.__table__.c.id)).all() == [(1,)]
+    assert set(vendor_rows(engine)) == {('Big Bang', 'Winco'), ('Big Bang', 'Red Rhino')}
+
+
+def test_repeats_within_a_batch_merge_field_by_field(engine):
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add_row('Big Bang', vendor_sku='WN1', vendor_description='First')
+        writer.add_row('Big Bang', vendor_description='Second', vendor_category='Cakes')
+    assert writer.stats['inserted'] == 1
+    row = vendor_rows(engine)[('Big Bang', 'Winco')]
+    assert (row['vendor_sku'], row['vendor_description'], row['vendor_category']) == ('WN1', 'Second', 'Cakes')
+
+
+def test_duplicate_base_products_resolve_to_the_oldest(engine):
+    with engine.begin() as conn:
+        conn.execute(BaseProduct.__table__.insert(), [{'name': 'Big Bang'}, {'name': 'Big Bang'}])
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add_row('Big Bang', vendor_sku='WN1')
+    with engine.connect() as conn:
+        assert conn.execute(select(VendorProduct.__table__.c.base_product_id)).scalars().all() == [1]
+
+
+def test_full_buffer_is_written_without_waiting_for_close(engine):
+    writer = ProductWriter('Winco', batch_size=2, engine=engine)
+    writer.add_row('Big Bang')
+    assert vendor_rows(engine) == {}
+    writer.add_row('Sky King')
+    assert len(vendor_rows(engine)) == 2
+    assert writer.close()['batches'] == 1
+
+
+def test_failed_batches_are_counted_and_reported(engine, monkeypatch):
+    failed = []
+    writer = ProductWriter('Winco', engine=engine)
+    writer.on_failed = failed.extend
+    monkeypatch.setattr(writer, '_write_batch', lambda rows: 1 / 0)
+    writer.add_row('Big Bang', vendor_product_url='https://winco.test/big-bang')
+    assert writer.close()['failed'] == 1
+    assert [row['vendor_product_url'] for row in failed] == ['https://winco.test/big-bang']
+
+
+def test_invalid_records_are_rejected(engine):
+    writer = ProductWriter(engine=engine)
+    with pytest.raises(ValueError):
+        writer.add_row('Big Bang')
+    with pytest.raises(ValueError):
+        writer.add_row('Big Bang', vendor_name='Winco', vendor_colour='red')
+
+
+@pytest.mark.parametrize('price, expected', [
+    ('$1,299.99', 1299.99), ('12', 12.0), (7.5, 7.5), (None, None), ('Call for price', None),
+])
+def test_parse_price(price, expected):
+    assert parse_price(price) == expected
+
+
+def test_without_coalescing_records_replace_every_column(engine):
+    with ProductWriter('Winco', engine=engine) as writer:
+        writer.add_row('Big Bang', vendor_sku='WN1', vendor_description='Loud')
+    with ProductWriter('Winco', engine=engine, coalesce=False) as writer:
+        writer.add_row('Big Bang', vendor_description='First')
+        writer.add_row('Big Bang', vendor_category='Cakes')
+    assert writer.stats['updated'] == 1
+    row = vendor_rows(engine)[('Big Bang', 'Winco')]
+    assert (row['vendor_sku'], row['vendor_description'], row['vendor_category']) == (None, None, 'Cakes')
+
+
+def test_process_product_batch_db_replaces_values_in_the_callers_session(engine):
+    from sqlalchemy.orm import Session
+    from app.services.scrape_fireworks import process_product_batch_db
+
+    with Session(engine) as session:
+        session.add(BaseProduct(name='Sky King'))
+        session.flush()
+        assert process_product_batch_db([{'name': 'Big Bang', 'vendor_name': 'Winco', 'description': 'Loud',
+                                          'vendor_price': '$19.99'}], session)
+        assert process_product_batch_db([{'name': 'Big Bang', 'vendor_name': 'Winco',
+                                          'image_url': 'https://winco.test/big-bang.png'}], session)
+    # The caller's own pending work is committed with the batch
+    with engine.connect() as conn:
+        assert {name for name, in conn.execute(select(BaseProduct.__table__.c.name))} == {'Sky King', 'Big Bang'}
+    row = vendor_rows(engine)[('Big Bang', 'Winco')]
+    assert (row['vendor_description'], row['vendor_price']) == (None, None)
+    assert row['vendor_image_url'] == 'https://winco.test/big-bang.png'
+
+
+def test_process_product_batch_db_rolls_back_the_whole_batch(engine, monkeypatch):
+    from sqlalchemy.orm import Session
+    from app.services import scrape_fireworks
+
+    with Session(engine) as session:
+        session.add(BaseProduct(name='Sky King'))
+        session.flush()
+        monkeypatch.setattr(ProductWriter, '_write_batch', lambda self, rows: 1 / 0)
+        assert not scrape_fireworks.process_product_batch_db([{'name': 'Big Bang', 'vendor_name': 'Winco'}],
+                                                             session)
+    with engine.connect() as conn:
+        assert conn.execute(select(BaseProduct.__table__.c.name)).all() == []
@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.engine import get_engine
+from app.services.square_catalog_sync import SquareCatalogSync
+
+
+def item(item_id, name, variations, updated_at, **item_data):
+    return {'type': 'ITEM', 'id': item_id, 'version': 1, 'updated_at': updated_at,
+            'item_data': {'name': name, 'variations': variations, **item_data}}
+
+
+def variation(variation_id, item_id, name, updated_at, ordinal=0, sku=''):
+    return {'type': 'ITEM_VARIATION', 'id': variation_id, 'version': 1, 'updated_at': updated_at,
+            'item_variation_data': {'item_id': item_id, 'name': name, 'ordinal': ordinal, 'sku': sku}}
+
+
+class FakeCatalogApi:
+    """search_catalog_objects serving queued responses and recording each request body"""
+
+    def __init__(self):
+        self.pages = []
+        self.requests = []
+
+    def search_catalog_objects(self, body):
+        self.requests.append(body)
+        page = self.pages.pop(0)
+        return SimpleNamespace(is_success=lambda: True, body=page, errors=None, status_code=200)
+
+
+@pytest.fixture
+def api():
+    return FakeCatalogApi()
+
+
+@pytest.fixture
+def catalog_sync(tmp_path, api):
+    catalog = SimpleNamespace(
+        client=SimpleNamespace(catalog=api),
+        # The real SquareCatalog reshapes the items; the mirror's output is what is under test
+        process_catalog_items=lambda data: data['items'],
+    )
+    return SquareCatalogSync(catalog, engine=get_engine(tmp_path / 'catalog.db'))
+
+
+def names(items):
+    return {i['item_data']['name']: [v['item_variation_data']['name'] for v in i['item_data']['variations']]
+            for i in items}
+
+
+def test_full_sync_then_incremental_changes(catalog_sync, api):
+    t1, t2 = '2026-01-01T00:00:00Z', '2026-01-02T00:00:00Z'
+    api.pages = [
+        {'objects': [item('I1', 'Big Bang', [variation('V1', 'I1', 'Single', t1),
+                                              variation('V2', 'I1', 'Case', t1, ordinal=1)], t1)],
+         'cursor': 'page2'},
+        {'objects': [item('I2', 'Sky King', [variation('V3', 'I2', 'Regular', t1)], t1),
+                     {'type': 'CATEGORY', 'id': 'C1', 'version': 1, 'category_data': {'name': 'Cakes'}}],
+         'latest_time': t1},
+    ]
+    assert catalog_sync.sync() == {'items': 2, 'variations': 0, 'categories': 1, 'deleted': 0}
+    assert 'begin_time' not in api.requests[0]
+    assert api.requests[1]['cursor'] == 'page2'
+    assert names(catalog_sync.get_items()) == {'Big Bang': ['Single', 'Case'], 'Sky King': ['Regular']}
+
+    # Only changes since the last sync: a renamed variation, a deleted one and an archived item
+    api.pages = [{'objects': [
+        variation('V2', 'I1', 'Case of 4', t2, ordinal=1),
+        {'type': 'ITEM_VARIATION', 'id': 'V1', 'version': 2, 'is_deleted': True, 'updated_at': t2},
+        item('I2', 'Sky King', [variation('V3', 'I2', 'Regular', t2)], t2, is_archived=True),
+    ], 'latest_time': t2}]
+    counts = catalog_sync.sync()
+    assert counts == {'items': 1, 'variations': 1, 'categories': 0, 'deleted': 1}
+    assert api.requests[-1]['begin_time'] == t1
+    assert api.requests[-1]['include_deleted_objects'] is True
+    assert names(catalog_sync.get_items()) == {'Big Bang': ['Case of 4']}
+
+    api.pages = [{'objects': []}]
+    catalog_sync.sync()
+    assert api.requests[-1]['begin_time'] == t2
+
+
+def test_full_sync_deletes_what_square_no_longer_returns(catalog_sync, api):
+    t1 = '2026-01-01T00:00:00Z'
+    api.pages = [{'objects': [item('I1', 'Big Bang', [variation('V1', 'I1', 'Single', t1)], t1),
+                              item('I2', 'Sky King', [variation('V2', 'I2', 'Regular', t1)], t1)],
+                  'latest_time': t1}]
+    catalog_sync.sync()
+
+    api.pages = [{'objects': [item('I1', 'Big Bang', [variation('V1', 'I1', 'Single', t1)], t1)],
+                  'latest_time': t1}]
+    counts = catalog_sync.sync(full=True)
+    assert counts['deleted'] == 2
+    assert 'begin_time' not in api.requests[-1]
+    assert names(catalog_sync.get_items()) == {'Big Bang': ['Single']}
+
+
+def test_variation_before_its_item_is_linked(catalog_sync, api):
+    t1 = '2026-01-01T00:00:00Z'
+    api.pages = [{'objects': [variation('V1', 'I1', 'Single', t1),
+                              item('I1', 'Big Bang', [], t1)],
+                  'latest_time': t1}]
+    catalog_sync.sync()
+    assert names(catalog_sync.get_items()) == {'Big Bang': ['Single']}
+
+
+def test_failed_search_keeps_the_cursor(catalog_sync, api):
+    t1 = '2026-01-01T00:00:00Z'
+    api.pages = [{'objects': [item('I1', 'Big Bang', [], t1)], 'latest_time': t1}]
+    catalog_sync.sync()
+
+    api.search_catalog_objects = lambda body: SimpleNamespace(is_success=lambda: False, errors=['boom'])
+    with pytest.raises(RuntimeError):
+        catalog_sync.sync()
+
+    api.search_catalog_objects = FakeCatalogApi.search_catalog_objects.__get__(api)
+    api.pages = [{'objects': []}]
+    catalog_sync.sync()
+    assert api.requests[-1]['begin_time'] == t1
@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from app.utils import transport as transport_module
+from app.utils.transport import Transport, backoff_delay, BACKOFF_MAX
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """A fresh Transport whose retry backoff does not actually sleep"""
+    delays = []
+    monkeypatch.setattr(transport_module.time, 'sleep', delays.append)
+    shared = Transport()
+    shared.delays = delays
+    yield shared
+    shared.close()
+
+
+def test_retries_transient_statuses(site, transport):
+    site.add('/page', status=503)
+    site.add('/page', status=429, headers={'Retry-After': '2'})
+    site.add('/page', body='ok')
+    response = transport.get(f"{site.url}/page")
+    assert (response.status_code, response.text) == (200, 'ok')
+    assert len(site.requests) == 3
+    assert transport.delays[1] == 2.0
+
+
+def test_gives_up_after_retries_and_returns_the_last_response(site, transport):
+    site.add('/page', status=502)
+    assert transport.get(f"{site.url}/page", retries=2).status_code == 502
+    assert len(site.requests) == 3
+
+
+def test_error_statuses_that_are_not_transient_are_returned_at_once(site, transport):
+    site.add('/missing', status=404)
+    assert transport.get(f"{site.url}/missing").status_code == 404
+    assert len(site.requests) == 1
+
+
+def test_connection_errors_are_retried_then_raised(transport):
+    with pytest.raises(requests.ConnectionError):
+        transport.get('http://127.0.0.1:9/', retries=1, timeout=2)
+    assert len(transport.delays) == 1
+
+
+def test_one_pooled_session_per_host(site, transport):
+    assert transport.session_for(f"{site.url}/a") is transport.session_for(f"{site.url}/b")
+    assert transport.session_for(f"{site.url}/a") is not transport.session_for('https://example.com/')
+
+
+def test_prefer_https_probes_each_host_once(transport, monkeypatch):
+    probes = []
+
+    def fail(url, **kwargs):
+        probes.append(url)
+        raise requests.ConnectionError()
+
+    monkeypatch.setattr(transport, 'get', fail)
+    assert transport.prefer_https('http://vendor.test/a.png') == 'http://vendor.test/a.png'
+    assert transport.prefer_https('http://vendor.test/b.png') == 'http://vendor.test/b.png'
+    assert transport.prefer_https('https://vendor.test/c.png') == 'https://vendor.test/c.png'
+    assert probes == ['https://vendor.test/a.png']
+
+
+def test_prefer_https_is_not_settled_by_an_error_status(transport, monkeypatch):
+    statuses = {'https://vendor.test/missing.png': 404, 'https://vendor.test/a.png': 200}
+    probes = []
+
+    def probe(url, **kwargs):
+        probes.append(url)
+        return SimpleNamespace(status_code=statuses[url], close=lambda: None)
+
+    monkeypatch.setattr(transport, 'get', probe)
+    assert transport.prefer_https('http://vendor.test/missing.png') == 'http://vendor.test/missing.png'
+    assert transport.prefer_https('http://vendor.test/a.png') == 'https://vendor.test/a.png'
+    assert transport.prefer_https('http://vendor.test/b.png') == 'https://vendor.test/b.png'
+    assert probes == ['https://vendor.test/missing.png', 'https://vendor.test/a.png']
+
+
+def test_backoff_delay():
+    assert backoff_delay(0, '3') == 3.0
+    assert backoff_delay(0, '3600') == BACKOFF_MAX
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, 'soon') <= BACKOFF_MAX
+
+
+def test_fetch_text_retries_like_get(site, monkeypatch):
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(transport_module.asyncio, 'sleep', no_sleep)
+    site.add('/page', status=500)
+    site.add('/page', body='listing')
+    site.add('/gone', status=404)
+    shared = Transport()
+
+    async def fetch():
+        async with shared.create_async_session() as session:
+            return (await shared.fetch_text(session, f"{site.url}/page"),
+                    await shared.fetch_text(session, f"{site.url}/gone"))
+
+    assert asyncio.run(fetch()) == ('listing', None)
+    assert [path for path, _ in site.requests] == ['/page', '/page', '/gone']